@@ -0,0 +1,74 @@
+"""store token digests instead of full jwt
+
+Revision ID: 3f9c2b7d41ae
+Revises: 82b09d7ae139
+Create Date: 2026-10-18 11:30:12.418305
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3f9c2b7d41ae"
+down_revision: Union[str, None] = "82b09d7ae139"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# hex(sha256(token)) - как security.token_digest
+TOKEN_DIGEST_SQL = "encode(sha256(convert_to({column}, 'UTF8')), 'hex')"
+
+
+def upgrade() -> None:
+    # auth_user.refresh_token -> refresh_token_hash
+    op.add_column(
+        "auth_user",
+        sa.Column("refresh_token_hash", sa.String(length=64), nullable=True),
+    )
+    op.execute(
+        "UPDATE auth_user "
+        f"SET refresh_token_hash = {TOKEN_DIGEST_SQL.format(column='refresh_token')} "
+        "WHERE refresh_token IS NOT NULL"
+    )
+    op.drop_column("auth_user", "refresh_token")
+
+    # revoked_token.token -> token_hash
+    op.add_column(
+        "revoked_token",
+        sa.Column("token_hash", sa.String(length=64), nullable=True),
+    )
+    op.execute(
+        "UPDATE revoked_token "
+        f"SET token_hash = {TOKEN_DIGEST_SQL.format(column='token')}"
+    )
+    op.alter_column("revoked_token", "token_hash", nullable=False)
+    op.drop_column("revoked_token", "token")  # вместе с уникальным индексом
+    op.create_unique_constraint(
+        op.f("uq_revoked_token_token_hash"), "revoked_token", ["token_hash"]
+    )
+
+
+def downgrade() -> None:
+    # Исходные токены не восстановить: возвращаем колонки с дайджестами
+    op.add_column(
+        "revoked_token",
+        sa.Column("token", sa.String(), nullable=True),
+    )
+    op.execute("UPDATE revoked_token SET token = token_hash")
+    op.alter_column("revoked_token", "token", nullable=False)
+    op.drop_constraint(
+        op.f("uq_revoked_token_token_hash"), "revoked_token", type_="unique"
+    )
+    op.drop_column("revoked_token", "token_hash")
+    op.create_unique_constraint(
+        op.f("uq_revoked_token_token"), "revoked_token", ["token"]
+    )
+
+    op.add_column(
+        "auth_user",
+        sa.Column("refresh_token", sa.Text(), nullable=True),
+    )
+    op.drop_column("auth_user", "refresh_token_hash")
@@ -0,0 +1,48 @@
+"""add expires_at to revoked_token and refresh_token_expires_at to auth_user
+
+Revision ID: 8d51e0a7c3b2
+Revises: 3f9c2b7d41ae
+Create Date: 2026-10-18 12:15:47.902113
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8d51e0a7c3b2"
+down_revision: Union[str, None] = "3f9c2b7d41ae"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# AuthJWT.refresh_token_expires_days: верхняя граница жизни старых токенов
+REFRESH_TOKEN_EXPIRES_DAYS = 30
+
+
+def upgrade() -> None:
+    op.add_column(
+        "auth_user",
+        sa.Column("refresh_token_expires_at", sa.TIMESTAMP(), nullable=True),
+    )
+
+    op.add_column(
+        "revoked_token",
+        sa.Column("expires_at", sa.TIMESTAMP(), nullable=True),
+    )
+    op.execute(
+        "UPDATE revoked_token "
+        f"SET expires_at = revoked_at + interval '{REFRESH_TOKEN_EXPIRES_DAYS} days'"
+    )
+    op.alter_column("revoked_token", "expires_at", nullable=False)
+    op.create_index(
+        op.f("ix_revoked_token_expires_at"), "revoked_token", ["expires_at"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_revoked_token_expires_at"), table_name="revoked_token")
+    op.drop_column("revoked_token", "expires_at")
+    op.drop_column("auth_user", "refresh_token_expires_at")
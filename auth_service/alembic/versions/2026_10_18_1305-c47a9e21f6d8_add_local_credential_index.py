@@ -0,0 +1,50 @@
+"""add username, email, is_active to auth_user
+
+Revision ID: c47a9e21f6d8
+Revises: 8d51e0a7c3b2
+Create Date: 2026-10-18 13:05:31.554920
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c47a9e21f6d8"
+down_revision: Union[str, None] = "8d51e0a7c3b2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Значения заполняются при регистрации, синхронизации из user_service
+    # или лениво при первом входе (users_crud.get_login_auth_user)
+    op.add_column(
+        "auth_user",
+        sa.Column("username", sa.String(length=32), nullable=True),
+    )
+    op.add_column(
+        "auth_user",
+        sa.Column("email", sa.String(length=255), nullable=True),
+    )
+    op.add_column(
+        "auth_user",
+        sa.Column("is_active", sa.Boolean(), server_default=sa.true(), nullable=False),
+    )
+    op.create_index(
+        op.f("ix_auth_user_username"), "auth_user", ["username"], unique=True
+    )
+    op.create_index(
+        op.f("ix_auth_user_email"), "auth_user", ["email"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_auth_user_email"), table_name="auth_user")
+    op.drop_index(op.f("ix_auth_user_username"), table_name="auth_user")
+    op.drop_column("auth_user", "is_active")
+    op.drop_column("auth_user", "email")
+    op.drop_column("auth_user", "username")
@@ -0,0 +1,38 @@
+"""add processed_event
+
+Revision ID: 9044d9f2b80d
+Revises: c47a9e21f6d8
+Create Date: 2026-10-18 14:25:44.106392
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9044d9f2b80d"
+down_revision: Union[str, None] = "c47a9e21f6d8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Обработанные события outbox user_service (идемпотентность по event_id)
+    op.create_table(
+        "processed_event",
+        sa.Column("event_id", sa.String(length=36), nullable=False),
+        sa.Column("event_type", sa.String(length=32), nullable=False),
+        sa.Column("processed_at", sa.TIMESTAMP(), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("event_id", name=op.f("pk_processed_event")),
+    )
+    op.create_index(
+        op.f("ix_processed_event_processed_at"), "processed_event", ["processed_at"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_processed_event_processed_at"), table_name="processed_event")
+    op.drop_table("processed_event")
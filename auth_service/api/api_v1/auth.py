@@ -1,33 +1,51 @@
-from typing import Annotated
+from typing import Annotated, Literal
 import redis.asyncio as redis
 import httpx
 from fastapi import (
     APIRouter, Depends, HTTPException,
-    status, Header,
+    status, Header, Request, Query,
 )
+from fastapi.responses import StreamingResponse
 from fastapi.security import (
     HTTPBasic, HTTPBasicCredentials,
     HTTPBearer, HTTPAuthorizationCredentials,
 )
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from auth_service.core.models import db_helper
-from auth_service.core.redis_client import redis_client
+from auth_service.core.models import db_helper, SessionScope
+from auth_service.core.throttling import login_throttler
+from auth_service.core.http_client import user_service_client
 from auth_service.core.models.auth_user import AuthUser as AuthUserModel
 from auth_service.core.config import settings
-from auth_service.core.security import verify_password, hash_password
-from auth_service.core.schemas import RegisterUserSchema, TokenResponseSchema
+from auth_service.core.serialization import FastJSONResponse, RowSerializer
+from auth_service.core.security import (
+    verify_password_async, hash_password_async,
+    token_digest, token_expires_at,
+)
+from auth_service.core.schemas import (
+    RegisterUserSchema, TokenResponseSchema, UserSyncSchema, AuthUsersPage,
+    BulkRegisterSchema, BulkRegisterResponse,
+    InboxEventsSchema, InboxEventsResponse,
+)
+from auth_service.utils import (
+    decode_cursor, paginate, EXPORT_MEDIA_TYPES, stream_export,
+)
 from auth_service.core.schemas import AuthUser as AuthUserSchema
 from auth_service.crud.tokens_crud import (
     get_username_by_static_auth_token, update_refresh_token,
 )
+from auth_service.crud.inbox_crud import apply_user_event
 from auth_service.crud.users_crud import (
-    get_all_users, delete_auth_user, get_auth_user,
-    create_user_service_user,
+    get_all_users, fill_unsynced_users, delete_auth_user, get_auth_user,
+    create_user_service_user, get_login_auth_user,
+    sync_auth_user, stream_auth_users_for_export,
+    AUTH_USER_EXPORT_COLUMNS,
 )
 from auth_service.api.api_v1.utils.helpers import (
     create_access_token, create_refresh_token
 )
+from auth_service.api.api_v1.utils.bulk_register import bulk_register_users
+from auth_service.api.api_v1.validation import verify_internal_token
 from auth_service.core.logger import logger
 
 router = APIRouter(prefix="/auth", tags=["AUTH"])
@@ -35,9 +53,8 @@ router = APIRouter(prefix="/auth", tags=["AUTH"])
 security = HTTPBasic()
 bearer_scheme = HTTPBearer(auto_error=False)
 
-# failed attempts
-MAX_ATTEMPTS = 5
-BLOCK_TIME_SECONDS = 300  # 5 минут
+# Строки из БД уже валидны: отдаем их без повторной валидации response_model
+auth_user_serializer = RowSerializer(AuthUserSchema)
 
 
 @router.get("/basic-auth/")
@@ -57,17 +74,25 @@ def demo_basic_auth_credentials(
 @router.post("/register")
 async def register_user(
         user_data: RegisterUserSchema,
-        session: Annotated[
-                    AsyncSession,
-                    Depends(db_helper.session_getter),
+        session_scope: Annotated[
+                    SessionScope,
+                    Depends(db_helper.session_scope_getter),
+                ],
+        client: Annotated[
+                    httpx.AsyncClient,
+                    Depends(user_service_client.client_getter),
                 ],
 ) -> TokenResponseSchema:
-    # 1 Запрос на создание
+    # Соединение с БД берется только на шаге 4: HTTP и bcrypt идут без него
     username = user_data.username
     email = user_data.email
 
+    # 1 Хешируем пароль до создания профиля: отказ пула (503) не оставит профиль без auth_user
+    hashed_pw = await hash_password_async(user_data.password)
+
+    # 2 Запрос на создание
     try:
-        response = await create_user_service_user(username, email)
+        response = await create_user_service_user(username, email, client=client)
     except Exception as e:
         raise e
 
@@ -80,27 +105,27 @@ async def register_user(
             detail="User profile creation error: no user_id returned"
         )
 
-    # 2 Хешируем пароль и создаем запись в auth_service
-    hashed_pw = hash_password(user_data.password)
+    # 3 Генерируем токены
+    refresh_token = create_refresh_token(user_id, email)
+    access_token = create_access_token(user_id, email)
+
+    # 4 Создаем запись в auth_service сразу с дайджестом refresh-токена - один коммит
     new_auth_user = AuthUserModel(
         user_id=user_id,
+        username=user_profile.get("username", username),
+        email=user_profile.get("email", email),
+        is_active=user_profile.get("is_active", True),
         password=hashed_pw,
-        refresh_token=None,
+        refresh_token_hash=token_digest(refresh_token),
+        refresh_token_expires_at=token_expires_at(refresh_token),
     )
-    session.add(new_auth_user)
-    try:
-        await session.commit()
-        await session.refresh(new_auth_user)
-    except Exception as e:
-        await session.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
-
-    # 3 Генерируем новые токены
-    refresh_token = create_refresh_token(user_id, email)
-    access_token = create_access_token(user_id, email)
-
-    # 4 Инвалидируем старый токен и прикрепляем новый
-    await update_refresh_token(session, new_auth_user, refresh_token)
+    async with session_scope() as session:
+        session.add(new_auth_user)
+        try:
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            raise HTTPException(status_code=500, detail=str(e))
 
     logger.info(f"User created successfully")
     return TokenResponseSchema(
@@ -112,24 +137,109 @@ async def register_user(
     )
 
 
-@router.get("/get_users", response_model=list[AuthUserSchema])
+@router.post(
+    "/register/bulk",
+    response_model=BulkRegisterResponse,
+    dependencies=[Depends(verify_internal_token)],
+)
+async def register_users_bulk(
+        data: BulkRegisterSchema,
+        session_scope: Annotated[
+                    SessionScope,
+                    Depends(db_helper.session_scope_getter),
+                ],
+        client: Annotated[
+                    httpx.AsyncClient,
+                    Depends(user_service_client.client_getter),
+                ],
+):
+    """
+    Миграция пользователей: пароль или готовый bcrypt-хеш, токены - по issue_tokens.
+    Только для внутренних клиентов (X-Internal-Token)
+    """
+    if len(data.users) > settings.bulk_register.max_items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many users, max {settings.bulk_register.max_items}"
+        )
+    return await bulk_register_users(session_scope=session_scope, data=data, client=client)
+
+
+@router.get(
+    "/get_users",
+    response_model=AuthUsersPage,
+    response_class=FastJSONResponse,
+)
 async def get_users(
         session: Annotated[
             AsyncSession,
-            Depends(db_helper.session_getter),
+            Depends(db_helper.read_session_getter),
         ],
+        client: Annotated[
+                    httpx.AsyncClient,
+                    Depends(user_service_client.client_getter),
+                ],
+        limit: Annotated[
+            int,
+            Query(ge=1, le=settings.pagination.max_limit)
+        ] = settings.pagination.default_limit,
+        cursor: str | None = None,
+        is_active: bool | None = None,
+):
+    rows = await get_all_users(
+        session=session,
+        limit=limit,
+        after_id=decode_cursor(cursor),
+        is_active=is_active,
+    )
+    users, next_cursor = paginate(rows, limit, key=lambda user: user.user_id)
+    await fill_unsynced_users(session, users, client=client)
+    return auth_user_serializer.page_response(users, next_cursor)
+
+
+@router.get("/export")
+async def export_auth_users(
+        export_format: Annotated[
+            Literal["ndjson", "csv"],
+            Query(alias="format")
+        ] = "ndjson",
+        is_active: bool | None = None,
 ):
-    users = await get_all_users(session=session)
-    return users
+    """
+    Полная выгрузка auth-пользователей потоком (NDJSON/CSV), без паролей
+    """
+    columns = [column.key for column in AUTH_USER_EXPORT_COLUMNS]
+
+    async def body():
+        # Своя сессия (реплика): зависимость закрылась бы до начала отдачи тела
+        async with db_helper.read_session() as session:
+            partitions = stream_auth_users_for_export(
+                session=session,
+                batch_size=settings.export.batch_size,
+                is_active=is_active,
+            )
+            async for chunk in stream_export(columns, partitions, export_format):
+                yield chunk
+
+    return StreamingResponse(
+        body(),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="auth_users.{export_format}"'},
+    )
 
 
 # Вспомогательная функция для basic_auth_username
 async def get_auth_user_username(
-        session: Annotated[
-                    AsyncSession,
-                    Depends(db_helper.session_getter),
+        request: Request,
+        session_scope: Annotated[
+                    SessionScope,
+                    Depends(db_helper.session_scope_getter),
                 ],
         credentials: Annotated[HTTPBasicCredentials, Depends(security)],
+        client: Annotated[
+                    httpx.AsyncClient,
+                    Depends(user_service_client.client_getter),
+                ],
 ) -> TokenResponseSchema:
     username = credentials.username
 
@@ -139,63 +249,53 @@ async def get_auth_user_username(
         headers={"WWW-Authenticate": "Basic"},
     )
 
-    # Проверка попыток входа через redis
-    key = f"failed_attempts:{username}"
-    attempts = await redis_client.get(key)
-    attempts = int(attempts) if attempts else 0
+    # Проверка и учет попытки входа (один EVALSHA в redis)
+    client_ip = login_throttler.client_ip(
+        peer=request.client.host if request.client else None,
+        forwarded_for=request.headers.get("X-Forwarded-For"),
+    )
+    attempt = await login_throttler.acquire(username=username, ip=client_ip)
 
-    if attempts >= MAX_ATTEMPTS:
+    if attempt.blocked:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Too many failed attempts, try again later"
         )
 
-    # Запрос пользователя из user_service
-    async with httpx.AsyncClient() as client:
-        response = await client.get(f"{settings.user_service_url}/api/v1/users/username/{username}/")
-
-    if response.status_code != 200:
+    # Запрос пользователя по локальному индексу auth_service
+    try:
+        auth_user = await get_login_auth_user(username, session_scope, client=client)
+    except HTTPException:
         logger.error(f"Ошибка при авторизации: пользователь не найден в user_service")
-        await redis_client.incr(key)
-        await redis_client.expire(key, BLOCK_TIME_SECONDS)
         raise unauthed_exc
 
-    user_data = response.json()
-    user_id = user_data.get("user_id")
-    username = user_data.get("username")
-    user_email = user_data.get("email")
-    is_active = user_data.get("is_active")
-
-    if not user_id or not is_active:
-        logger.error(f"Ошибка при авторизации: user_id = \"{user_id}\", is_active = \"{is_active}\"")
-        await redis_client.incr(key)
-        await redis_client.expire(key, BLOCK_TIME_SECONDS)
+    if not auth_user:
+        logger.error(f"Ошибка при авторизации: пользователь не найден в auth_service")
         raise unauthed_exc
 
-    # Запрос пользователя из auth_service
-    auth_user: AuthUserModel = await get_auth_user(user_id, session)
+    user_id = auth_user.user_id
+    username = auth_user.username
+    user_email = auth_user.email
+    is_active = auth_user.is_active
 
-    if not auth_user:
-        logger.error(f"Ошибка при авторизации: пользователь не найден в auth_service")
-        await redis_client.incr(key)
-        await redis_client.expire(key, BLOCK_TIME_SECONDS)
+    if not is_active:
+        logger.error(f"Ошибка при авторизации: user_id = \"{user_id}\", is_active = \"{is_active}\"")
         raise unauthed_exc
 
     # secrets
-    if not verify_password(credentials.password, auth_user.password):
+    if not await verify_password_async(credentials.password, auth_user.password):
         logger.error(f"Ошибка при авторизации: пароли не совпадают")
-        await redis_client.incr(key)
-        await redis_client.expire(key, BLOCK_TIME_SECONDS)
         raise unauthed_exc
 
-    await redis_client.delete(key)
+    await login_throttler.reset(attempt)
 
     # Генерируем новые токены
     refresh_token = create_refresh_token(user_id, user_email)
     access_token = create_access_token(user_id, user_email)
 
-    # Инвалидируем старый токен и прикрепляем новый
-    await update_refresh_token(session, auth_user, refresh_token)
+    # Инвалидируем старый токен и прикрепляем новый (соединение - только на запись)
+    async with session_scope() as session:
+        await update_refresh_token(session, auth_user, refresh_token)
 
     return TokenResponseSchema(
         user_id=user_id,
@@ -237,7 +337,7 @@ async def check_token_auth(
     }
 
 
-@router.delete("/{user_id}")
+@router.delete("/{user_id}", dependencies=[Depends(verify_internal_token)])
 async def delete_auth_user_account(
         user_id: int,
         session: Annotated[
@@ -260,3 +360,65 @@ async def delete_auth_user_account(
     await delete_auth_user(user_id, session)
 
     return {"message": "Auth user deleted"}
+
+
+@router.post("/sync/users/", dependencies=[Depends(verify_internal_token)])
+async def sync_auth_user_profile(
+        data: UserSyncSchema,
+        session: Annotated[
+                    AsyncSession,
+                    Depends(db_helper.session_getter),
+                ],
+):
+    """
+    Используется через user_service, \n
+    Обновляет локальную копию username/email/is_active
+    """
+    updated = await sync_auth_user(
+        session=session,
+        user_id=data.user_id,
+        username=data.username,
+        email=data.email,
+        is_active=data.is_active,
+    )
+    return {"updated": updated}
+
+
+@router.post(
+    "/inbox/events",
+    response_model=InboxEventsResponse,
+    dependencies=[Depends(verify_internal_token)],
+)
+async def receive_user_service_events(
+        data: InboxEventsSchema,
+        session_scope: Annotated[
+                    SessionScope,
+                    Depends(db_helper.session_scope_getter),
+                ],
+):
+    """
+    Используется через user_service (outbox), 
+
+    Каждое событие - своя транзакция, повтор того же event_id - duplicate.
+    failed - user_service повторит доставку позже
+    """
+    results = []
+    async with session_scope() as session:
+        for event in data.events:
+            try:
+                event_status = await apply_user_event(
+                    session=session,
+                    event_id=event.event_id,
+                    event_type=event.event_type,
+                    payload=event.payload,
+                )
+            except Exception as e:
+                logger.error(f"Failed to apply event {event.event_id} ({event.event_type}): {e}")
+                results.append({
+                    "event_id": event.event_id,
+                    "status": "failed",
+                    "error": str(e) or type(e).__name__,
+                })
+                continue
+            results.append({"event_id": event.event_id, "status": event_status})
+    return {"results": results}
@@ -1,14 +1,15 @@
 import uuid
 import json
 from time import time
-from typing import Any
+from typing import Annotated, Any
+import redis.asyncio as redis
 from fastapi import (
     APIRouter, Depends, HTTPException,
     status, Response, Cookie,
     Request,
 )
 
-from auth_service.core.redis_client import redis_client
+from auth_service.core.redis_client import redis_helper
 from auth_service.core.config import settings
 from auth_service.crud.tokens_crud import get_username_by_static_auth_token
 from auth_service.core.logger import logger
@@ -21,7 +22,8 @@ def generate_session_id() -> str:
 
 
 async def get_session_data(
-        session_id: str = Cookie(alias=settings.cookie_session_id_key)
+        redis_client: Annotated[redis.Redis, Depends(redis_helper.client_getter)],
+        session_id: str = Cookie(alias=settings.cookie_session_id_key),
 ) -> dict[str, Any]:
     data = await redis_client.get(f"{settings.session_prefix}{session_id}")
     if not data:
@@ -37,7 +39,8 @@ async def get_session_data(
 @router.post("/login-cookie/")
 async def login_cookie(
         response: Response,
-        username: str = Depends(get_username_by_static_auth_token)
+        redis_client: Annotated[redis.Redis, Depends(redis_helper.client_getter)],
+        username: str = Depends(get_username_by_static_auth_token),
 ) -> dict[str, Any]:
     session_id = generate_session_id()
     session_data = {
@@ -88,6 +91,7 @@ def check_cookie(
 @router.get("/logout-cookie/")
 async def cookie_logout(
         response: Response,
+        redis_client: Annotated[redis.Redis, Depends(redis_helper.client_getter)],
         session_id: str = Cookie(alias=settings.cookie_session_id_key),
 ):
     await redis_client.delete(f"session:{session_id}")
@@ -1,15 +1,29 @@
 from fastapi import (
-    APIRouter, Request, Depends,
+    APIRouter, Request, Depends, Query,
 )
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Annotated
 
 from auth_service.core.models import db_helper
-from auth_service.core.schemas import RevokeTokenResponseSchema
-from auth_service.crud.tokens_crud import print_all_revoked_tokens
+from auth_service.core.config import settings
+from auth_service.core.schemas import RevokedTokensPage, RevokeTokenResponseSchema
+from auth_service.core.serialization import FastJSONResponse, RowSerializer
+from auth_service.utils import decode_cursor, paginate
+from auth_service.crud.tokens_crud import (
+    print_all_revoked_tokens,
+    revoked_token_filter,
+    revoked_token_sweeper,
+)
+from auth_service.crud.users_crud import user_profile_cache, user_profile_flights
+from auth_service.core.crypto_executor import crypto_executor
+from auth_service.core.security import token_payload_cache
+from auth_service.core.redis_client import redis_helper
+from auth_service.core.resilience import user_service_resilience
 
 router = APIRouter(prefix="/test", tags=["TEST"])
 
+revoked_token_serializer = RowSerializer(RevokeTokenResponseSchema)
+
 
 @router.get("/set_session")
 async def set_session(request: Request):
@@ -29,12 +43,46 @@ async def get_session(request: Request):
     return {"session_value": value}
 
 
-@router.get("/get_revoked_tokens/", response_model=list[RevokeTokenResponseSchema])
+@router.get(
+    "/get_revoked_tokens/",
+    response_model=RevokedTokensPage,
+    response_class=FastJSONResponse,
+)
 async def get_revoked_tokens(
         session: Annotated[
             AsyncSession,
-            Depends(db_helper.session_getter),
+            Depends(db_helper.read_session_getter),
         ],
+        limit: Annotated[
+            int,
+            Query(ge=1, le=settings.pagination.max_limit)
+        ] = settings.pagination.default_limit,
+        cursor: str | None = None,
 ):
-    tokens = await print_all_revoked_tokens(session=session)
-    return tokens
+    rows = await print_all_revoked_tokens(
+        session=session,
+        limit=limit,
+        after_id=decode_cursor(cursor),
+    )
+    tokens, next_cursor = paginate(rows, limit, key=lambda token: token.id)
+    return revoked_token_serializer.page_response(tokens, next_cursor)
+
+
+@router.get("/stats/")
+async def get_stats():
+    """
+    Метрики in-process подсистем
+    """
+    return {
+        "user_profile_cache": user_profile_cache.stats(),
+        "user_profile_single_flight": user_profile_flights.stats(),
+        "crypto_executor": crypto_executor.stats(),
+        "user_service_resilience": user_service_resilience.stats(),
+        "token_payload_cache": token_payload_cache.stats(),
+        "revoked_token_filter": revoked_token_filter.stats(),
+        "revoked_token_purge": revoked_token_sweeper.stats(),
+        "redis_pool": redis_helper.stats(),
+        "db_pool": db_helper.pool_stats(),
+        "db_replicas": db_helper.replica_stats(),
+        "db_statement_cache": db_helper.statement_cache_stats(),
+    }
@@ -2,7 +2,6 @@ from fastapi import (
     APIRouter, Depends,
     HTTPException, status,
 )
-from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import (
     OAuth2PasswordBearer, OAuth2PasswordRequestForm
@@ -24,11 +23,10 @@ from auth_service.core.schemas import (
 )
 from auth_service.core import security
 from auth_service.core.logger import logger
-from auth_service.core.models import db_helper
+from auth_service.core.models import db_helper, SessionScope
 from auth_service.core.models import AuthUser as AuthUserModel
 from auth_service.crud.users_crud import (
-    get_user_service_user_by_username,
-    get_user_service_user_by_id,
+    get_login_auth_user,
     get_auth_user,
 )
 from auth_service.crud.tokens_crud import update_refresh_token
@@ -50,69 +48,57 @@ router = APIRouter(
 
 
 async def validate_auth_user(
-        session: Annotated[
-            AsyncSession,
-            Depends(db_helper.session_getter)
-        ],
+        session_scope: SessionScope,
         username: str,
         password: str,
-):
+) -> AuthUserModel:
     logger.info(f"Received data: {username}, {password}")
     unauthed_exc = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid username or password"
     )
 
-    # Запрос на поиск
+    # Поиск по локальному индексу auth_service (соединение отдается сразу после запроса)
     try:
-        response = await get_user_service_user_by_username(username=username)
+        auth_user = await get_login_auth_user(username, session_scope)
     except Exception as e:
         raise e
 
-    user_profile = response.json()
-    user_id = user_profile.get("user_id")
-    active_status = user_profile.get("is_active")
+    if not auth_user:
+        raise unauthed_exc
 
     # Активный ли пользователь
-    if not active_status:
+    if not auth_user.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Inactive user"
         )
 
-    # Проверка на наличие в auth_service
-    stmt = select(AuthUserModel).where(AuthUserModel.user_id == user_id)
-    result = await session.execute(stmt)
-    auth_user = result.scalar_one_or_none()
-    if not auth_user:
-        return unauthed_exc
-
-    if not security.validate_password(
+    # bcrypt - без открытой сессии
+    if not await security.validate_password_async(
         password=password,
         hashed_password=auth_user.password,
     ):
         raise unauthed_exc
 
-    combined_data = CombinedUserSchema(
-        user_id=int(user_id),
-        email=user_profile.get("email"),
-    )
-
-    return combined_data
+    return auth_user
 
 
 # login via jwt
 @router.post("/login/", response_model=TokenInfo)
 async def auth_user_issue_jwt(
         form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
-        session: AsyncSession = Depends(db_helper.session_getter),
+        session_scope: Annotated[
+            SessionScope,
+            Depends(db_helper.session_scope_getter)
+        ],
 ):
     """
     Допустим что при регистрации не выдаются токены
     """
     try:
-        user = await validate_auth_user(
-            session=session,
+        auth_user = await validate_auth_user(
+            session_scope=session_scope,
             username=form_data.username,
             password=form_data.password
         )
@@ -121,14 +107,13 @@ async def auth_user_issue_jwt(
         raise
 
     # Генерируем новые токены
-    user_id = user.user_id
-    auth_user = await get_user_service_user_by_id(user_id)
-
-    access_token = create_access_token(user_id, user.email)
-    refresh_token = create_refresh_token(user_id, user.email)
+    user_id = auth_user.user_id
+    access_token = create_access_token(user_id, auth_user.email)
+    refresh_token = create_refresh_token(user_id, auth_user.email)
 
-    # Инвалидируем старый токен
-    await update_refresh_token(session, auth_user, refresh_token)
+    # Инвалидируем старый токен: соединение берется только на запись
+    async with session_scope() as session:
+        await update_refresh_token(session, auth_user, refresh_token)
 
     logger.info("Successfully created tokens for user %s", user_id)
     return TokenInfo(
@@ -0,0 +1,190 @@
+import asyncio
+import time
+from typing import Any, Sequence
+
+import httpx
+from fastapi import HTTPException, status
+
+from auth_service.core.config import settings
+from auth_service.core.logger import logger
+from auth_service.core.crypto_executor import crypto_executor
+from auth_service.core.models import SessionScope
+from auth_service.core.schemas import BulkRegisterSchema
+from auth_service.core.security import (
+    hash_passwords_async, is_bcrypt_hash,
+    token_digest, token_expires_at,
+)
+from auth_service.crud.users_crud import (
+    import_user_service_users, insert_auth_users, delete_user_service_user,
+)
+from .helpers import create_token_pair
+
+
+async def delete_orphaned_profiles(
+        user_ids: Sequence[int],
+        client: httpx.AsyncClient,
+) -> set[int]:
+    """
+    Компенсация: профили, для которых не создан auth_user, удаляются из user_service.
+    Возвращает user_id, которые удалить не удалось
+    """
+    semaphore = asyncio.Semaphore(settings.bulk_register.compensation_concurrency)
+    left: set[int] = set()
+
+    async def delete(user_id: int) -> None:
+        async with semaphore:
+            try:
+                await delete_user_service_user(user_id, client=client)
+            except HTTPException as e:
+                # 404 - профиля уже нет (например, повтор после успешного удаления)
+                if e.status_code != status.HTTP_404_NOT_FOUND:
+                    left.add(user_id)
+                    logger.error(f"Orphaned profile {user_id} left in user_service: {e.detail}")
+
+    await asyncio.gather(*(delete(user_id) for user_id in user_ids))
+    return left
+
+
+async def bulk_register_users(
+        session_scope: SessionScope,
+        data: BulkRegisterSchema,
+        client: httpx.AsyncClient,
+) -> dict[str, Any]:
+    """
+    Массовая регистрация:
+    1 пароли - параллельно в пуле crypto_executor (готовые bcrypt-хеши как есть),
+      до создания профилей: отказ пула (503) не оставит профилей без auth_user
+    2 профили - одним запросом к user_service (/users/import)
+    3 токены - по желанию, тоже в пуле; при отказе пула пользователи создаются без токенов
+    4 auth_user - одним INSERT
+    5 профили, для которых auth_user не создан, удаляются из user_service
+    Соединение с БД берется только на шаге 4
+    """
+    started = time.perf_counter()
+    users = data.users
+    results: list[dict[str, Any] | None] = [None] * len(users)
+
+    # Битые хеши отсекаем до создания профилей
+    valid: list[int] = []
+    for index, user in enumerate(users):
+        if user.password_hash is not None and not is_bcrypt_hash(user.password_hash):
+            results[index] = {
+                "username": user.username,
+                "status": "invalid",
+                "errors": ["password_hash is not a bcrypt hash"],
+            }
+        else:
+            valid.append(index)
+
+    # 1 Хеши паролей
+    to_hash = [index for index in valid if users[index].password is not None]
+    hashes = await hash_passwords_async(
+        [users[index].password for index in to_hash],
+        concurrency=settings.bulk_register.hash_concurrency,
+    )
+    passwords = dict(zip(to_hash, hashes))
+    for index in valid:
+        if index not in passwords:
+            passwords[index] = users[index].password_hash.encode()
+
+    # 2 Профили в user_service
+    created: list[tuple[int, int]] = []  # (index, user_id)
+    if valid:
+        response = await import_user_service_users(
+            [{"username": users[index].username, "email": users[index].email} for index in valid],
+            client=client,
+        )
+        by_line = {row["line"]: row for row in response.json()["results"]}
+        for line, index in enumerate(valid, start=1):
+            row = by_line.get(line)
+            if row is None:
+                results[index] = {
+                    "username": users[index].username,
+                    "status": "error",
+                    "errors": ["No result from user_service"],
+                }
+            elif row["status"] != "created":
+                results[index] = {
+                    "username": users[index].username,
+                    "status": row["status"],
+                    "errors": row.get("errors", []),
+                }
+            else:
+                created.append((index, row["user_id"]))
+
+    # 3 Токены (опционально)
+    tokens: dict[int, tuple[str, str]] = {}
+    token_error: str | None = None
+    if data.issue_tokens and created:
+        try:
+            pairs = await crypto_executor.map(
+                create_token_pair,
+                [(user_id, users[index].email) for index, user_id in created],
+                concurrency=settings.bulk_register.hash_concurrency,
+            )
+        except HTTPException as e:
+            # Профили уже созданы: регистрируем без токенов, их выдаст обычный вход
+            token_error = f"Tokens not issued: {e.detail}"
+        else:
+            tokens = {index: pair for (index, _), pair in zip(created, pairs)}
+
+    # 4 auth_user одним запросом
+    rows = []
+    for index, user_id in created:
+        refresh_token = tokens[index][1] if index in tokens else None
+        rows.append({
+            "user_id": user_id,
+            "username": users[index].username,
+            "email": users[index].email,
+            "is_active": True,
+            "password": passwords[index],
+            "refresh_token_hash": token_digest(refresh_token) if refresh_token else None,
+            "refresh_token_expires_at": token_expires_at(refresh_token) if refresh_token else None,
+        })
+    insert_error: str | None = None
+    try:
+        async with session_scope() as session:
+            inserted = await insert_auth_users(session, rows)
+    except HTTPException as e:
+        # Профили уже созданы - не обрываем запрос, а удаляем их на шаге 5
+        inserted = set()
+        insert_error = e.detail
+
+    orphaned: list[tuple[int, int]] = []
+    for index, user_id in created:
+        if user_id not in inserted:
+            orphaned.append((index, user_id))
+            continue
+        result = {"username": users[index].username, "status": "created", "user_id": user_id}
+        if index in tokens:
+            result["access_token"], result["refresh_token"] = tokens[index]
+        elif token_error is not None:
+            result["errors"] = [token_error]
+        results[index] = result
+
+    # 5 Компенсация
+    left = await delete_orphaned_profiles([user_id for _, user_id in orphaned], client)
+    for index, user_id in orphaned:
+        profile_left = user_id in left
+        results[index] = {
+            "username": users[index].username,
+            "status": "error" if insert_error else "conflict",
+            "user_id": user_id,
+            "errors": [
+                insert_error or "Auth user already exists",
+                "Profile left in user_service" if profile_left else "Profile deleted from user_service",
+            ],
+            "profile_left": profile_left,
+        }
+
+    created_count = sum(1 for result in results if result["status"] == "created")
+    return {
+        "results": results,
+        "stats": {
+            "total": len(users),
+            "created": created_count,
+            "failed": len(users) - created_count,
+            "profiles_left": len(left),
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
+        },
+    }
@@ -1,12 +1,9 @@
+import uuid
 from datetime import timedelta
 
 from auth_service.core import security as auth_utils
 from auth_service.core.config import settings
-
-
-TOKEN_TYPE_FIELD = "type"
-ACCESS_TOKEN_TYPE = "access"
-REFRESH_TOKEN_TYPE = "refresh"
+from auth_service.core.security import TOKEN_TYPE_FIELD, ACCESS_TOKEN_TYPE, REFRESH_TOKEN_TYPE
 
 
 def create_jwt(
@@ -15,7 +12,11 @@ def create_jwt(
         expires_in: int = settings.auth_jwt.access_token_expires_in,
         expire_timedelta: timedelta | None = None,
 ) -> str:
-    jwt_payload = {TOKEN_TYPE_FIELD: token_type}
+    jwt_payload = {
+        TOKEN_TYPE_FIELD: token_type,
+        # уникальный id: два токена одного пользователя не совпадут
+        "jti": uuid.uuid4().hex,
+    }
     jwt_payload.update(token_data)
     return auth_utils.encode_jwt(
         payload=jwt_payload,
@@ -50,3 +51,9 @@ def create_refresh_token(user_id, email) -> str:
         token_data=jwt_payload,
         expire_timedelta=timedelta(days=settings.auth_jwt.refresh_token_expires_days),
     )
+
+
+def create_token_pair(user: tuple[int, str]) -> tuple[str, str]:
+    # (user_id, email) -> (access, refresh); верхний уровень модуля - для пула процессов
+    user_id, email = user
+    return create_access_token(user_id, email), create_refresh_token(user_id, email)
@@ -1,31 +1,50 @@
+import secrets
 from typing import Annotated
-from fastapi import Depends, HTTPException
+from fastapi import Depends, Header, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jwt import exceptions
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
-from sqlalchemy.future import select
 
-from auth_service.crud.users_crud import get_user_service_user_by_id
+from auth_service.crud.users_crud import get_user_profile_by_id
+from auth_service.crud.tokens_crud import validate_refresh_token, is_access_token
+from auth_service.crud.queries import AUTH_USER_BY_ID
 from auth_service.core.models import db_helper
 from .utils.helpers import TOKEN_TYPE_FIELD, ACCESS_TOKEN_TYPE, REFRESH_TOKEN_TYPE
 from auth_service.core import security
-from auth_service.core.models import AuthUser as AuthUserModel
 from auth_service.core.schemas import CombinedUserSchema
+from auth_service.core.config import settings
 
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl="api/v1/auth/jwt/login/",
 )
 
 
+def verify_internal_token(
+        x_internal_token: Annotated[str | None, Header()] = None,
+) -> None:
+    """
+    Межсервисные эндпоинты (вызывает только user_service): общий секрет
+    settings.internal_api_token в заголовке X-Internal-Token
+    """
+    if x_internal_token is None or not secrets.compare_digest(
+        x_internal_token.encode(), settings.internal_api_token.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid internal token"
+        )
+
+
 def get_current_token_payload(
     # credentials: HTTPAuthorizationCredentials = Depends(http_bearer),
     token: str = Depends(oauth2_scheme)
 ) -> dict:
     # token = credentials.credentials
     try:
-        payload = security.decode_jwt(
-            token=token
+        payload = security.decode_jwt_cached(
+            token=token,
+            cache_if=is_access_token,
         )
     except exceptions.InvalidTokenError:
         raise HTTPException(
@@ -64,8 +83,7 @@ async def get_user_by_token_sub(
             ]
 ) -> CombinedUserSchema:
     user_id: int | None = int(payload.get("sub"))
-    stmt = select(AuthUserModel).where(AuthUserModel.user_id == user_id)
-    result = await session.execute(stmt)
+    result = await session.execute(AUTH_USER_BY_ID, {"user_id": user_id})
     user = result.scalar_one_or_none()
 
     if not user:
@@ -74,14 +92,15 @@ async def get_user_by_token_sub(
             detail="Token invalid or expired"
         )
 
-    # Запрос к user_service
-    try:
-        response = await get_user_service_user_by_id(user_id=user_id)
-    except HTTPException as exc:
-        raise exc
+    email = user.email
+    if not email:
+        # Запись еще не синхронизирована - запрос к user_service
+        try:
+            user_profile = await get_user_profile_by_id(user_id=user_id)
+        except HTTPException as exc:
+            raise exc
 
-    user_profile = response.json()
-    email = user_profile.get("email")
+        email = user_profile.get("email")
 
     return CombinedUserSchema(
         user_id=user.user_id,
@@ -96,8 +115,11 @@ def get_auth_user_from_token_of_type(token_type: str):
                 Depends(db_helper.session_getter)
             ],
             payload: dict = Depends(get_current_token_payload),
+            token: str = Depends(oauth2_scheme),
     ):
         validate_token_type(payload=payload, token_type=token_type)
+        if token_type == REFRESH_TOKEN_TYPE:
+            await validate_refresh_token(token, session)
         return await get_user_by_token_sub(payload, session)
     return get_auth_user_from_token
 
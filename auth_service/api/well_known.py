@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Request, Response
+from fastapi.responses import JSONResponse
+
+from auth_service.core.config import settings
+from auth_service.core.keys import key_ring
+
+router = APIRouter(prefix="/.well-known", tags=["WELL-KNOWN"])
+
+
+@router.get("/jwks.json")
+async def get_jwks(request: Request):
+    """
+    Публичные ключи для локальной проверки токенов на шлюзах
+    """
+    headers = {
+        "Cache-Control": f"public, max-age={settings.auth_jwt.jwks_max_age_seconds}",
+        "ETag": key_ring.jwks_etag,
+    }
+    if request.headers.get("if-none-match") == key_ring.jwks_etag:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=key_ring.jwks, headers=headers)
@@ -0,0 +1,82 @@
+"""
+Микробенчмарк Python-накладных расходов на горячий запрос auth_user по user_id.
+
+dynamic  - новый select() на каждый вызов (как было в crud)
+lambda   - lambda_stmt: конструкция кэшируется по коду лямбды
+prebuilt - crud.queries.AUTH_USER_BY_ID + bindparam
+
+build    - только построение statement и ключа кэша компиляции
+execute  - полный session.execute() на in-memory SQLite (сеть и БД почти бесплатны,
+           поэтому разница - это Python-часть: построение, кэш, ORM)
+
+Запуск (из корня репозитория, нужны переменные из .env-template):
+    python -m auth_service.benchmarks.bench_queries
+"""
+import timeit
+
+from sqlalchemy import create_engine, event, lambda_stmt, select
+from sqlalchemy.engine.default import CACHE_HIT
+from sqlalchemy.orm import Session
+
+from auth_service.core.models import AuthUser as AuthUserModel
+from auth_service.crud.queries import AUTH_USER_BY_ID
+
+ROWS = 1000
+NUMBER = 20_000
+
+
+def dynamic(user_id: int):
+    return select(AuthUserModel).where(AuthUserModel.user_id == user_id)
+
+
+def with_lambda(user_id: int):
+    return lambda_stmt(lambda: select(AuthUserModel).where(AuthUserModel.user_id == user_id))
+
+
+def main() -> None:
+    engine = create_engine("sqlite://")
+    AuthUserModel.__table__.create(engine)
+    with Session(engine) as session:
+        session.add_all(
+            AuthUserModel(user_id=i, username=f"user_{i}", password=b"x")
+            for i in range(1, ROWS + 1)
+        )
+        session.commit()
+
+    hits = {"hit": 0, "total": 0}
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def count_cache_hits(conn, cursor, statement, parameters, context, executemany):
+        hits["total"] += 1
+        hits["hit"] += context.cache_hit is CACHE_HIT
+
+    cases = {
+        "dynamic": lambda i: (dynamic(i), None),
+        "lambda": lambda i: (with_lambda(i), None),
+        "prebuilt": lambda i: (AUTH_USER_BY_ID, {"user_id": i}),
+    }
+
+    print(f"{'case':>10} {'build us':>10} {'execute us':>11} {'cache hits':>11}")
+    for name, make in cases.items():
+        ids = iter(range(10 ** 9))
+
+        def build():
+            stmt, _ = make(next(ids) % ROWS + 1)
+            stmt._generate_cache_key()
+
+        build_time = min(timeit.repeat(build, number=NUMBER, repeat=3)) / NUMBER
+
+        hits.update(hit=0, total=0)
+        with Session(engine) as session:
+            def execute():
+                stmt, params = make(next(ids) % ROWS + 1)
+                session.execute(stmt, params).scalar_one_or_none()
+
+            execute_time = min(timeit.repeat(execute, number=NUMBER // 10, repeat=3)) / (NUMBER // 10)
+
+        ratio = hits["hit"] / hits["total"] if hits["total"] else 0.0
+        print(f"{name:>10} {build_time * 1e6:>10.1f} {execute_time * 1e6:>11.1f} {ratio:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+import asyncio
+import hashlib
+import math
+import time
+from typing import Any, AsyncIterable, Callable
+
+from redis.exceptions import RedisError
+
+from auth_service.core.logger import logger
+
+
+class BloomFilter:
+    """
+    Битовый массив + k хешей (double hashing поверх blake2b).
+    Порядок бит - MSB first, как у SETBIT/GETBIT в Redis,
+    поэтому массив можно целиком записать в Redis.
+    """
+    def __init__(
+            self,
+            capacity: int,
+            error_rate: float = 0.001,
+    ) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, item: str) -> list[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item: str) -> None:
+        for pos in self.positions(item):
+            self.bits[pos >> 3] |= 0x80 >> (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self.bits[pos >> 3] & (0x80 >> (pos & 7))
+            for pos in self.positions(item)
+        )
+
+    def clear(self) -> None:
+        self.bits = bytearray(len(self.bits))
+
+
+class RevokedTokenFilter:
+    """
+    Предварительная проверка отзыва токена.
+    False -> токен точно не отозван (БД можно не спрашивать),
+    True -> возможно отозван, нужна точная проверка в БД.
+
+    backend="memory" корректен только для одного воркера,
+    backend="redis" делит фильтр между воркерами.
+
+    В Redis карта хранит контрольный бит (sentinel_pos), который ставит только rebuild.
+    Ключ пропал (рестарт, eviction, FLUSH) - бит читается как 0: проверка идет в БД,
+    а фильтр перестраивается в фоне.
+    Перестройка собирает карту заново и подменяет ее целиком (RENAME), поэтому
+    биты удаленных из БД токенов уходят. Отзывы с начала прошлой перестройки
+    дописываются из delta: их коммит мог не попасть в выборку из БД.
+    """
+    def __init__(
+            self,
+            redis_helper: Any,
+            backend: str = "redis",
+            capacity: int = 1_000_000,
+            error_rate: float = 0.001,
+            redis_key: str = "revoked_tokens:bloom",
+            enabled: bool = True,
+            source: Callable[[], AsyncIterable[str]] | None = None,
+            rebuild_cooldown_seconds: float = 30.0,
+            rebuild_lock_seconds: float = 300.0,
+    ) -> None:
+        self.redis_helper = redis_helper
+        self.backend = backend
+        self.redis_key = redis_key
+        self.enabled = enabled
+        # Все отозванные токены из БД - для перестройки
+        self.source = source
+        self.rebuild_cooldown_seconds = rebuild_cooldown_seconds
+        self.rebuild_lock_seconds = rebuild_lock_seconds
+        self.bloom = BloomFilter(capacity=capacity, error_rate=error_rate)
+        # Хеши дают позиции < size, так что этот бит - только контрольный
+        self.sentinel_pos = self.bloom.size
+        self.delta_key = f"{redis_key}:delta"
+        self.delta_prev_key = f"{redis_key}:delta:prev"
+        self.tmp_key = f"{redis_key}:rebuild"
+        self.lock_key = f"{redis_key}:lock"
+        # То же для backend="memory"
+        self._delta: list[str] = []
+        self._delta_prev: list[str] = []
+        # Пока фильтр не построен - всегда идем в БД
+        self.ready = False
+        self._rebuild_task: asyncio.Task | None = None
+        self._next_rebuild_at = 0.0
+
+        # metrics
+        self.checks = 0
+        self.definite_negatives = 0
+        self.false_positives = 0
+        self.errors = 0
+        self.rebuilt_items = 0
+        self.rebuilds = 0
+        self.sentinel_misses = 0
+
+    @property
+    def redis(self):
+        return self.redis_helper.client
+
+    async def rebuild(self, items: AsyncIterable[str] | None = None) -> None:
+        """
+        items по умолчанию - source(). Выборка из БД должна начаться после вызова:
+        сначала сдвигается delta, потом читается БД
+        """
+        if not self.enabled:
+            return
+        if items is None:
+            if self.source is None:
+                return
+            items = self.source()
+
+        if self.backend == "redis":
+            built = await self._rebuild_redis(items)
+        else:
+            built = await self._rebuild_memory(items)
+        if built is None:
+            return
+
+        self.rebuilds += 1
+        self.rebuilt_items = built
+        self.ready = True
+        logger.info(f"Revoked token filter rebuilt: {built} items, backend={self.backend}")
+
+    async def _rebuild_memory(self, items: AsyncIterable[str]) -> int | None:
+        self._delta_prev.extend(self._delta)
+        self._delta = []
+        bloom = BloomFilter(capacity=self.bloom.capacity, error_rate=self.bloom.error_rate)
+        count = 0
+        try:
+            async for item in items:
+                bloom.add(item)
+                count += 1
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Failed to rebuild revoked token filter: {e}")
+            return None
+
+        for item in (*self._delta_prev, *self._delta):
+            bloom.add(item)
+        self.bloom = bloom
+        self._delta_prev = []
+        return count
+
+    async def _rebuild_redis(self, items: AsyncIterable[str]) -> int | None:
+        try:
+            locked = await self.redis.set(
+                self.lock_key, 1, nx=True, ex=math.ceil(self.rebuild_lock_seconds)
+            )
+            if not locked:
+                # Перестраивает другой воркер, карта общая
+                logger.info("Revoked token filter is being rebuilt by another worker")
+                self.ready = True
+                return None
+            # Отзывы с этого момента копятся в новой delta, прежние - в delta:prev
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.bitop("OR", self.delta_prev_key, self.delta_prev_key, self.delta_key)
+                pipe.delete(self.delta_key)
+                await pipe.execute()
+        except RedisError as e:
+            self.errors += 1
+            logger.error(f"Failed to start revoked token filter rebuild: {e}")
+            return None
+
+        bloom = BloomFilter(capacity=self.bloom.capacity, error_rate=self.bloom.error_rate)
+        count = 0
+        try:
+            async for item in items:
+                bloom.add(item)
+                count += 1
+
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.set(self.tmp_key, bytes(bloom.bits))
+                pipe.setbit(self.tmp_key, self.sentinel_pos, 1)
+                pipe.bitop("OR", self.tmp_key, self.tmp_key, self.delta_prev_key, self.delta_key)
+                pipe.rename(self.tmp_key, self.redis_key)
+                pipe.delete(self.delta_prev_key)
+                await pipe.execute()
+        except Exception as e:
+            # delta:prev остается и войдет в следующую перестройку
+            self.errors += 1
+            logger.error(f"Failed to rebuild revoked token filter: {e}")
+            return None
+        finally:
+            try:
+                await self.redis.delete(self.lock_key)
+            except RedisError:
+                pass  # истечет сам через rebuild_lock_seconds
+        return count
+
+    def _schedule_rebuild(self) -> None:
+        if self.source is None:
+            return
+        if self._rebuild_task is not None and not self._rebuild_task.done():
+            return
+        now = time.monotonic()
+        if now < self._next_rebuild_at:
+            return
+        self._next_rebuild_at = now + self.rebuild_cooldown_seconds
+        self._rebuild_task = asyncio.create_task(self.rebuild())
+
+    async def stop(self) -> None:
+        if self._rebuild_task is None:
+            return
+        self._rebuild_task.cancel()
+        try:
+            await self._rebuild_task
+        except asyncio.CancelledError:
+            pass
+        self._rebuild_task = None
+
+    async def add(self, item: str) -> None:
+        """
+        Ошибка Redis пробрасывается: отзыв нельзя коммитить, пока биты не в общем
+        фильтре, иначе остальные воркеры сочтут отозванный токен "точно не отозванным"
+        """
+        if not self.enabled:
+            return
+
+        self.bloom.add(item)
+        if self.backend != "redis":
+            self._delta.append(item)
+            return
+        try:
+            # Транзакция: RENAME перестройки не должен оказаться между записью в карту и в delta
+            async with self.redis.pipeline(transaction=True) as pipe:
+                for pos in self.bloom.positions(item):
+                    pipe.setbit(self.redis_key, pos, 1)
+                    pipe.setbit(self.delta_key, pos, 1)
+                await pipe.execute()
+        except RedisError as e:
+            self.errors += 1
+            logger.error(f"Failed to add token to revoked token filter: {e}")
+            raise
+
+    async def might_contain(self, item: str) -> bool:
+        self.checks += 1
+        if not self.enabled:
+            return True
+        if not self.ready:
+            self._schedule_rebuild()
+            return True
+
+        if self.backend == "redis":
+            try:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    pipe.getbit(self.redis_key, self.sentinel_pos)
+                    for pos in self.bloom.positions(item):
+                        pipe.getbit(self.redis_key, pos)
+                    sentinel, *bits = await pipe.execute()
+            except RedisError as e:
+                self.errors += 1
+                logger.error(f"Revoked token filter check failed: {e}")
+                return True
+            if not sentinel:
+                # Карта пропала или собрана заново из одних SETBIT - доверять нельзя
+                self.sentinel_misses += 1
+                self._schedule_rebuild()
+                return True
+            found = all(bits)
+        else:
+            found = item in self.bloom
+
+        if not found:
+            self.definite_negatives += 1
+        return found
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "ready": self.ready,
+            "backend": self.backend,
+            "size_bits": self.bloom.size,
+            "hash_count": self.bloom.hash_count,
+            "rebuilt_items": self.rebuilt_items,
+            "rebuilds": self.rebuilds,
+            "sentinel_misses": self.sentinel_misses,
+            "rebuilding": self._rebuild_task is not None and not self._rebuild_task.done(),
+            "checks": self.checks,
+            "db_lookups_skipped": self.definite_negatives,
+            "false_positives": self.false_positives,
+            "errors": self.errors,
+        }
@@ -1,9 +1,10 @@
-from pydantic import BaseModel, PostgresDsn
+from pydantic import BaseModel, Field, PostgresDsn
 from pydantic_settings import (
     BaseSettings,
     SettingsConfigDict,
 )
 from pathlib import Path
+from typing import Literal
 
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -29,9 +30,116 @@ class ApiPrefix(BaseModel):
 class AuthJWT(BaseModel):
     private_key_path:  Path = BASE_DIR / "certs" / "jwt-private.pem"
     public_key_path: Path = BASE_DIR / "certs" / "jwt-public.pem"
+    # старые публичные ключи, которые еще принимаются после ротации
+    previous_public_key_paths: list[Path] = []
+    key_id: str | None = None  # None - RFC 7638 thumbprint ключа
+    jwks_max_age_seconds: int = 3600
     algorithm: str = "RS256"
     access_token_expires_in: int = 15  # minutes
     refresh_token_expires_days: int = 30
+    payload_cache_maxsize: int = 50_000  # 0 - кэш выключен
+
+
+class HttpClientConfig(BaseModel):
+    timeout: float = 10.0  # seconds
+    connect_timeout: float = 5.0
+    pool_timeout: float = 5.0
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = False  # требует httpx[http2]
+
+
+class ResilienceConfig(BaseModel):
+    # circuit breaker, на каждый endpoint отдельно
+    failure_threshold: int = 5  # сбоев (сеть, таймаут, 5xx) подряд до размыкания
+    open_seconds: float = 10.0  # сколько отвечать 503 без запроса, потом пробные запросы
+    half_open_max_calls: int = 1
+    # только идемпотентные запросы (чтение профилей)
+    idempotent_timeout: float | None = 2.0  # вместо общего timeout клиента
+    retry_attempts: int = 2
+    retry_backoff_base: float = 0.05
+    retry_backoff_cap: float = 1.0
+    retry_budget_ratio: float = 0.2  # ретраев и хеджей не больше 20% от запросов
+    retry_budget_min_per_second: float = 1.0
+    hedging: bool = False  # повторный запрос, если ответа нет дольше p95
+    hedge_quantile: float = 0.95
+    hedge_min_samples: int = 50
+
+
+class ProfileCacheConfig(BaseModel):
+    maxsize: int = 10_000
+    ttl_seconds: float = 60.0  # 0 - кэш выключен
+    negative_ttl_seconds: float = 10.0  # для 404 от user_service
+
+
+class BatchConfig(BaseModel):
+    max_items: int = 500  # ключей в одном POST /users/batch, как batch.max_items в user_service
+
+
+class CryptoExecutorConfig(BaseModel):
+    kind: Literal["process", "thread"] = "process"
+    max_workers: int | None = None  # None - по числу CPU
+    max_queue_depth: int = 64  # сверх этого - 503
+
+
+class RevocationFilterConfig(BaseModel):
+    enabled: bool = True
+    # memory - только для одного воркера, redis - общий фильтр для всех воркеров
+    backend: Literal["memory", "redis"] = "redis"
+    capacity: int = 1_000_000
+    error_rate: float = 0.001
+    redis_key: str = "revoked_tokens:bloom"
+    rebuild_cooldown_seconds: float = 30.0  # не чаще, если карта пропала из Redis
+    rebuild_lock_seconds: float = 300.0  # перестраивает один воркер
+
+
+class RevokedTokenPurgeConfig(BaseModel):
+    enabled: bool = True
+    interval_seconds: float = 3600.0
+    batch_size: int = 1000
+    max_batches_per_run: int = 100
+    batch_pause_seconds: float = 0.05  # пауза между батчами, чтобы не держать нагрузку
+
+
+class LoginThrottlingConfig(BaseModel):
+    max_attempts: int = 5  # на username
+    block_time_seconds: int = 300  # окно для username, 5 минут
+    # Окно по IP выключено: за прокси у всех клиентов один адрес соединения,
+    # и 50 чужих ошибок блокировали бы вход всем
+    ip_window_enabled: bool = False
+    ip_max_attempts: int = 50
+    ip_window_seconds: int = 300
+    # Адреса/сети прокси, которым верим X-Forwarded-For
+    trusted_proxies: list[str] = []
+    key_prefix: str = "failed_attempts"
+
+
+class RedisConfig(BaseModel):
+    url: str = "redis://localhost:6379/0"
+    max_connections: int = 50
+    pool_timeout: float = 5.0  # ожидание свободного соединения из пула
+    socket_timeout: float = 2.0
+    socket_connect_timeout: float = 2.0
+    health_check_interval: int = 30
+    retry_attempts: int = 3
+    retry_backoff_base: float = 0.05
+    retry_backoff_cap: float = 1.0
+
+
+class PaginationConfig(BaseModel):
+    default_limit: int = 100
+    max_limit: int = 1000
+
+
+class ExportConfig(BaseModel):
+    batch_size: int = 1000  # строк за одну выборку из серверного курсора (yield_per)
+
+
+class BulkRegisterConfig(BaseModel):
+    max_items: int = 1000  # пользователей в одном запросе /auth/register/bulk
+    hash_concurrency: int | None = None  # задач bcrypt в пуле одновременно, None - max_workers
+    compensation_concurrency: int = 10  # удалений профилей в user_service одновременно
 
 
 class DataBaseConfig(BaseModel):
@@ -41,6 +149,18 @@ class DataBaseConfig(BaseModel):
     pool_pre_ping: bool = True
     max_overflow: int = 10
     pool_size: int = 50
+    query_cache_size: int = 500  # кэш скомпилированных statement-ов SQLAlchemy
+    prepared_statement_cache_size: int = 100  # подготовленные statement-ы asyncpg на соединение
+
+    # Реплики для чтения (JSON-список в env: AUTH_SERVICE__DB__REPLICA_URLS)
+    replica_urls: list[PostgresDsn] = []
+    replica_strategy: Literal["round_robin", "least_connections"] = "round_robin"
+    replica_max_lag_seconds: float = 5.0  # больше - реплика исключается
+    replica_check_interval_seconds: float = 5.0
+    replica_eject_seconds: float = 30.0
+    replica_pool_size: int = 20
+    replica_max_overflow: int = 10
+    read_your_writes_seconds: float = 5.0  # после записи клиент читает с мастера; 0 - выключено
 
     naming_conventions: dict[str, str] = {
         "ix": "ix_%(column_0_label)s",
@@ -65,6 +185,9 @@ class Settings(BaseSettings):
 
     # Other
     secret_key: str
+    # Общий секрет межсервисных эндпоинтов (заголовок X-Internal-Token), как у user_service
+    # Без значения по умолчанию и не короче 32 символов: заглушка из шаблона не пройдет
+    internal_api_token: str = Field(min_length=32)
     user_service_url: str
 
     # Cookie
@@ -80,8 +203,20 @@ class Settings(BaseSettings):
 
     run: RunModel = RunModel()
     api: ApiPrefix = ApiPrefix()
+    pagination: PaginationConfig = PaginationConfig()
+    export: ExportConfig = ExportConfig()
+    bulk_register: BulkRegisterConfig = BulkRegisterConfig()
     db: DataBaseConfig
+    redis: RedisConfig = RedisConfig()
     auth_jwt: AuthJWT = AuthJWT()
+    user_service_client: HttpClientConfig = HttpClientConfig()
+    user_service_resilience: ResilienceConfig = ResilienceConfig()
+    user_service_batch: BatchConfig = BatchConfig()
+    profile_cache: ProfileCacheConfig = ProfileCacheConfig()
+    crypto_executor: CryptoExecutorConfig = CryptoExecutorConfig()
+    revocation_filter: RevocationFilterConfig = RevocationFilterConfig()
+    revoked_token_purge: RevokedTokenPurgeConfig = RevokedTokenPurgeConfig()
+    login_throttling: LoginThrottlingConfig = LoginThrottlingConfig()
 
 
 settings = Settings()
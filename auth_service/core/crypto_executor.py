@@ -0,0 +1,162 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Iterable
+
+from fastapi import HTTPException, status
+
+from auth_service.core.config import settings
+from auth_service.core.logger import logger
+
+
+def _timed_call(fn: Callable[..., Any], *args: Any) -> tuple[Any, float]:
+    # Выполняется в воркере: возвращаем результат и чистое время работы
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+class _Timing:
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "avg_seconds": round(self.total / self.count, 6) if self.count else 0.0,
+            "max_seconds": round(self.max, 6),
+            "total_seconds": round(self.total, 6),
+        }
+
+
+class CryptoExecutor:
+    """
+    Пул для CPU-тяжелой криптографии (bcrypt), чтобы не блокировать event loop.
+    При переполнении очереди запрос сразу отклоняется с 503.
+    """
+    def __init__(
+            self,
+            kind: str = "process",
+            max_workers: int | None = None,
+            max_queue_depth: int = 64,
+    ) -> None:
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue_depth = max_queue_depth
+        self._executor: Executor | None = None
+
+        # metrics
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.queue_wait = _Timing()
+        self.execution = _Timing()
+
+    def start(self) -> None:
+        if self._executor is not None:
+            return
+        if self.kind == "thread":
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="crypto",
+            )
+        else:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        logger.info(f"Crypto executor started: kind={self.kind}, max_workers={self.max_workers}")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self._executor is None:
+            raise RuntimeError("Crypto executor is not started, check lifespan")
+
+        self._admit()
+        return await self._submit(fn, *args)
+
+    async def map(
+            self,
+            fn: Callable[..., Any],
+            items: Iterable[Any],
+            concurrency: int | None = None,
+    ) -> list[Any]:
+        """
+        Пакетная обработка (bulk-операции): держит в пуле не больше concurrency задач,
+        чтобы оставить место интерактивным запросам. Каждая задача проходит ту же
+        проверку глубины очереди, что и run: при отказе (503) остальные отменяются
+        """
+        if self._executor is None:
+            raise RuntimeError("Crypto executor is not started, check lifespan")
+
+        semaphore = asyncio.Semaphore(concurrency or self.max_workers or os.cpu_count() or 1)
+
+        async def submit_one(item: Any) -> Any:
+            async with semaphore:
+                self._admit()
+                return await self._submit(fn, item)
+
+        tasks = [asyncio.ensure_future(submit_one(item)) for item in items]
+        try:
+            return await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _admit(self) -> None:
+        if self.in_flight >= self.max_queue_depth:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, try again later",
+                headers={"Retry-After": "1"},
+            )
+
+    async def _submit(self, fn: Callable[..., Any], *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        submitted = time.perf_counter()
+        try:
+            result, exec_time = await loop.run_in_executor(
+                self._executor, _timed_call, fn, *args
+            )
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+        total = time.perf_counter() - submitted
+        self.completed += 1
+        self.execution.observe(exec_time)
+        self.queue_wait.observe(max(total - exec_time, 0.0))
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue_depth": self.max_queue_depth,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "queue_wait": self.queue_wait.stats(),
+            "execution": self.execution.stats(),
+        }
+
+
+crypto_executor = CryptoExecutor(
+    kind=settings.crypto_executor.kind,
+    max_workers=settings.crypto_executor.max_workers,
+    max_queue_depth=settings.crypto_executor.max_queue_depth,
+)
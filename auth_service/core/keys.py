@@ -0,0 +1,89 @@
+import base64
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Iterable
+
+from cryptography.hazmat.primitives.serialization import (
+    load_pem_private_key,
+    load_pem_public_key,
+)
+from jwt.algorithms import RSAAlgorithm
+
+from .config import settings
+
+
+def jwk_thumbprint(public_key: Any) -> str:
+    """
+    RFC 7638: base64url(sha256) от канонического JWK (e, kty, n)
+    """
+    jwk = RSAAlgorithm.to_jwk(public_key, as_dict=True)
+    canonical = json.dumps(
+        {"e": jwk["e"], "kty": jwk["kty"], "n": jwk["n"]},
+        separators=(",", ":"),
+        sort_keys=True,
+    )
+    digest = hashlib.sha256(canonical.encode()).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+class KeyRing:
+    """
+    Ключи подписи, распарсенные один раз при старте.
+    Текущий приватный ключ подписывает (kid в заголовке),
+    публичные ключи (текущий + предыдущие) проверяют по kid.
+    """
+    def __init__(
+            self,
+            private_key_path: Path,
+            public_key_path: Path,
+            previous_public_key_paths: Iterable[Path] = (),
+            algorithm: str = "RS256",
+            key_id: str | None = None,
+    ) -> None:
+        self.algorithm = algorithm
+        self.private_key = load_pem_private_key(
+            private_key_path.read_bytes(),
+            password=None,
+        )
+        current_public_key = load_pem_public_key(public_key_path.read_bytes())
+        self.kid = key_id or jwk_thumbprint(current_public_key)
+
+        self.public_keys: dict[str, Any] = {self.kid: current_public_key}
+        for path in previous_public_key_paths:
+            public_key = load_pem_public_key(path.read_bytes())
+            self.public_keys.setdefault(jwk_thumbprint(public_key), public_key)
+
+        self._jwks = {
+            "keys": [
+                self._to_jwk(kid, public_key)
+                for kid, public_key in self.public_keys.items()
+            ]
+        }
+        self.jwks_etag = '"{}"'.format(
+            hashlib.sha256(json.dumps(self._jwks, sort_keys=True).encode()).hexdigest()[:32]
+        )
+
+    def _to_jwk(self, kid: str, public_key: Any) -> dict[str, Any]:
+        jwk = RSAAlgorithm.to_jwk(public_key, as_dict=True)
+        jwk.update(kid=kid, use="sig", alg=self.algorithm)
+        return jwk
+
+    def get_verification_key(self, kid: str | None) -> Any | None:
+        # Токены, выпущенные до ротации, не содержат kid
+        if kid is None:
+            return self.public_keys[self.kid]
+        return self.public_keys.get(kid)
+
+    @property
+    def jwks(self) -> dict[str, Any]:
+        return self._jwks
+
+
+key_ring = KeyRing(
+    private_key_path=settings.auth_jwt.private_key_path,
+    public_key_path=settings.auth_jwt.public_key_path,
+    previous_public_key_paths=settings.auth_jwt.previous_public_key_paths,
+    algorithm=settings.auth_jwt.algorithm,
+    key_id=settings.auth_jwt.key_id,
+)
@@ -2,11 +2,14 @@ __all__ = (
     "Base",
     'db_helper',
     "DatabaseHelper",
+    "SessionScope",
     "AuthUser",
     "RevokedToken",
+    "ProcessedEvent",
 )
 
 from .base import Base
-from .db_helper import db_helper, DatabaseHelper
+from .db_helper import db_helper, DatabaseHelper, SessionScope
 from .auth_user import AuthUser
 from .revoked_tokens import RevokedToken
+from .processed_event import ProcessedEvent
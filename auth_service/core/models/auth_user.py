@@ -1,4 +1,6 @@
-from sqlalchemy import String, TIMESTAMP, func, Boolean, LargeBinary, Text, Integer
+from datetime import datetime
+
+from sqlalchemy import String, TIMESTAMP, func, Boolean, LargeBinary, Integer, true
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .base import Base
@@ -7,7 +9,13 @@ from .base import Base
 class AuthUser(Base):
     user_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True, nullable=False)
     password: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
-    refresh_token: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Локальная копия профиля из user_service (источник истины - user_service)
+    username: Mapped[str | None] = mapped_column(String(32), unique=True, index=True, nullable=True)
+    email: Mapped[str | None] = mapped_column(String(255), index=True, nullable=True)
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True, server_default=true())
+    # sha256 текущего refresh-токена (security.token_digest)
+    refresh_token_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    refresh_token_expires_at: Mapped[datetime | None] = mapped_column(TIMESTAMP, nullable=True)
     updated_at: Mapped[TIMESTAMP] = mapped_column(
         TIMESTAMP,
         server_default=func.now(),
@@ -15,7 +23,7 @@ class AuthUser(Base):
     )
 
     def __str__(self) -> str:
-        return f"{self.__class__.__name__}(id={self.user_id}, password={self.password!r})"
+        return f"{self.__class__.__name__}(id={self.user_id}, username={self.username!r})"
 
     def __repr__(self) -> str:
         return str(self)
@@ -1,5 +1,8 @@
-from typing import AsyncGenerator
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, Sequence
 
+from sqlalchemy import event
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
     AsyncEngine,
@@ -8,6 +11,42 @@ from sqlalchemy.ext.asyncio import (
 )
 
 from auth_service.core.config import settings
+from .replicas import ReplicaSet, is_connection_error, mark_primary_write, wants_primary
+
+# async with scope() as session: ... - соединение из пула занято только внутри блока
+SessionScope = Callable[[], AbstractAsyncContextManager[AsyncSession]]
+
+
+class StatementCacheStats:
+    """
+    Попадания в кэш скомпилированных statement-ов (context.cache_hit)
+    """
+    def __init__(self, engine: AsyncEngine) -> None:
+        self.engine = engine
+        self.hits = 0
+        self.misses = 0
+        self.uncached = 0
+        event.listen(engine.sync_engine, "after_cursor_execute", self.observe)
+
+    def observe(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        cache_hit = getattr(context, "cache_hit", None)
+        if cache_hit is CACHE_HIT:
+            self.hits += 1
+        elif cache_hit is CACHE_MISS:
+            self.misses += 1
+        else:
+            self.uncached += 1
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        compiled_cache = getattr(self.engine.sync_engine, "_compiled_cache", None)
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "uncached": self.uncached,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "compiled_cache_entries": len(compiled_cache) if compiled_cache is not None else 0,
+        }
 
 
 class DatabaseHelper:
@@ -19,6 +58,15 @@ class DatabaseHelper:
             pool_pre_ping: bool = True,
             max_overflow: int = 10,
             pool_size: int = 5,
+            query_cache_size: int = 500,
+            prepared_statement_cache_size: int = 100,
+            replica_urls: Sequence[str] = (),
+            replica_strategy: str = "round_robin",
+            replica_max_lag_seconds: float = 5.0,
+            replica_check_interval_seconds: float = 5.0,
+            replica_eject_seconds: float = 30.0,
+            replica_pool_size: int = 20,
+            replica_max_overflow: int = 10,
     ) -> None:
         self.engine: AsyncEngine = create_async_engine(
             url=url,
@@ -27,21 +75,110 @@ class DatabaseHelper:
             pool_pre_ping=pool_pre_ping,
             max_overflow=max_overflow,
             pool_size=pool_size,
+            query_cache_size=query_cache_size,
+            connect_args={"prepared_statement_cache_size": prepared_statement_cache_size},
         )
+        self.statement_cache = StatementCacheStats(self.engine)
         self.session_factory: async_sessionmaker[AsyncSession] = async_sessionmaker(
             bind=self.engine,
             autoflush=False,
             autocommit=False,
             expire_on_commit=False,
         )
+        # Коммит на мастере включает read-your-writes для текущего запроса
+        event.listen(self.engine.sync_engine, "commit", mark_primary_write)
+        self.replicas = ReplicaSet(
+            urls=replica_urls,
+            strategy=replica_strategy,
+            max_lag_seconds=replica_max_lag_seconds,
+            check_interval_seconds=replica_check_interval_seconds,
+            eject_seconds=replica_eject_seconds,
+            pool_size=replica_pool_size,
+            max_overflow=replica_max_overflow,
+            pool_pre_ping=pool_pre_ping,
+            echo=echo,
+            query_cache_size=query_cache_size,
+            prepared_statement_cache_size=prepared_statement_cache_size,
+        )
+        # У каждой реплики свой движок и свой кэш statement-ов
+        self.replica_statement_caches = [
+            StatementCacheStats(replica.engine) for replica in self.replicas.replicas
+        ]
+
+    def start(self) -> None:
+        # Фоновая проверка лага реплик
+        self.replicas.start()
 
     async def dispose(self) -> None:
+        await self.replicas.dispose()
         await self.engine.dispose()
 
     async def session_getter(self) -> AsyncGenerator[AsyncSession, None]:
         async with self.session_factory() as session:
             yield session
 
+    @asynccontextmanager
+    async def scoped_session(self) -> AsyncIterator[AsyncSession]:
+        async with self.session_factory() as session:
+            yield session
+
+    def session_scope_getter(self) -> SessionScope:
+        """
+        Зависимость для обработчиков с HTTP-вызовами и bcrypt: сама ничего не открывает,
+        сессия (и соединение) живут только внутри `async with scope() as session`
+        """
+        return self.scoped_session
+
+    @asynccontextmanager
+    async def read_session(self) -> AsyncIterator[AsyncSession]:
+        """
+        Сессия только для чтения: реплика, а если реплик нет, все исключены
+        или запрос недавно писал - мастер
+        """
+        replica = None if wants_primary() else self.replicas.choose()
+        if replica is None:
+            async with self.session_factory() as session:
+                yield session
+            return
+
+        replica.in_use += 1
+        replica.sessions += 1
+        try:
+            async with replica.session_factory() as session:
+                yield session
+        except Exception as e:
+            if is_connection_error(e):
+                replica.eject(self.replicas.eject_seconds, str(e))
+            raise
+        finally:
+            replica.in_use -= 1
+
+    async def read_session_getter(self) -> AsyncGenerator[AsyncSession, None]:
+        async with self.read_session() as session:
+            yield session
+
+    def replica_stats(self) -> dict[str, Any]:
+        return self.replicas.stats()
+
+    def statement_cache_stats(self) -> dict[str, Any]:
+        # Верхний уровень - мастер, как раньше; реплики - по url без пароля
+        return {
+            **self.statement_cache.stats(),
+            "replicas": {
+                replica.name: cache.stats()
+                for replica, cache in zip(self.replicas.replicas, self.replica_statement_caches)
+            },
+        }
+
+    def pool_stats(self) -> dict[str, Any]:
+        pool = self.engine.sync_engine.pool
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+        }
+
     @staticmethod
     def create_db_if_not_exists():
         import psycopg2
@@ -78,4 +215,13 @@ db_helper = DatabaseHelper(
     pool_pre_ping=settings.db.pool_pre_ping,
     pool_size=settings.db.pool_size,
     max_overflow=settings.db.max_overflow,
+    query_cache_size=settings.db.query_cache_size,
+    prepared_statement_cache_size=settings.db.prepared_statement_cache_size,
+    replica_urls=[str(url) for url in settings.db.replica_urls],
+    replica_strategy=settings.db.replica_strategy,
+    replica_max_lag_seconds=settings.db.replica_max_lag_seconds,
+    replica_check_interval_seconds=settings.db.replica_check_interval_seconds,
+    replica_eject_seconds=settings.db.replica_eject_seconds,
+    replica_pool_size=settings.db.replica_pool_size,
+    replica_max_overflow=settings.db.replica_max_overflow,
 )
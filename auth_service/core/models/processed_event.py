@@ -0,0 +1,17 @@
+from sqlalchemy import String, TIMESTAMP, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class ProcessedEvent(Base):
+    # Обработанные события user_service (outbox): повторная доставка пропускается
+    event_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    event_type: Mapped[str] = mapped_column(String(32), nullable=False)
+    processed_at: Mapped[TIMESTAMP] = mapped_column(TIMESTAMP, server_default=func.now(), index=True)
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__}(event_id={self.event_id}, event_type={self.event_type!r})"
+
+    def __repr__(self) -> str:
+        return str(self)
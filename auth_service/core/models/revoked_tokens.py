@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from sqlalchemy import String, TIMESTAMP, func, Integer
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -6,15 +8,18 @@ from .base import Base
 
 class RevokedToken(Base):
     id: Mapped[str] = mapped_column(Integer, primary_key=True, autoincrement=True, nullable=False)
-    token: Mapped[str] = mapped_column(String, unique=True, nullable=False)
+    # sha256 отозванного токена (security.token_digest)
+    token_hash: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
     revoked_at: Mapped[TIMESTAMP] = mapped_column(
         TIMESTAMP,
         server_default=func.now(),
         onupdate=func.now()
     )
+    # exp самого токена (UTC): после него запись можно удалять
+    expires_at: Mapped[datetime] = mapped_column(TIMESTAMP, nullable=False, index=True)
 
     def __str__(self) -> str:
-        return f"{self.__class__.__name__}(id={self.id}, token={self.token}, revoked_at={self.revoked_at})"
+        return f"{self.__class__.__name__}(id={self.id}, token_hash={self.token_hash}, revoked_at={self.revoked_at})"
 
     def __repr__(self) -> str:
         return str(self)
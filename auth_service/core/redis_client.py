@@ -1,9 +1,133 @@
+import time
+from typing import Any
+
 import redis.asyncio as redis
+from redis.asyncio import BlockingConnectionPool
+from redis.asyncio.retry import Retry
+from redis.backoff import ExponentialBackoff
+from redis.exceptions import ConnectionError, TimeoutError
+
+from auth_service.core.config import settings
+
+
+class InstrumentedConnectionPool(BlockingConnectionPool):
+    """
+    Пул с ожиданием свободного соединения (до pool_timeout) и метриками ожидания
+    """
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.acquired = 0
+        self.wait_timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    async def get_connection(self, *args: Any, **kwargs: Any):
+        started = time.perf_counter()
+        try:
+            connection = await super().get_connection(*args, **kwargs)
+        except ConnectionError:
+            self.wait_timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+        self.acquired += 1
+        return connection
+
+    def stats(self) -> dict[str, Any]:
+        in_use = len(getattr(self, "_in_use_connections", ()))
+        idle = len(getattr(self, "_available_connections", ()))
+        return {
+            "max_connections": self.max_connections,
+            "in_use": in_use,
+            "idle": idle,
+            "acquired": self.acquired,
+            "wait_timeouts": self.wait_timeouts,
+            "wait_avg_seconds": round(self.wait_total / self.acquired, 6) if self.acquired else 0.0,
+            "wait_max_seconds": round(self.wait_max, 6),
+        }
+
+
+class RedisHelper:
+    """
+    Пул соединений Redis: создается и закрывается в lifespan,
+    клиент отдается через зависимость.
+    """
+    def __init__(
+            self,
+            url: str,
+            max_connections: int = 50,
+            pool_timeout: float = 5.0,
+            socket_timeout: float = 2.0,
+            socket_connect_timeout: float = 2.0,
+            health_check_interval: int = 30,
+            retry_attempts: int = 3,
+            retry_backoff_base: float = 0.05,
+            retry_backoff_cap: float = 1.0,
+    ) -> None:
+        self.url = url
+        self.max_connections = max_connections
+        self.pool_timeout = pool_timeout
+        self.socket_timeout = socket_timeout
+        self.socket_connect_timeout = socket_connect_timeout
+        self.health_check_interval = health_check_interval
+        self.retry_attempts = retry_attempts
+        self.retry_backoff_base = retry_backoff_base
+        self.retry_backoff_cap = retry_backoff_cap
+        self.pool: InstrumentedConnectionPool | None = None
+        self._client: redis.Redis | None = None
+
+    async def start(self) -> None:
+        if self._client is not None:
+            return
+        self.pool = InstrumentedConnectionPool.from_url(
+            self.url,
+            max_connections=self.max_connections,
+            timeout=self.pool_timeout,
+            socket_timeout=self.socket_timeout,
+            socket_connect_timeout=self.socket_connect_timeout,
+            health_check_interval=self.health_check_interval,
+            retry=Retry(
+                ExponentialBackoff(cap=self.retry_backoff_cap, base=self.retry_backoff_base),
+                self.retry_attempts,
+            ),
+            retry_on_error=[ConnectionError, TimeoutError],
+            decode_responses=True,
+        )
+        self._client = redis.Redis(connection_pool=self.pool)
+
+    @property
+    def client(self) -> redis.Redis:
+        if self._client is None:
+            raise RuntimeError("Redis client is not started, check lifespan")
+        return self._client
+
+    def client_getter(self) -> redis.Redis:
+        return self.client
+
+    async def dispose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self.pool is not None:
+            await self.pool.disconnect()
+            self.pool = None
+
+    def stats(self) -> dict[str, Any]:
+        if self.pool is None:
+            return {"started": False}
+        return {"started": True, **self.pool.stats()}
+
 
-# Подключение к Redis
-redis_client = redis.Redis(
-    host="localhost",
-    port=6379,
-    db=0,
-    decode_responses=True,
+redis_helper = RedisHelper(
+    url=settings.redis.url,
+    max_connections=settings.redis.max_connections,
+    pool_timeout=settings.redis.pool_timeout,
+    socket_timeout=settings.redis.socket_timeout,
+    socket_connect_timeout=settings.redis.socket_connect_timeout,
+    health_check_interval=settings.redis.health_check_interval,
+    retry_attempts=settings.redis.retry_attempts,
+    retry_backoff_base=settings.redis.retry_backoff_base,
+    retry_backoff_cap=settings.redis.retry_backoff_cap,
 )
@@ -0,0 +1,376 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+import httpx
+
+from auth_service.core.config import settings
+from auth_service.core.logger import logger
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, endpoint: str, retry_after: float) -> None:
+        super().__init__(f"Circuit for {endpoint} is open")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+def is_failure(outcome: httpx.Response | BaseException) -> bool:
+    # Для брейкера и ретраев сбой - это сеть/таймаут или 5xx; 4xx - нормальный ответ
+    if isinstance(outcome, BaseException):
+        return isinstance(outcome, httpx.RequestError)
+    return outcome.status_code >= 500
+
+
+class CircuitBreaker:
+    """
+    closed -> open после failure_threshold сбоев подряд,
+    open -> half_open через open_seconds,
+    half_open пропускает до half_open_max_calls пробных запросов:
+    успех закрывает, сбой снова открывает
+    """
+    def __init__(
+            self,
+            failure_threshold: int = 5,
+            open_seconds: float = 10.0,
+            half_open_max_calls: int = 1,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+
+        # metrics
+        self.opened = 0
+        self.short_circuited = 0
+
+    def retry_after(self) -> float:
+        return max(self.opened_at + self.open_seconds - time.monotonic(), 0.0)
+
+    def allow(self) -> bool:
+        if self.state == OPEN:
+            if self.retry_after() > 0:
+                self.short_circuited += 1
+                return False
+            self.state = HALF_OPEN
+            self.half_open_calls = 0
+        if self.state == HALF_OPEN:
+            if self.half_open_calls >= self.half_open_max_calls:
+                self.short_circuited += 1
+                return False
+            self.half_open_calls += 1
+        return True
+
+    def release(self) -> None:
+        if self.state == HALF_OPEN and self.half_open_calls > 0:
+            self.half_open_calls -= 1
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        if self.state == HALF_OPEN:
+            self.state = CLOSED
+            self.half_open_calls = 0
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self) -> None:
+        if self.state != OPEN:
+            self.opened += 1
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.half_open_calls = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "opened": self.opened,
+            "short_circuited": self.short_circuited,
+            "retry_after_seconds": round(self.retry_after(), 3) if self.state == OPEN else 0.0,
+        }
+
+
+class RetryBudget:
+    """
+    Ретраи и хеджи не больше ratio от обычных запросов (+ min_per_second),
+    чтобы при деградации user_service не умножать на нем нагрузку
+    """
+    def __init__(
+            self,
+            ratio: float = 0.2,
+            min_per_second: float = 1.0,
+            max_tokens: float = 10.0,
+    ) -> None:
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self._updated = time.monotonic()
+
+    def _refill(self, amount: float = 0.0) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.tokens + (now - self._updated) * self.min_per_second + amount,
+            self.max_tokens,
+        )
+        self._updated = now
+
+    def deposit(self) -> None:
+        self._refill(self.ratio)
+
+    def withdraw(self) -> bool:
+        self._refill()
+        if self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+
+class LatencyWindow:
+    # Скользящее окно последних успешных ответов для порога хеджирования
+    def __init__(self, size: int = 200) -> None:
+        self.samples: deque[float] = deque(maxlen=size)
+
+    def observe(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def quantile(self, q: float) -> float | None:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class EndpointState:
+    def __init__(self, breaker: CircuitBreaker, latency_window: int) -> None:
+        self.breaker = breaker
+        self.latency = LatencyWindow(latency_window)
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.retries_denied = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+
+class ResilientCaller:
+    """
+    Обертка над запросами к соседнему сервису, состояние - на каждый endpoint:
+    circuit breaker, ограниченные ретраи идемпотентных запросов
+    с backoff (full jitter) и хеджирование после p95 задержки
+    """
+    def __init__(
+            self,
+            name: str,
+            failure_threshold: int = 5,
+            open_seconds: float = 10.0,
+            half_open_max_calls: int = 1,
+            idempotent_timeout: float | None = 2.0,
+            retry_attempts: int = 2,
+            retry_backoff_base: float = 0.05,
+            retry_backoff_cap: float = 1.0,
+            retry_budget_ratio: float = 0.2,
+            retry_budget_min_per_second: float = 1.0,
+            hedging: bool = False,
+            hedge_quantile: float = 0.95,
+            hedge_min_samples: int = 50,
+            hedge_min_delay: float = 0.01,
+            latency_window: int = 200,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.idempotent_timeout = idempotent_timeout
+        self.retry_attempts = retry_attempts
+        self.retry_backoff_base = retry_backoff_base
+        self.retry_backoff_cap = retry_backoff_cap
+        self.hedging = hedging
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+        self.latency_window = latency_window
+        # Бюджет общий на сервис: ретраи по разным endpoint-ам бьют в один и тот же user_service
+        self.budget = RetryBudget(
+            ratio=retry_budget_ratio,
+            min_per_second=retry_budget_min_per_second,
+        )
+        self.endpoints: dict[str, EndpointState] = {}
+
+    def _endpoint(self, endpoint: str) -> EndpointState:
+        state = self.endpoints.get(endpoint)
+        if state is None:
+            state = self.endpoints[endpoint] = EndpointState(
+                CircuitBreaker(
+                    failure_threshold=self.failure_threshold,
+                    open_seconds=self.open_seconds,
+                    half_open_max_calls=self.half_open_max_calls,
+                ),
+                self.latency_window,
+            )
+        return state
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.retry_backoff_cap, self.retry_backoff_base * 2 ** attempt))
+
+    def _hedge_delay(self, state: EndpointState) -> float | None:
+        if not self.hedging or len(state.latency.samples) < self.hedge_min_samples:
+            return None
+        return max(state.latency.quantile(self.hedge_quantile), self.hedge_min_delay)
+
+    async def request(
+            self,
+            client: httpx.AsyncClient,
+            method: str,
+            url: str,
+            endpoint: str,
+            idempotent: bool = False,
+            **kwargs: Any,
+    ) -> httpx.Response:
+        """
+        endpoint - шаблон пути ("GET /users/{id}"), а не сам url,
+        иначе брейкер и p95 разъедутся по каждому id.
+        Неидемпотентные запросы только проходят через брейкер.
+        """
+        state = self._endpoint(endpoint)
+        if idempotent and self.idempotent_timeout is not None:
+            kwargs.setdefault("timeout", self.idempotent_timeout)
+
+        async def send() -> httpx.Response:
+            return await client.request(method, url, **kwargs)
+
+        state.calls += 1
+        self.budget.deposit()
+        attempts = 1 + self.retry_attempts if idempotent else 1
+        for attempt in range(attempts):
+            if not state.breaker.allow():
+                raise CircuitOpenError(f"{self.name} {endpoint}", state.breaker.retry_after())
+
+            started = time.perf_counter()
+            try:
+                if idempotent:
+                    outcome: httpx.Response | BaseException = await self._hedged(send, state)
+                else:
+                    outcome = await send()
+            except httpx.RequestError as e:
+                outcome = e
+            except BaseException:
+                # Отмена или чужая ошибка - исход неизвестен, освобождаем пробный слот
+                state.breaker.release()
+                raise
+
+            if not is_failure(outcome):
+                state.breaker.record_success()
+                state.latency.observe(time.perf_counter() - started)
+                return outcome
+
+            state.failures += 1
+            state.breaker.record_failure()
+            last_attempt = attempt == attempts - 1
+            if not last_attempt and not self.budget.withdraw():
+                state.retries_denied += 1
+                last_attempt = True
+            if last_attempt:
+                if isinstance(outcome, BaseException):
+                    raise outcome
+                return outcome
+
+            state.retries += 1
+            logger.warning(f"Retrying {self.name} {endpoint} after failure (attempt {attempt + 1})")
+            await asyncio.sleep(self._backoff(attempt))
+
+        raise RuntimeError("unreachable")
+
+    async def _hedged(
+            self,
+            send: Callable[[], Awaitable[httpx.Response]],
+            state: EndpointState,
+    ) -> httpx.Response:
+        delay = self._hedge_delay(state)
+        if delay is None:
+            return await send()
+
+        first = asyncio.ensure_future(send())
+        try:
+            return await asyncio.wait_for(asyncio.shield(first), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+        except BaseException:
+            first.cancel()
+            raise
+
+        if not self.budget.withdraw():
+            return await first
+
+        # Первый ответ дольше p95 - дублируем запрос, берем первый успешный
+        state.hedges += 1
+        second = asyncio.ensure_future(send())
+        pending = {first, second}
+        last: httpx.Response | BaseException | None = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    last = task.exception() or task.result()
+                    if isinstance(last, httpx.Response) and not is_failure(last):
+                        if task is second:
+                            state.hedge_wins += 1
+                        return last
+            # Оба запроса неудачны: отдаем последний исход (5xx или исключение)
+            if isinstance(last, BaseException):
+                raise last
+            return last
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "retry_budget_tokens": round(self.budget.tokens, 2),
+            "endpoints": {
+                endpoint: {
+                    **state.breaker.stats(),
+                    "calls": state.calls,
+                    "failures": state.failures,
+                    "retries": state.retries,
+                    "retries_denied": state.retries_denied,
+                    "hedges": state.hedges,
+                    "hedge_wins": state.hedge_wins,
+                    "p95_seconds": (
+                        round(p95, 4)
+                        if (p95 := state.latency.quantile(0.95)) is not None
+                        else None
+                    ),
+                }
+                for endpoint, state in self.endpoints.items()
+            },
+        }
+
+
+user_service_resilience = ResilientCaller(
+    name="user_service",
+    failure_threshold=settings.user_service_resilience.failure_threshold,
+    open_seconds=settings.user_service_resilience.open_seconds,
+    half_open_max_calls=settings.user_service_resilience.half_open_max_calls,
+    idempotent_timeout=settings.user_service_resilience.idempotent_timeout,
+    retry_attempts=settings.user_service_resilience.retry_attempts,
+    retry_backoff_base=settings.user_service_resilience.retry_backoff_base,
+    retry_backoff_cap=settings.user_service_resilience.retry_backoff_cap,
+    retry_budget_ratio=settings.user_service_resilience.retry_budget_ratio,
+    retry_budget_min_per_second=settings.user_service_resilience.retry_budget_min_per_second,
+    hedging=settings.user_service_resilience.hedging,
+    hedge_quantile=settings.user_service_resilience.hedge_quantile,
+    hedge_min_samples=settings.user_service_resilience.hedge_min_samples,
+)
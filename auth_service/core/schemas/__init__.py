@@ -4,6 +4,19 @@ __all__ = (
     "CombinedUserSchema",
     "TokenResponseSchema",
     "RevokeTokenResponseSchema",
+    "UserSyncSchema",
+    "AuthUsersPage",
+    "RevokedTokensPage",
+    "BulkRegisterSchema",
+    "BulkRegisterResponse",
+    "InboxEventsSchema",
+    "InboxEventsResponse",
 )
 
-from .auth_user import AuthUser, RegisterUserSchema, CombinedUserSchema, TokenResponseSchema, RevokeTokenResponseSchema
+from .auth_user import (
+    AuthUser, RegisterUserSchema, CombinedUserSchema,
+    TokenResponseSchema, RevokeTokenResponseSchema, UserSyncSchema,
+    AuthUsersPage, RevokedTokensPage,
+    BulkRegisterSchema, BulkRegisterResponse,
+    InboxEventsSchema, InboxEventsResponse,
+)
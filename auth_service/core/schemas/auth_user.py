@@ -1,22 +1,102 @@
 from datetime import datetime
 
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, EmailStr, model_validator
+from typing import Annotated, Any, Literal, Optional
+
+from annotated_types import MaxLen
 
 
 class AuthUser(BaseModel):
     user_id: int
+    username: Optional[str] = None
+    email: Optional[str] = None
+    is_active: bool = True
     password: bytes
-    refresh_token: Optional[str] = None
+    refresh_token_hash: Optional[str] = None
     updated_at: Optional[datetime] = None
 
 
+class AuthUsersPage(BaseModel):
+    items: list[AuthUser]
+    next_cursor: Optional[str] = None
+
+
 class RegisterUserSchema(BaseModel):
     username: str
     password: str
     email: EmailStr
 
 
+class BulkRegisterUserSchema(BaseModel):
+    username: str
+    email: EmailStr
+    # Либо пароль, либо готовый bcrypt-хеш из старой системы
+    password: Optional[str] = None
+    password_hash: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_password(self):
+        if (self.password is None) == (self.password_hash is None):
+            raise ValueError("Exactly one of password or password_hash is required")
+        return self
+
+
+class BulkRegisterSchema(BaseModel):
+    users: list[BulkRegisterUserSchema]
+    issue_tokens: bool = False
+
+
+class BulkRegisterResult(BaseModel):
+    username: str
+    status: Literal["created", "conflict", "duplicate", "invalid", "skipped", "error"]
+    user_id: Optional[int] = None
+    errors: list[str] = []
+    # Профиль создан в user_service, но auth_user нет и удалить профиль не удалось
+    profile_left: bool = False
+    access_token: Optional[str] = None
+    refresh_token: Optional[str] = None
+
+
+class BulkRegisterStats(BaseModel):
+    total: int = 0
+    created: int = 0
+    failed: int = 0
+    profiles_left: int = 0
+    elapsed_seconds: float = 0.0
+
+
+class BulkRegisterResponse(BaseModel):
+    results: list[BulkRegisterResult]
+    stats: BulkRegisterStats
+
+
+class UserSyncSchema(BaseModel):
+    user_id: int
+    username: Annotated[str, MaxLen(32)]
+    email: EmailStr
+    is_active: bool = True
+
+
+class InboxEventSchema(BaseModel):
+    event_id: str  # ключ идемпотентности (uuid из user_service user_outbox)
+    event_type: str
+    payload: dict[str, Any]
+
+
+class InboxEventsSchema(BaseModel):
+    events: list[InboxEventSchema]
+
+
+class InboxEventResult(BaseModel):
+    event_id: str
+    status: Literal["applied", "duplicate", "unsupported", "failed"]
+    error: Optional[str] = None
+
+
+class InboxEventsResponse(BaseModel):
+    results: list[InboxEventResult]
+
+
 class CombinedUserSchema(BaseModel):
     user_id: int
     email: EmailStr
@@ -32,4 +112,11 @@ class TokenResponseSchema(BaseModel):
 
 class RevokeTokenResponseSchema(BaseModel):
     id: int
-    token: str
+    token_hash: str
+    revoked_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+
+
+class RevokedTokensPage(BaseModel):
+    items: list[RevokeTokenResponseSchema]
+    next_cursor: Optional[str] = None
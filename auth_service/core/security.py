@@ -6,19 +6,37 @@ from jwt import (
     PyJWTError,
 )
 import bcrypt
+import re
+import time
 from datetime import datetime, timezone, timedelta
+from hashlib import sha256
+from typing import Any, Callable
 
 from fastapi import HTTPException, status
 from passlib.context import CryptContext
 
 from .config import settings
+from .crypto_executor import crypto_executor
+from .cache import TTLCache
+from .keys import key_ring
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Поле и значения типа токена в payload
+TOKEN_TYPE_FIELD = "type"
+ACCESS_TOKEN_TYPE = "access"
+REFRESH_TOKEN_TYPE = "refresh"
+
+# sha256(token) -> проверенный payload, запись живет до exp токена
+token_payload_cache = TTLCache(
+    maxsize=settings.auth_jwt.payload_cache_maxsize,
+    ttl=settings.auth_jwt.access_token_expires_in * 60,
+)
+
 
 def encode_jwt(
         payload: dict,
-        private_key: str = settings.auth_jwt.private_key_path.read_text(),
+        private_key: Any = None,  # по умолчанию - текущий ключ из key_ring
         algorithm: str = settings.auth_jwt.algorithm,
         expires_in: int = settings.auth_jwt.access_token_expires_in,  # minutes
         expire_timedelta: timedelta | None = None,
@@ -33,21 +51,31 @@ def encode_jwt(
         exp=expire,
         iat=now,
     )
+    headers = None
+    if private_key is None:
+        private_key = key_ring.private_key
+        headers = {"kid": key_ring.kid}
     encoded = (
         jwt.encode(
             to_encode,
             private_key,
-            algorithm=algorithm)
+            algorithm=algorithm,
+            headers=headers)
     )
     return encoded
 
 
 def decode_jwt(
         token: str | bytes,
-        public_key: str = settings.auth_jwt.public_key_path.read_text(),
+        public_key: Any = None,  # по умолчанию - ключ из key_ring по kid
         algorithm: str = settings.auth_jwt.algorithm,
 ):
     try:
+        if public_key is None:
+            kid = jwt.get_unverified_header(token).get("kid")
+            public_key = key_ring.get_verification_key(kid)
+            if public_key is None:
+                raise InvalidTokenError(f"Unknown key id: {kid}")
         decoded = jwt.decode(
             token,
             public_key,
@@ -74,12 +102,54 @@ def decode_jwt(
     return decoded
 
 
+def token_digest(token: str | bytes) -> str:
+    if isinstance(token, str):
+        token = token.encode()
+    return sha256(token).hexdigest()
+
+
+def token_expires_at(token: str | bytes) -> datetime:
+    """
+    exp токена как naive UTC datetime, без проверки подписи (для своих токенов)
+    """
+    payload = jwt.decode(token, options={"verify_signature": False})
+    return datetime.fromtimestamp(payload["exp"], timezone.utc).replace(tzinfo=None)
+
+
+def decode_jwt_cached(
+        token: str | bytes,
+        cache_if: Callable[[dict], bool] | None = None,
+) -> dict:
+    """
+    decode_jwt с кэшем проверенных payload.
+    cache_if - какие токены можно кэшировать (отзываемые refresh-токены - нельзя)
+    """
+    key = token_digest(token)
+    cached = token_payload_cache.get(key)
+    if cached is not None:
+        return dict(cached)
+
+    payload = decode_jwt(token)
+    exp = payload.get("exp")
+    if exp and (cache_if is None or cache_if(payload)):
+        token_payload_cache.set(key, dict(payload), ttl=exp - time.time())
+    return payload
+
+
 def hash_password(password: str) -> bytes:
     salt = bcrypt.gensalt()
     pwd_bytes: bytes = password.encode()
     return bcrypt.hashpw(pwd_bytes, salt)
 
 
+# Готовый bcrypt-хеш (миграция из старой системы): $2a$/$2b$/$2y$, cost, 53 символа соль+хеш
+BCRYPT_HASH_RE = re.compile(r"^\$2[aby]\$\d{2}\$[./A-Za-z0-9]{53}$")
+
+
+def is_bcrypt_hash(value: str) -> bool:
+    return BCRYPT_HASH_RE.match(value) is not None
+
+
 def validate_password(
         password: str,
         hashed_password: bytes
@@ -94,4 +164,32 @@ def verify_password(
         plain_password: str,
         hashed_password: str,
 ) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+# --- async wrappers (crypto executor) ---
+
+async def hash_password_async(password: str) -> bytes:
+    return await crypto_executor.run(hash_password, password)
+
+
+async def hash_passwords_async(
+        passwords: list[str],
+        concurrency: int | None = None,
+) -> list[bytes]:
+    # Параллельно по воркерам пула; переполненная очередь - 503, как у run
+    return await crypto_executor.map(hash_password, passwords, concurrency=concurrency)
+
+
+async def validate_password_async(
+        password: str,
+        hashed_password: bytes,
+) -> bool:
+    return await crypto_executor.run(validate_password, password, hashed_password)
+
+
+async def verify_password_async(
+        plain_password: str,
+        hashed_password: str,
+) -> bool:
+    return await crypto_executor.run(verify_password, plain_password, hashed_password)
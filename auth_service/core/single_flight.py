@@ -0,0 +1,58 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Схлопывание одинаковых одновременных запросов: пока запрос по ключу
+    в полете, остальные вызывающие ждут его результат (или его ошибку).
+    Запрос идет отдельной задачей, поэтому отмена одного из ожидающих
+    (клиент отключился) не отменяет его для остальных.
+    Рассчитан на работу внутри одного event loop.
+    """
+    def __init__(self) -> None:
+        self._flights: dict[Hashable, asyncio.Task] = {}
+
+        # metrics
+        self.calls = 0
+        self.executions = 0
+        self.collapsed = 0
+        self.errors = 0
+
+    async def do(
+            self,
+            key: Hashable,
+            fn: Callable[..., Awaitable[Any]],
+            *args: Any,
+            **kwargs: Any,
+    ) -> Any:
+        self.calls += 1
+        task = self._flights.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self._flights[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.collapsed += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        # Забираем исключение, даже если все ожидающие уже отменены
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "in_flight": len(self._flights),
+            "calls": self.calls,
+            "executions": self.executions,
+            "collapsed": self.collapsed,
+            "errors": self.errors,
+            "collapse_ratio": round(self.collapsed / self.calls, 4) if self.calls else 0.0,
+        }
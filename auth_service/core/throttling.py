@@ -0,0 +1,155 @@
+import ipaddress
+import time
+import uuid
+from typing import NamedTuple
+
+from auth_service.core.config import settings
+from auth_service.core.redis_client import RedisHelper, redis_helper
+
+# Скользящие окна на ZSET: очистка старых попыток, проверка лимитов
+# и регистрация новой попытки - атомарно, за один EVALSHA.
+# KEYS: окна (username, ip)
+# ARGV: now_ms, member, затем для каждого ключа: window_ms, max_attempts
+LOGIN_THROTTLE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local member = ARGV[2]
+local blocked = 0
+for i, key in ipairs(KEYS) do
+    local window = tonumber(ARGV[1 + i * 2])
+    local limit = tonumber(ARGV[2 + i * 2])
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+    if redis.call('ZCARD', key) >= limit then
+        blocked = 1
+    end
+end
+if blocked == 0 then
+    for i, key in ipairs(KEYS) do
+        redis.call('ZADD', key, now, member)
+        redis.call('PEXPIRE', key, tonumber(ARGV[1 + i * 2]))
+    end
+end
+return blocked
+"""
+
+
+class ThrottleAttempt(NamedTuple):
+    blocked: bool
+    username_key: str
+    ip_key: str | None
+    member: str
+
+
+class LoginThrottler:
+    """
+    Ограничение попыток входа по username и, если включено, по IP.
+    Каждая попытка учитывается сразу (check-and-increment),
+    успешный вход снимает ее со счетчиков.
+    """
+    def __init__(
+            self,
+            redis_helper: RedisHelper,
+            max_attempts: int = 5,
+            block_time_seconds: int = 300,
+            ip_window_enabled: bool = False,
+            ip_max_attempts: int = 50,
+            ip_window_seconds: int = 300,
+            trusted_proxies: list[str] | None = None,
+            key_prefix: str = "failed_attempts",
+    ) -> None:
+        self.redis_helper = redis_helper
+        self.max_attempts = max_attempts
+        self.block_time_seconds = block_time_seconds
+        self.ip_window_enabled = ip_window_enabled
+        self.ip_max_attempts = ip_max_attempts
+        self.ip_window_seconds = ip_window_seconds
+        self.trusted_proxies = [
+            ipaddress.ip_network(proxy, strict=False) for proxy in trusted_proxies or []
+        ]
+        self.key_prefix = key_prefix
+        self._script = None
+
+    @property
+    def redis(self):
+        return self.redis_helper.client
+
+    async def load(self) -> None:
+        # Предзагрузка скрипта: дальше только EVALSHA
+        self._script = self.redis.register_script(LOGIN_THROTTLE_SCRIPT)
+        await self.redis.script_load(LOGIN_THROTTLE_SCRIPT)
+
+    def _is_trusted(self, address: str) -> bool:
+        try:
+            ip = ipaddress.ip_address(address)
+        except ValueError:
+            return False
+        return any(ip in network for network in self.trusted_proxies)
+
+    def client_ip(self, peer: str | None, forwarded_for: str | None = None) -> str | None:
+        """
+        Адрес клиента для окна по IP (None - окно выключено).
+        X-Forwarded-For читается, только если соединение пришло от доверенного
+        прокси: берется самый правый адрес, не принадлежащий прокси
+        """
+        if not self.ip_window_enabled or not peer:
+            return None
+        if not forwarded_for or not self._is_trusted(peer):
+            return peer
+        hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+        for hop in reversed(hops):
+            if not self._is_trusted(hop):
+                return hop
+        return hops[0] if hops else peer
+
+    def username_key(self, username: str) -> str:
+        return f"{self.key_prefix}:user:{username}"
+
+    def ip_key(self, ip: str) -> str:
+        return f"{self.key_prefix}:ip:{ip}"
+
+    async def acquire(
+            self,
+            username: str,
+            ip: str | None = None,
+    ) -> ThrottleAttempt:
+        now_ms = int(time.time() * 1000)
+        member = f"{now_ms}:{uuid.uuid4().hex[:8]}"
+        keys = [self.username_key(username)]
+        args = [now_ms, member, self.block_time_seconds * 1000, self.max_attempts]
+        ip_key = None
+        if ip:
+            ip_key = self.ip_key(ip)
+            keys.append(ip_key)
+            args += [self.ip_window_seconds * 1000, self.ip_max_attempts]
+
+        if self._script is None:
+            await self.load()
+        blocked = await self._script(keys=keys, args=args, client=self.redis)
+        return ThrottleAttempt(
+            blocked=bool(blocked),
+            username_key=keys[0],
+            ip_key=ip_key,
+            member=member,
+        )
+
+    async def reset(self, attempt: ThrottleAttempt) -> None:
+        # Успешный вход: сбрасываем счетчик username, попытку с IP не учитываем
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.delete(attempt.username_key)
+            if attempt.ip_key:
+                pipe.zrem(attempt.ip_key, attempt.member)
+            await pipe.execute()
+
+    async def reset_username(self, username: str) -> None:
+        await self.redis.delete(self.username_key(username))
+
+
+login_throttler = LoginThrottler(
+    redis_helper=redis_helper,
+    max_attempts=settings.login_throttling.max_attempts,
+    block_time_seconds=settings.login_throttling.block_time_seconds,
+    ip_window_enabled=settings.login_throttling.ip_window_enabled,
+    ip_max_attempts=settings.login_throttling.ip_max_attempts,
+    ip_window_seconds=settings.login_throttling.ip_window_seconds,
+    trusted_proxies=settings.login_throttling.trusted_proxies,
+    key_prefix=settings.login_throttling.key_prefix,
+)
@@ -0,0 +1,72 @@
+"""
+Входящие события user_service (outbox): обработка ровно один раз по event_id
+"""
+from typing import Any
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from auth_service.core.logger import logger
+from auth_service.core.models import ProcessedEvent
+from auth_service.crud.users_crud import (
+    get_auth_user, sync_auth_user,
+    delete_auth_user_redis_data, invalidate_user_profile,
+)
+
+# Совпадает с user_service core.models.user_outbox
+USER_CHANGED = "user.changed"
+USER_DELETED = "user.deleted"
+SUPPORTED_EVENTS = (USER_CHANGED, USER_DELETED)
+
+
+async def apply_user_event(
+        session: AsyncSession,
+        event_id: str,
+        event_type: str,
+        payload: dict[str, Any],
+) -> str:
+    """
+    Отметка event_id и изменение auth_user - одной транзакцией.
+    Возвращает applied / duplicate / unsupported, ошибки - исключением (транзакция откатывается)
+    """
+    if event_type not in SUPPORTED_EVENTS:
+        return "unsupported"
+
+    stmt = (
+        insert(ProcessedEvent)
+        .values(event_id=event_id, event_type=event_type)
+        .on_conflict_do_nothing()
+        .returning(ProcessedEvent.event_id)
+    )
+    try:
+        if await session.scalar(stmt) is None:
+            await session.rollback()
+            return "duplicate"
+
+        deleted = None
+        if event_type == USER_CHANGED:
+            await sync_auth_user(
+                session=session,
+                user_id=payload["user_id"],
+                username=payload["username"],
+                email=payload["email"],
+                is_active=payload["is_active"],
+                commit=False,
+            )
+        else:
+            deleted = await get_auth_user(payload["user_id"], session)
+            if deleted is not None:
+                await session.delete(deleted)
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+
+    if deleted is not None:
+        invalidate_user_profile(deleted.user_id, deleted.username)
+        # Счетчик попыток входа истечет сам, ошибка Redis событие не откатывает
+        try:
+            await delete_auth_user_redis_data(deleted)
+        except Exception as e:
+            logger.error(f"Failed to delete redis data of user {deleted.user_id}: {e}")
+    return "applied"
@@ -0,0 +1,29 @@
+"""
+Горячие запросы: конструкция строится один раз при импорте,
+значения передаются через bindparam при выполнении.
+Скомпилированный SQL берется из кэша движка (query_cache_size),
+на соединении asyncpg он же - подготовленный statement
+(prepared_statement_cache_size).
+"""
+from sqlalchemy import bindparam, select
+
+from auth_service.core.models import AuthUser as AuthUserModel
+from auth_service.core.models import RevokedToken
+
+# params: user_id
+AUTH_USER_BY_ID = (
+    select(AuthUserModel)
+    .where(AuthUserModel.user_id == bindparam("user_id"))
+)
+
+# params: username
+AUTH_USER_BY_USERNAME = (
+    select(AuthUserModel)
+    .where(AuthUserModel.username == bindparam("username"))
+)
+
+# params: token_hash
+REVOKED_TOKEN_ID_BY_HASH = (
+    select(RevokedToken.id)
+    .where(RevokedToken.token_hash == bindparam("token_hash"))
+)
@@ -1,21 +1,63 @@
-from typing import Sequence
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Sequence
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, delete
+from redis.exceptions import RedisError
 
-from auth_service.crud.users_crud import get_user_service_user_by_id
+from auth_service.crud.users_crud import get_user_profile_by_id
+from auth_service.crud.queries import REVOKED_TOKEN_ID_BY_HASH
+from auth_service.core.config import settings
 from auth_service.core.models import AuthUser as AuthUserModel
-from auth_service.core.models import RevokedToken
-from auth_service.core.security import decode_jwt
+from auth_service.core.models import RevokedToken, db_helper
+from auth_service.core.security import (
+    decode_jwt_cached, token_digest, token_expires_at,
+    TOKEN_TYPE_FIELD, ACCESS_TOKEN_TYPE,
+)
+from auth_service.core.bloom import RevokedTokenFilter
+from auth_service.core.redis_client import redis_helper
 from auth_service.core.logger import logger
 
 
+async def _iter_revoked_tokens() -> AsyncIterator[str]:
+    async with db_helper.session_factory() as session:
+        result = await session.stream_scalars(
+            select(RevokedToken.token_hash).execution_options(yield_per=10_000)
+        )
+        async for token in result:
+            yield token
+
+
+revoked_token_filter = RevokedTokenFilter(
+    redis_helper=redis_helper,
+    backend=settings.revocation_filter.backend,
+    capacity=settings.revocation_filter.capacity,
+    error_rate=settings.revocation_filter.error_rate,
+    redis_key=settings.revocation_filter.redis_key,
+    enabled=settings.revocation_filter.enabled,
+    source=_iter_revoked_tokens,
+    rebuild_cooldown_seconds=settings.revocation_filter.rebuild_cooldown_seconds,
+    rebuild_lock_seconds=settings.revocation_filter.rebuild_lock_seconds,
+)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 # ---- tokens ----
+def is_access_token(payload: dict) -> bool:
+    # refresh-токены отзываются, поэтому в кэш payload не попадают
+    return payload.get(TOKEN_TYPE_FIELD) == ACCESS_TOKEN_TYPE
+
+
 def get_user_id_by_static_auth_token(
         token: str
 ) -> int | None:
     try:
-        payload = decode_jwt(token)
+        payload = decode_jwt_cached(token, cache_if=is_access_token)
     except Exception as e:
         raise
 
@@ -30,11 +72,10 @@ async def get_username_by_static_auth_token(token) -> str:
 
     # Запрос к user_service
     try:
-        response = await get_user_service_user_by_id(user_id=user_id)
+        data = await get_user_profile_by_id(user_id=user_id)
     except Exception as e:
         raise e
 
-    data = response.json()
     username = data.get("username")
     if not username:
         raise HTTPException(
@@ -49,12 +90,31 @@ async def update_refresh_token(
     user: AuthUserModel,
     new_token: str
 ):
+    # Объект мог быть загружен в другой, уже закрытой сессии - привязываем к этой
+    session.add(user)
+
     # Добавляем старый токен в чс если он есть
-    if user.refresh_token is not None:
-        session.add(RevokedToken(token=user.refresh_token))
+    if user.refresh_token_hash is not None:
+        # Для старых записей exp неизвестен - берем верхнюю границу
+        expires_at = user.refresh_token_expires_at or (
+            _utcnow() + timedelta(days=settings.auth_jwt.refresh_token_expires_days)
+        )
+        session.add(RevokedToken(token_hash=user.refresh_token_hash, expires_at=expires_at))
+        # До коммита: в худшем случае получим ложноположительный результат.
+        # Не удалось записать в общий фильтр - отзыв не коммитим
+        try:
+            await revoked_token_filter.add(user.refresh_token_hash)
+        except RedisError:
+            await session.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Token revocation is temporarily unavailable, try again later",
+                headers={"Retry-After": "1"},
+            )
 
-    # Сохраняем новый токен
-    user.refresh_token = new_token
+    # Сохраняем новый токен (только дайджест)
+    user.refresh_token_hash = token_digest(new_token)
+    user.refresh_token_expires_at = token_expires_at(new_token)
     try:
         await session.commit()
     except Exception as e:
@@ -67,19 +127,160 @@ async def update_refresh_token(
 
 
 async def validate_refresh_token(token: str, session: AsyncSession):
+    token_hash = token_digest(token)
+
+    # Фильтр Блума: "точно не отозван" - БД не нужна
+    if not await revoked_token_filter.might_contain(token_hash):
+        return
+
     # Проверяем, не отозван ли токен
-    stmt = select(RevokedToken).where(RevokedToken.token == token)
-    result = await session.execute(stmt)
+    result = await session.execute(REVOKED_TOKEN_ID_BY_HASH, {"token_hash": token_hash})
     if result.scalar():
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token revoked"
         )
+    revoked_token_filter.false_positives += 1
+
+
+async def rebuild_revoked_token_filter() -> None:
+    await revoked_token_filter.rebuild()
 
 
 async def print_all_revoked_tokens(
-        session: AsyncSession
+        session: AsyncSession,
+        limit: int,
+        after_id: int | None = None,
 ) -> Sequence[RevokedToken]:
-    stmt = select(RevokedToken).order_by(RevokedToken.id)
+    """
+    Keyset-пагинация по id: возвращает до limit + 1 строк
+    """
+    stmt = select(RevokedToken).order_by(RevokedToken.id).limit(limit + 1)
+    if after_id is not None:
+        stmt = stmt.where(RevokedToken.id > after_id)
     result = await session.scalars(stmt)
-    return result.all()
\ No newline at end of file
+    return result.all()
+
+
+# ---- purge ----
+async def purge_expired_revoked_tokens(
+        session: AsyncSession,
+        batch_size: int,
+) -> int:
+    """
+    Удаляет один батч истекших записей, строки под блокировкой пропускаются
+    """
+    expired_ids = (
+        select(RevokedToken.id)
+        .where(RevokedToken.expires_at < _utcnow())
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    stmt = (
+        delete(RevokedToken)
+        .where(RevokedToken.id.in_(expired_ids))
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.execute(stmt)
+    await session.commit()
+    return result.rowcount
+
+
+class RevokedTokenSweeper:
+    """
+    Фоновая задача: периодически удаляет истекшие отозванные токены
+    короткими транзакциями по batch_size строк.
+    """
+    def __init__(
+            self,
+            interval_seconds: float = 3600.0,
+            batch_size: int = 1000,
+            max_batches_per_run: int = 100,
+            batch_pause_seconds: float = 0.05,
+    ) -> None:
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.max_batches_per_run = max_batches_per_run
+        self.batch_pause_seconds = batch_pause_seconds
+        self._task: asyncio.Task | None = None
+
+        # metrics
+        self.runs = 0
+        self.deleted_total = 0
+        self.last_run_deleted = 0
+        self.last_run_batches = 0
+        self.last_run_seconds = 0.0
+        self.last_run_at: datetime | None = None
+        self.errors = 0
+        self.last_error: str | None = None
+
+    async def run_once(self) -> int:
+        started = time.perf_counter()
+        deleted = 0
+        batches = 0
+        while batches < self.max_batches_per_run:
+            async with db_helper.session_factory() as session:
+                count = await purge_expired_revoked_tokens(session, self.batch_size)
+            batches += 1
+            deleted += count
+            self.deleted_total += count
+            if count < self.batch_size:
+                break
+            await asyncio.sleep(self.batch_pause_seconds)
+
+        self.runs += 1
+        self.last_run_deleted = deleted
+        self.last_run_batches = batches
+        self.last_run_seconds = round(time.perf_counter() - started, 3)
+        self.last_run_at = _utcnow()
+        if deleted:
+            logger.info(f"Purged {deleted} expired revoked tokens in {batches} batches")
+            # Биты удаленных токенов уходят только при перестройке фильтра
+            await rebuild_revoked_token_filter()
+        return deleted
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                self.last_error = str(e)
+                logger.error(f"Revoked token purge failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "deleted_total": self.deleted_total,
+            "last_run_deleted": self.last_run_deleted,
+            "last_run_batches": self.last_run_batches,
+            "last_run_seconds": self.last_run_seconds,
+            "last_run_at": self.last_run_at,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+
+revoked_token_sweeper = RevokedTokenSweeper(
+    interval_seconds=settings.revoked_token_purge.interval_seconds,
+    batch_size=settings.revoked_token_purge.batch_size,
+    max_batches_per_run=settings.revoked_token_purge.max_batches_per_run,
+    batch_pause_seconds=settings.revoked_token_purge.batch_pause_seconds,
+)
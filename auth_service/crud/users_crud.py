@@ -4,9 +4,12 @@ read
 update
 delete
 """
+import json
+import math
 import httpx
-from typing import Sequence
-from sqlalchemy import select
+from typing import AsyncIterator, Sequence
+from sqlalchemy import select, update, Row
+from sqlalchemy.dialects.postgresql import insert
 from functools import wraps
 from typing import Callable, Coroutine, Any
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -15,14 +18,74 @@ from fastapi import HTTPException, status
 from auth_service.core.logger import logger
 from auth_service.core.config import settings
 from auth_service.core.models import AuthUser as AuthUserModel
+from auth_service.core.models import SessionScope
 from auth_service.core.schemas import AuthUser as AuthUserSchema
-from auth_service.core.redis_client import redis_client
+from auth_service.core.throttling import login_throttler
+from auth_service.core.http_client import user_service_client
+from auth_service.core.resilience import CircuitOpenError, user_service_resilience
+from auth_service.core.cache import TTLCache
+from auth_service.core.single_flight import SingleFlight
+from auth_service.crud.queries import AUTH_USER_BY_ID, AUTH_USER_BY_USERNAME
+
+# Профили из user_service: ключи ("id", user_id) и ("username", username)
+user_profile_cache = TTLCache(
+    maxsize=settings.profile_cache.maxsize,
+    ttl=settings.profile_cache.ttl_seconds,
+)
+_PROFILE_FIELDS = ("user_id", "username", "email", "is_active")
+_NOT_FOUND = object()  # негативный кэш для 404
+_MISSING = object()
+# Одновременные промахи по одному ключу кэша - один запрос к user_service
+user_profile_flights = SingleFlight()
+
+
+# Выгрузка без пароля и refresh-токена: только кортежи колонок
+AUTH_USER_EXPORT_COLUMNS = (
+    AuthUserModel.user_id,
+    AuthUserModel.username,
+    AuthUserModel.email,
+    AuthUserModel.is_active,
+    AuthUserModel.updated_at,
+)
+
+
+async def stream_auth_users_for_export(
+        session: AsyncSession,
+        batch_size: int,
+        is_active: bool | None = None,
+) -> AsyncIterator[Sequence[Row]]:
+    """
+    Серверный курсор: в памяти не больше batch_size строк
+    """
+    stmt = (
+        select(*AUTH_USER_EXPORT_COLUMNS)
+        .order_by(AuthUserModel.user_id)
+        .execution_options(yield_per=batch_size)
+    )
+    if is_active is not None:
+        stmt = stmt.where(AuthUserModel.is_active == is_active)
+    result = await session.stream(stmt)
+    try:
+        async for rows in result.partitions():
+            yield rows
+    finally:
+        await result.close()
 
 
 async def get_all_users(
-        session: AsyncSession
+        session: AsyncSession,
+        limit: int,
+        after_id: int | None = None,
+        is_active: bool | None = None,
 ) -> Sequence[AuthUserModel]:
-    stmt = select(AuthUserModel).order_by(AuthUserModel.user_id)
+    """
+    Keyset-пагинация по user_id: возвращает до limit + 1 строк
+    """
+    stmt = select(AuthUserModel).order_by(AuthUserModel.user_id).limit(limit + 1)
+    if after_id is not None:
+        stmt = stmt.where(AuthUserModel.user_id > after_id)
+    if is_active is not None:
+        stmt = stmt.where(AuthUserModel.is_active == is_active)
     result = await session.scalars(stmt)
     return result.all()
 
@@ -31,12 +94,104 @@ async def get_auth_user(
         user_id: int,
         session: AsyncSession
 ) -> AuthUserSchema:
-    stmt = select(AuthUserModel).where(AuthUserModel.user_id == user_id)
-    result = await session.execute(stmt)
+    result = await session.execute(AUTH_USER_BY_ID, {"user_id": user_id})
     auth_user = result.scalar_one_or_none()
     return auth_user
 
 
+async def get_auth_user_by_username(
+        username: str,
+        session: AsyncSession
+) -> AuthUserModel | None:
+    result = await session.execute(AUTH_USER_BY_USERNAME, {"username": username})
+    return result.scalar_one_or_none()
+
+
+async def insert_auth_users(
+        session: AsyncSession,
+        rows: Sequence[dict[str, Any]],
+) -> set[int]:
+    """
+    Пачка auth_user одним INSERT ... ON CONFLICT DO NOTHING RETURNING.
+    Возвращает user_id вставленных строк
+    """
+    if not rows:
+        return set()
+    table = AuthUserModel.__table__
+    stmt = (
+        insert(table)
+        .values(list(rows))
+        .on_conflict_do_nothing()
+        .returning(table.c.user_id)
+    )
+    try:
+        result = await session.execute(stmt)
+        inserted = set(result.scalars().all())
+        await session.commit()
+    except Exception as e:
+        await session.rollback()
+        logger.error(f"Bulk insert of auth users failed: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to create auth users"
+        )
+    return inserted
+
+
+def apply_user_profile(auth_user: AuthUserModel, profile: dict) -> None:
+    auth_user.username = profile.get("username")
+    auth_user.email = profile.get("email")
+    auth_user.is_active = bool(profile.get("is_active"))
+
+
+async def sync_auth_user(
+        session: AsyncSession,
+        user_id: int,
+        username: str,
+        email: str,
+        is_active: bool,
+        commit: bool = True,
+) -> bool:
+    """
+    commit=False - изменения остаются в транзакции вызывающего (inbox событий)
+    """
+    auth_user = await get_auth_user(user_id, session)
+    invalidate_user_profile(user_id, username)
+    if auth_user is None:
+        return False
+
+    if auth_user.username != username:
+        # Старое имя не должно больше находить этого пользователя в кэше
+        if auth_user.username is not None:
+            user_profile_cache.pop(("username", auth_user.username))
+        # username мог перейти от другого пользователя - освобождаем его
+        result = await session.execute(
+            update(AuthUserModel)
+            .where(AuthUserModel.username == username, AuthUserModel.user_id != user_id)
+            .values(username=None)
+            .returning(AuthUserModel.user_id)
+        )
+        for previous_owner in result.scalars():
+            invalidate_user_profile(previous_owner)
+    apply_user_profile(auth_user, {
+        "username": username,
+        "email": email,
+        "is_active": is_active,
+    })
+    if not commit:
+        return True
+    try:
+        await session.commit()
+    except Exception as e:
+        await session.rollback()
+        logger.error(f"Failed to sync auth user {user_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to sync user"
+        )
+    return True
+
+
 # --- with request to user_service ---
 
 def handle_user_service_errors(
@@ -71,6 +226,14 @@ def handle_user_service_errors(
                         detail=f"{detail_prefix}External service error"
                     )
 
+            except CircuitOpenError as e:
+                # Не ждем таймаута: user_service недавно не отвечал
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail=f"{detail_prefix}Service unavailable",
+                    headers={"Retry-After": str(max(math.ceil(e.retry_after), 1))},
+                )
+
             except httpx.RequestError as e:
                 logger.error(f"Connection error: {str(e)}")
                 raise HTTPException(
@@ -91,63 +254,326 @@ def handle_user_service_errors(
 
 
 @handle_user_service_errors(detail_prefix="By ID: ")
-async def get_user_service_user_by_id(user_id: int):
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        response = await client.get(
-            f"{settings.user_service_url}/api/v1/users/{user_id}/"
-        )
-        response.raise_for_status()
+async def get_user_service_user_by_id(
+        user_id: int,
+        client: httpx.AsyncClient | None = None,
+):
+    client = client or user_service_client.client
+    response = await user_service_resilience.request(
+        client, "GET", f"/api/v1/users/{user_id}/",
+        endpoint="GET /users/{user_id}", idempotent=True,
+    )
+    response.raise_for_status()
 
     return response
 
 
 @handle_user_service_errors(detail_prefix="By username: ")
-async def get_user_service_user_by_username(username: str):
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        response = await client.get(
-            f"{settings.user_service_url}/api/v1/users/username/{username}/"
-        )
-        response.raise_for_status()
+async def get_user_service_user_by_username(
+        username: str,
+        client: httpx.AsyncClient | None = None,
+):
+    client = client or user_service_client.client
+    response = await user_service_resilience.request(
+        client, "GET", f"/api/v1/users/username/{username}/",
+        endpoint="GET /users/username/{username}", idempotent=True,
+    )
+    response.raise_for_status()
 
     return response
 
 
 @handle_user_service_errors(detail_prefix="User creation: ", success_status=201)
-async def create_user_service_user(username, email):
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        response = await client.post(
-            f"{settings.user_service_url}/api/v1/users/create_user/",
-            json={
-                "username": username,
-                "email": email,
-            }
-        )
-        response.raise_for_status()
+async def create_user_service_user(
+        username,
+        email,
+        client: httpx.AsyncClient | None = None,
+):
+    client = client or user_service_client.client
+    response = await user_service_resilience.request(
+        client, "POST", "/api/v1/users/create_user/",
+        endpoint="POST /users/create_user",
+        json={
+            "username": username,
+            "email": email,
+        }
+    )
+    response.raise_for_status()
+
+    # Сбрасываем негативный кэш по username
+    user_profile_cache.pop(("username", username))
+    return response
+
+
+@handle_user_service_errors(detail_prefix="User import: ")
+async def import_user_service_users(
+        users: Sequence[dict[str, str]],
+        client: httpx.AsyncClient | None = None,
+):
+    """
+    Пачка профилей одним запросом к /users/import (NDJSON, строка i -> users[i - 1])
+    """
+    client = client or user_service_client.client
+    body = "".join(
+        json.dumps({"username": user["username"], "email": user["email"]}) + "\n"
+        for user in users
+    )
+    response = await user_service_resilience.request(
+        client, "POST", "/api/v1/users/import",
+        endpoint="POST /users/import",
+        params={"format": "ndjson"},
+        content=body.encode(),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    response.raise_for_status()
+
+    for user in users:
+        user_profile_cache.pop(("username", user["username"]))
+    return response
+
+
+@handle_user_service_errors(detail_prefix="User deletion: ")
+async def delete_user_service_user(
+        user_id: int,
+        client: httpx.AsyncClient | None = None,
+):
+    """
+    Профиль удаляется вместе с событием user.deleted для auth_service (outbox).
+    Не idempotent: без ретраев и с обычным таймаутом, повтор после
+    удачного, но не дошедшего ответа вернул бы 404
+    """
+    client = client or user_service_client.client
+    response = await user_service_resilience.request(
+        client, "DELETE", f"/api/v1/users/{user_id}/",
+        endpoint="DELETE /users/{user_id}",
+    )
+    response.raise_for_status()
+
+    invalidate_user_profile(user_id)
+    return response
+
+
+@handle_user_service_errors(detail_prefix="Batch: ")
+async def get_user_service_users_batch(
+        ids: Sequence[int] = (),
+        usernames: Sequence[str] = (),
+        client: httpx.AsyncClient | None = None,
+):
+    client = client or user_service_client.client
+    # POST, но только чтение - ретраи безопасны
+    response = await user_service_resilience.request(
+        client, "POST", "/api/v1/users/batch",
+        endpoint="POST /users/batch", idempotent=True,
+        json={
+            "ids": list(ids),
+            "usernames": list(usernames),
+        }
+    )
+    response.raise_for_status()
 
     return response
 
 # ------------------------------------
 
 
-async def delete_auth_user_redis_data(user) -> None:
-    user_id = user.user_id
+# --- cached user_service profiles ---
+
+def cache_user_profile(data: dict) -> dict:
+    profile = {field: data.get(field) for field in _PROFILE_FIELDS}
+    user_profile_cache.set(("id", profile["user_id"]), profile)
+    user_profile_cache.set(("username", profile["username"]), profile)
+    return profile
+
+
+def invalidate_user_profile(
+        user_id: int,
+        username: str | None = None,
+) -> None:
+    cached = user_profile_cache.peek(("id", user_id))
+    if isinstance(cached, dict):
+        user_profile_cache.pop(("username", cached.get("username")))
+    if username is not None:
+        user_profile_cache.pop(("username", username))
+    user_profile_cache.pop(("id", user_id))
+
+
+async def _get_cached_profile(key: tuple, fetcher, *args, **kwargs) -> dict:
+    cached = user_profile_cache.get(key, _MISSING)
+    if cached is _NOT_FOUND:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"By {key[0]}: Not found"
+        )
+    if cached is not _MISSING:
+        return cached
+
+    return await user_profile_flights.do(key, _fetch_profile, key, fetcher, *args, **kwargs)
+
+
+async def _fetch_profile(key: tuple, fetcher, *args, **kwargs) -> dict:
     try:
-        response = await get_user_service_user_by_id(user_id)
-    except Exception as e:
-        raise e
-    user_data = response.json()
-    username = user_data.get("username")
+        response = await fetcher(*args, **kwargs)
+    except HTTPException as e:
+        if e.status_code == status.HTTP_404_NOT_FOUND:
+            user_profile_cache.set(
+                key, _NOT_FOUND, ttl=settings.profile_cache.negative_ttl_seconds
+            )
+        raise
+
+    return cache_user_profile(response.json())
+
+
+async def get_user_profile_by_id(
+        user_id: int,
+        client: httpx.AsyncClient | None = None,
+) -> dict:
+    return await _get_cached_profile(
+        ("id", user_id), get_user_service_user_by_id, user_id, client=client
+    )
+
+
+async def get_user_profile_by_username(
+        username: str,
+        client: httpx.AsyncClient | None = None,
+) -> dict:
+    return await _get_cached_profile(
+        ("username", username), get_user_service_user_by_username, username, client=client
+    )
+
+
+async def get_user_profiles_batch(
+        ids: Sequence[int] = (),
+        usernames: Sequence[str] = (),
+        client: httpx.AsyncClient | None = None,
+) -> tuple[dict[int, dict], dict[str, dict]]:
+    """
+    Профили пачкой: из кэша, а промахи - одним POST /users/batch на каждые
+    settings.user_service_batch.max_items ключей. Отсутствующие ключи в ответ не попадают.
+    """
+    by_id: dict[int, dict] = {}
+    by_username: dict[str, dict] = {}
+    missing: list[tuple[str, Any]] = []
+
+    for user_id in dict.fromkeys(ids):
+        cached = user_profile_cache.get(("id", user_id), _MISSING)
+        if cached is _MISSING:
+            missing.append(("id", user_id))
+        elif cached is not _NOT_FOUND:
+            by_id[user_id] = cached
+    for username in dict.fromkeys(usernames):
+        cached = user_profile_cache.get(("username", username), _MISSING)
+        if cached is _MISSING:
+            missing.append(("username", username))
+        elif cached is not _NOT_FOUND:
+            by_username[username] = cached
+
+    max_items = settings.user_service_batch.max_items
+    for start in range(0, len(missing), max_items):
+        chunk = missing[start:start + max_items]
+        response = await get_user_service_users_batch(
+            ids=[key for kind, key in chunk if kind == "id"],
+            usernames=[key for kind, key in chunk if kind == "username"],
+            client=client,
+        )
+        data = response.json()
+        for user_id, user_data in data.get("by_id", {}).items():
+            by_id[int(user_id)] = cache_user_profile(user_data)
+        for username, user_data in data.get("by_username", {}).items():
+            by_username[username] = cache_user_profile(user_data)
+        for user_id in data.get("missing_ids", []):
+            user_profile_cache.set(
+                ("id", user_id), _NOT_FOUND, ttl=settings.profile_cache.negative_ttl_seconds
+            )
+        for username in data.get("missing_usernames", []):
+            user_profile_cache.set(
+                ("username", username), _NOT_FOUND, ttl=settings.profile_cache.negative_ttl_seconds
+            )
+
+    return by_id, by_username
+
+
+async def fill_unsynced_users(
+        session: AsyncSession,
+        users: Sequence[AuthUserModel],
+        client: httpx.AsyncClient | None = None,
+) -> None:
+    """
+    Строкам без username (до синхронизации) - username и email из user_service,
+    одним запросом на всю страницу. Объекты отсоединяются от сессии, в БД ничего не пишется.
+    Если user_service недоступен, строки остаются как есть
+    """
+    unsynced = [user for user in users if user.username is None]
+    if not unsynced:
+        return
+    try:
+        by_id, _ = await get_user_profiles_batch(
+            ids=[user.user_id for user in unsynced], client=client
+        )
+    except HTTPException as e:
+        logger.warning(f"Failed to fill {len(unsynced)} unsynced users: {e.detail}")
+        return
+    for user in unsynced:
+        profile = by_id.get(user.user_id)
+        if profile is None:
+            continue
+        session.expunge(user)
+        user.username = profile["username"]
+        user.email = profile["email"]
+
+# ------------------------------------
+
+
+async def get_login_auth_user(
+        username: str,
+        session_scope: SessionScope,
+        client: httpx.AsyncClient | None = None,
+) -> AuthUserModel | None:
+    """
+    Пользователь для входа - одним запросом по локальному индексу.
+    Записи без username (до синхронизации) дописываются из user_service.
+    Соединение не удерживается во время запроса к user_service.
+    """
+    async with session_scope() as session:
+        auth_user = await get_auth_user_by_username(username, session)
+    if auth_user is not None:
+        return auth_user
+
+    # Мимо кэша: is_active из профиля попадает в auth_user и решает, пускать ли
+    response = await get_user_service_user_by_username(username, client=client)
+    profile = cache_user_profile(response.json())
+
+    async with session_scope() as session:
+        auth_user = await get_auth_user(profile["user_id"], session)
+        if auth_user is not None:
+            apply_user_profile(auth_user, profile)
+            try:
+                await session.commit()
+            except Exception as e:
+                # Индекс допишет синхронизация из user_service, вход не ломаем
+                await session.rollback()
+                logger.error(f"Failed to backfill auth user {profile['user_id']}: {e}")
+                auth_user = await get_auth_user(profile["user_id"], session)
+    return auth_user
+
+
+async def delete_auth_user_redis_data(user) -> None:
+    username = user.username
+    if not username:
+        try:
+            user_data = await get_user_profile_by_id(user.user_id)
+        except Exception as e:
+            raise e
+        username = user_data.get("username")
 
     # Удаляем счетчик неудачных попыток
-    await redis_client.delete(f"failed_attempts:{username}")
+    await login_throttler.reset_username(username)
 
 
 async def delete_auth_user(
         user_id: int,
         session: AsyncSession
 ):
-    stmt = select(AuthUserModel).where(AuthUserModel.user_id == user_id)
-    result = await session.execute(stmt)
+    result = await session.execute(AUTH_USER_BY_ID, {"user_id": user_id})
     auth_user = result.scalar_one_or_none()
 
     # Удаляем redis
@@ -164,3 +590,4 @@ async def delete_auth_user(
         await session.rollback()
         print(f"Failed to delete user: {str(e)}")
 
+    invalidate_user_profile(user_id, auth_user.username)
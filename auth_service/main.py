@@ -9,7 +9,19 @@ from starlette.middleware.cors import CORSMiddleware
 from core.config import settings
 from core.models import Base
 from auth_service.api import router as auth_router
-from core.models.db_helper import db_helper
+from auth_service.api.well_known import router as well_known_router
+# Тот же экземпляр, что и в роутерах (абсолютный импорт): реплики, read-your-writes
+from auth_service.core.models.db_helper import db_helper
+from auth_service.core.models.replicas import ReadYourWritesMiddleware
+from auth_service.core.http_client import user_service_client
+from auth_service.core.crypto_executor import crypto_executor
+from auth_service.core.redis_client import redis_helper
+from auth_service.core.throttling import login_throttler
+from auth_service.crud.tokens_crud import (
+    rebuild_revoked_token_filter,
+    revoked_token_filter,
+    revoked_token_sweeper,
+)
 
 
 @asynccontextmanager
@@ -21,9 +33,23 @@ async def lifespan(auth_app: FastAPI):
 
     async with db_helper.engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    db_helper.start()
+
+    await user_service_client.start()
+    await redis_helper.start()
+    crypto_executor.start()
+    await login_throttler.load()
+    await rebuild_revoked_token_filter()
+    if settings.revoked_token_purge.enabled:
+        revoked_token_sweeper.start()
 
     yield
     # shutdown
+    await revoked_token_sweeper.stop()
+    await revoked_token_filter.stop()
+    crypto_executor.shutdown()
+    await redis_helper.dispose()
+    await user_service_client.dispose()
     await db_helper.dispose()
 
 
@@ -46,7 +72,13 @@ auth_app.add_middleware(
     allow_headers=["*"],
 )
 
+auth_app.add_middleware(
+    ReadYourWritesMiddleware,
+    window_seconds=settings.db.read_your_writes_seconds,
+)
+
 auth_app.include_router(router=auth_router)
+auth_app.include_router(router=well_known_router)
 
 
 @auth_app.get("/")
@@ -0,0 +1,24 @@
+import os
+from pathlib import Path
+
+ENV_PREFIX = "AUTH_SERVICE__"
+
+
+def load_env_template() -> None:
+    # Settings читает .env-template из текущей папки, а тесты запускаются из корня репозитория.
+    # Часть ключей в шаблоне записана без префикса - Settings видит только с ним
+    path = Path(__file__).resolve().parent.parent / ".env-template"
+    for line in path.read_text().splitlines():
+        line = line.strip()
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        key, value = line.split("=", 1)
+        if not key.startswith(ENV_PREFIX):
+            key = ENV_PREFIX + key
+        os.environ.setdefault(key, value)
+
+
+
+load_env_template()
+# В шаблоне секрета нет - для тестов любой достаточной длины
+os.environ.setdefault("AUTH_SERVICE__INTERNAL_API_TOKEN", "test-internal-token-" + "x" * 32)
@@ -0,0 +1,280 @@
+import asyncio
+import unittest
+
+import httpx
+
+from auth_service.core.resilience import (
+    CLOSED, OPEN, HALF_OPEN,
+    CircuitBreaker, CircuitOpenError, ResilientCaller,
+)
+
+ENDPOINT = "GET /users/{user_id}"
+
+
+def expire(breaker: CircuitBreaker) -> None:
+    # Сдвигаем момент открытия вместо ожидания open_seconds
+    breaker.opened_at -= breaker.open_seconds
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.breaker = CircuitBreaker(failure_threshold=3, open_seconds=10.0, half_open_max_calls=1)
+
+    def open_breaker(self) -> None:
+        for _ in range(self.breaker.failure_threshold):
+            self.breaker.record_failure()
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CLOSED)
+
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertFalse(self.breaker.allow())
+        self.assertEqual(self.breaker.opened, 1)
+        self.assertEqual(self.breaker.short_circuited, 1)
+
+    def test_half_open_success_closes(self):
+        self.open_breaker()
+        expire(self.breaker)
+
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        # Пробный слот один
+        self.assertFalse(self.breaker.allow())
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertTrue(self.breaker.allow())
+
+    def test_half_open_failure_reopens(self):
+        self.open_breaker()
+        expire(self.breaker)
+
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertEqual(self.breaker.opened, 2)
+        self.assertFalse(self.breaker.allow())
+
+    def test_release_frees_probe_slot(self):
+        self.open_breaker()
+        expire(self.breaker)
+
+        self.assertTrue(self.breaker.allow())
+        self.breaker.release()
+
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.assertTrue(self.breaker.allow())
+
+
+class ResilientCallerTest(unittest.IsolatedAsyncioTestCase):
+    def make_caller(self, **kwargs) -> ResilientCaller:
+        options = {
+            "name": "test",
+            "failure_threshold": 3,
+            "retry_attempts": 2,
+            "retry_backoff_base": 0.0,
+        }
+        options.update(kwargs)
+        return ResilientCaller(**options)
+
+    def make_client(self, handler) -> httpx.AsyncClient:
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://user-service")
+        self.addAsyncCleanup(client.aclose)
+        return client
+
+    async def get(self, caller: ResilientCaller, client: httpx.AsyncClient, idempotent: bool = True):
+        return await caller.request(client, "GET", "/users/1", endpoint=ENDPOINT, idempotent=idempotent)
+
+    async def test_idempotent_request_is_retried(self):
+        statuses = iter([503, 200])
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request)
+            return httpx.Response(next(statuses))
+
+        caller = self.make_caller()
+        response = await self.get(caller, self.make_client(handler))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(caller.endpoints[ENDPOINT].retries, 1)
+
+    async def test_non_idempotent_request_is_not_retried(self):
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request)
+            return httpx.Response(503)
+
+        caller = self.make_caller()
+        response = await self.get(caller, self.make_client(handler), idempotent=False)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(len(calls), 1)
+
+    async def test_client_error_is_not_a_failure(self):
+        caller = self.make_caller()
+        response = await self.get(caller, self.make_client(lambda request: httpx.Response(404)))
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(caller.endpoints[ENDPOINT].failures, 0)
+
+    async def test_open_circuit_short_circuits(self):
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request)
+            raise httpx.ConnectError("refused", request=request)
+
+        caller = self.make_caller(failure_threshold=2, retry_attempts=0)
+        client = self.make_client(handler)
+        for _ in range(2):
+            with self.assertRaises(httpx.ConnectError):
+                await self.get(caller, client)
+
+        with self.assertRaises(CircuitOpenError):
+            await self.get(caller, client)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(caller.endpoints[ENDPOINT].breaker.state, OPEN)
+
+    async def test_half_open_probe_closes_or_reopens(self):
+        statuses = iter([503, 200])
+        caller = self.make_caller(failure_threshold=1, retry_attempts=0)
+        client = self.make_client(lambda request: httpx.Response(next(statuses, 503)))
+        breaker = caller._endpoint(ENDPOINT).breaker
+        breaker.record_failure()
+
+        expire(breaker)
+        response = await self.get(caller, client)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(breaker.state, OPEN)
+
+        expire(breaker)
+        response = await self.get(caller, client)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(breaker.state, CLOSED)
+
+    async def test_cancelled_probe_releases_slot(self):
+        entered = asyncio.Event()
+
+        async def hanging(request: httpx.Request) -> httpx.Response:
+            entered.set()
+            await asyncio.sleep(10)
+            return httpx.Response(200)
+
+        caller = self.make_caller(failure_threshold=1, retry_attempts=0)
+        breaker = caller._endpoint(ENDPOINT).breaker
+        breaker.record_failure()
+        expire(breaker)
+
+        task = asyncio.create_task(self.get(caller, self.make_client(hanging)))
+        await entered.wait()
+        self.assertEqual(breaker.half_open_calls, 1)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertEqual(breaker.half_open_calls, 0)
+        response = await self.get(caller, self.make_client(lambda request: httpx.Response(200)))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(breaker.state, CLOSED)
+
+    async def test_retry_denied_when_budget_is_empty(self):
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request)
+            return httpx.Response(503)
+
+        caller = self.make_caller(retry_budget_ratio=0.0, retry_budget_min_per_second=0.0)
+        caller.budget.tokens = 0.0
+        response = await self.get(caller, self.make_client(handler))
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(caller.endpoints[ENDPOINT].retries_denied, 1)
+        self.assertEqual(caller.endpoints[ENDPOINT].retries, 0)
+
+
+class HedgingTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.caller = ResilientCaller(
+            name="test",
+            retry_attempts=0,
+            hedging=True,
+            hedge_min_samples=1,
+            hedge_min_delay=0.01,
+        )
+        # p95 = 20 мс: второй запрос уходит, если первый медленнее
+        self.caller._endpoint(ENDPOINT).latency.observe(0.02)
+        self.cancelled: list[int] = []
+
+    def make_client(self, delays: list[float]) -> httpx.AsyncClient:
+        calls = 0
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal calls
+            number = calls
+            calls += 1
+            try:
+                await asyncio.sleep(delays[number])
+            except asyncio.CancelledError:
+                self.cancelled.append(number)
+                raise
+            return httpx.Response(200, json={"attempt": number})
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://user-service")
+        self.addAsyncCleanup(client.aclose)
+        return client
+
+    async def get(self, client: httpx.AsyncClient) -> httpx.Response:
+        response = await self.caller.request(client, "GET", "/users/1", endpoint=ENDPOINT, idempotent=True)
+        # Дать отмененной задаче завершиться
+        await asyncio.sleep(0.01)
+        return response
+
+    async def test_hedge_wins_and_slow_request_is_cancelled(self):
+        response = await self.get(self.make_client([5.0, 0.0]))
+
+        state = self.caller.endpoints[ENDPOINT]
+        self.assertEqual(response.json(), {"attempt": 1})
+        self.assertEqual(state.hedges, 1)
+        self.assertEqual(state.hedge_wins, 1)
+        self.assertEqual(self.cancelled, [0])
+
+    async def test_first_request_wins_and_hedge_is_cancelled(self):
+        response = await self.get(self.make_client([0.05, 5.0]))
+
+        state = self.caller.endpoints[ENDPOINT]
+        self.assertEqual(response.json(), {"attempt": 0})
+        self.assertEqual(state.hedges, 1)
+        self.assertEqual(state.hedge_wins, 0)
+        self.assertEqual(self.cancelled, [1])
+
+    async def test_no_hedge_without_budget(self):
+        self.caller.budget.tokens = 0.0
+        self.caller.budget.min_per_second = 0.0
+
+        response = await self.get(self.make_client([0.05]))
+
+        self.assertEqual(response.json(), {"attempt": 0})
+        self.assertEqual(self.caller.endpoints[ENDPOINT].hedges, 0)
+
+    async def test_fast_request_is_not_hedged(self):
+        response = await self.get(self.make_client([0.0]))
+
+        self.assertEqual(response.json(), {"attempt": 0})
+        self.assertEqual(self.caller.endpoints[ENDPOINT].hedges, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
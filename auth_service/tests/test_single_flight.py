@@ -0,0 +1,101 @@
+import asyncio
+import unittest
+
+from auth_service.core.single_flight import SingleFlight
+
+
+class SingleFlightTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.flights = SingleFlight()
+        self.release = asyncio.Event()
+        self.executions = 0
+
+    async def fetch(self, value):
+        self.executions += 1
+        await self.release.wait()
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    async def start_waiters(self, count: int, key="key", value="result") -> list[asyncio.Task]:
+        tasks = [asyncio.create_task(self.flights.do(key, self.fetch, value)) for _ in range(count)]
+        # Все ожидающие дошли до общей задачи
+        await asyncio.sleep(0)
+        return tasks
+
+    async def test_concurrent_callers_share_one_execution(self):
+        tasks = await self.start_waiters(10)
+        self.release.set()
+
+        results = await asyncio.gather(*tasks)
+
+        self.assertEqual(results, ["result"] * 10)
+        self.assertEqual(self.executions, 1)
+        self.assertEqual(self.flights.stats()["collapsed"], 9)
+
+    async def test_exception_reaches_every_waiter(self):
+        error = ValueError("user_service is down")
+        tasks = await self.start_waiters(3, value=error)
+        self.release.set()
+
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        self.assertEqual(results, [error] * 3)
+        self.assertEqual(self.executions, 1)
+        self.assertEqual(self.flights.errors, 1)
+
+    async def test_cancelled_waiter_does_not_cancel_flight(self):
+        tasks = await self.start_waiters(2)
+        tasks[0].cancel()
+        await asyncio.sleep(0)
+        self.release.set()
+
+        with self.assertRaises(asyncio.CancelledError):
+            await tasks[0]
+        self.assertEqual(await tasks[1], "result")
+        self.assertEqual(self.executions, 1)
+
+    async def test_flight_survives_all_waiters_cancelled(self):
+        tasks = await self.start_waiters(2)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.assertEqual(len(self.flights), 1)
+
+        self.release.set()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        self.assertEqual(len(self.flights), 0)
+        self.assertEqual(self.executions, 1)
+
+    async def test_key_is_removed_after_completion(self):
+        tasks = await self.start_waiters(2)
+        self.assertEqual(len(self.flights), 1)
+        self.release.set()
+        await asyncio.gather(*tasks)
+
+        self.assertEqual(len(self.flights), 0)
+        # Следующий вызов - новый запрос, а не старый результат
+        self.assertEqual(await self.flights.do("key", self.fetch, "fresh"), "fresh")
+        self.assertEqual(self.executions, 2)
+
+    async def test_key_is_removed_after_failure(self):
+        self.release.set()
+        with self.assertRaises(ValueError):
+            await self.flights.do("key", self.fetch, ValueError("boom"))
+
+        self.assertEqual(len(self.flights), 0)
+        self.assertEqual(await self.flights.do("key", self.fetch, "retry"), "retry")
+
+    async def test_different_keys_run_separately(self):
+        first = await self.start_waiters(1, key="a", value=1)
+        second = await self.start_waiters(1, key="b", value=2)
+        self.release.set()
+
+        self.assertEqual(await asyncio.gather(*first, *second), [1, 2])
+        self.assertEqual(self.executions, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
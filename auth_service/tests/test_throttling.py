@@ -0,0 +1,40 @@
+import unittest
+
+from auth_service.core.redis_client import redis_helper
+from auth_service.core.throttling import LoginThrottler
+
+PROXY = "10.0.0.5"
+
+
+class ClientIpTest(unittest.TestCase):
+    def make_throttler(self, **kwargs) -> LoginThrottler:
+        options = {"ip_window_enabled": True, "trusted_proxies": ["10.0.0.0/24"]}
+        options.update(kwargs)
+        return LoginThrottler(redis_helper=redis_helper, **options)
+
+    def test_ip_window_is_disabled_by_default(self):
+        throttler = LoginThrottler(redis_helper=redis_helper)
+
+        self.assertIsNone(throttler.client_ip(PROXY, "203.0.113.7"))
+
+    def test_forwarded_for_from_trusted_proxy(self):
+        throttler = self.make_throttler()
+
+        self.assertEqual(throttler.client_ip(PROXY, "203.0.113.7"), "203.0.113.7")
+        # Левые адреса подставляет сам клиент - берется правый недоверенный
+        self.assertEqual(throttler.client_ip(PROXY, "1.2.3.4, 203.0.113.7, 10.0.0.6"), "203.0.113.7")
+
+    def test_forwarded_for_from_untrusted_peer_is_ignored(self):
+        throttler = self.make_throttler()
+
+        self.assertEqual(throttler.client_ip("198.51.100.1", "203.0.113.7"), "198.51.100.1")
+
+    def test_peer_without_forwarded_for(self):
+        throttler = self.make_throttler()
+
+        self.assertEqual(throttler.client_ip(PROXY, None), PROXY)
+        self.assertIsNone(throttler.client_ip(None, "203.0.113.7"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+"""add user_outbox
+
+Revision ID: e811c5cfcf51
+Revises: 084b9fe3a95a
+Create Date: 2026-10-18 14:20:07.318245
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e811c5cfcf51"
+down_revision: Union[str, None] = "084b9fe3a95a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # События для auth_service (core.outbox): строки удаляются после доставки
+    op.create_table(
+        "user_outbox",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("event_id", sa.String(length=36), nullable=False),
+        sa.Column("event_type", sa.String(length=32), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP(), server_default=sa.text("now()"), nullable=False),
+        sa.Column("available_at", sa.TIMESTAMP(), server_default=sa.text("now()"), nullable=False),
+        sa.Column("attempts", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("failed_at", sa.TIMESTAMP(), nullable=True),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_user_outbox")),
+        sa.UniqueConstraint("event_id", name=op.f("uq_user_outbox_event_id")),
+    )
+    op.create_index(
+        "ix_user_outbox_pending",
+        "user_outbox",
+        ["available_at"],
+        unique=False,
+        postgresql_where=sa.text("failed_at IS NULL"),
+    )
+    op.create_index(
+        "ix_user_outbox_user_id_id",
+        "user_outbox",
+        ["user_id", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_outbox_user_id_id", table_name="user_outbox")
+    op.drop_index(
+        "ix_user_outbox_pending",
+        table_name="user_outbox",
+        postgresql_where=sa.text("failed_at IS NULL"),
+    )
+    op.drop_table("user_outbox")
@@ -5,11 +5,12 @@ from fastapi import (
     Depends,
 )
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.exc import SQLAlchemyError
 
 from user_service.crud import crud
 from user_service.core.schemas.user import UserSchema, UserUpdateSchema
 from user_service.core.models import db_helper
+from user_service.core.mailer import email_worker
+from user_service.core.outbox import outbox_dispatcher
 from .utils.fake_db import fake_users_db
 
 
@@ -50,21 +51,21 @@ async def test_delete_user_service_user(
     """
     Удаляет пользователя только на этой стороне!
     """
-    user = await crud.get_user(session=session, user_id=user_id)
+    user = await crud.delete_user(session=session, user_id=user_id, publish=False)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    # Пользователь найден
-    await crud.delete_user(user.user_id, session)
+    return user
 
-    try:
-        await session.delete(user)
-        await session.commit()
-    except SQLAlchemyError as e:
-        await session.rollback()
-        print(f"Database error: {e}")
-        raise HTTPException(
-            status_code=500,
-            detail="Internal server error")
 
-    return user
+@router.get("/stats/")
+async def get_stats():
+    """
+    Метрики БД (кэш скомпилированных statement-ов, реплики), очереди писем и outbox
+    """
+    return {
+        "email_worker": email_worker.stats(),
+        "outbox": outbox_dispatcher.stats(),
+        "db_statement_cache": db_helper.statement_cache_stats(),
+        "db_replicas": db_helper.replica_stats(),
+    }
@@ -1,30 +1,43 @@
-from typing import Annotated
+from typing import Annotated, Literal
 from datetime import datetime
 
-import httpx
 from fastapi import (
     APIRouter,
-    status,
     HTTPException,
     Depends,
     BackgroundTasks,
     Body,
+    Query,
+    Request,
 )
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.future import select
 
 from user_service.api.api_v1.utils.send_welcome_email import send_welcome_email
-from user_service.core.models import db_helper, User
+from user_service.api.api_v1.utils.user_import import import_users
+from user_service.core.models import db_helper
+from user_service.core.outbox import outbox_dispatcher
 from user_service.core.config import settings
-from user_service.core.schemas.user import CreateUser, ReadUser, UserSchema, UserUpdateSchema
+from user_service.core.serialization import FastJSONResponse, RowSerializer
+from user_service.core.schemas.user import (
+    CreateUser, ReadUser, UserSchema, UserUpdateSchema,
+    UserBatchRequest, UserBatchResponse, UsersPage, UserImportResponse,
+)
+from user_service.utils import (
+    decode_cursor, paginate, EXPORT_MEDIA_TYPES, stream_export,
+)
 from user_service.crud import crud
 from .utils.fake_db import fake_users_db
 
 router = APIRouter(
     prefix="/users", tags=["Users"],
+    default_response_class=FastJSONResponse,
 )
 
+# Строки из БД уже валидны: отдаем их без повторной валидации response_model
+read_user_serializer = RowSerializer(ReadUser)
+user_serializer = RowSerializer(UserSchema)
+
 
 @router.post("/create_user/", response_model=ReadUser)
 async def create_user(
@@ -33,36 +46,143 @@ async def create_user(
             Depends(db_helper.session_getter),
         ],
         user_create: CreateUser,
-        # background_tasks: BackgroundTasks,
+        background_tasks: BackgroundTasks,
 
 ):
-    exiting_user = await crud.get_user_by_email(
-        session,
-        user_create.email
+    # Конфликт по username/email -> 409 (crud.create_user)
+    user = await crud.create_user(
+        session=session,
+        user_create=user_create,
     )
-    if exiting_user:
+    background_tasks.add_task(send_welcome_email, email=user.email, username=user.username)
+    # Событие для auth_service закоммичено вместе с пользователем
+    outbox_dispatcher.notify()
+    return user
+
+
+@router.get("/get_users/", response_model=UsersPage)
+async def get_users(
+        session: Annotated[
+            AsyncSession,
+            Depends(db_helper.read_session_getter),
+        ],
+        limit: Annotated[
+            int,
+            Query(ge=1, le=settings.pagination.max_limit)
+        ] = settings.pagination.default_limit,
+        cursor: str | None = None,
+        is_active: bool | None = None,
+):
+    rows = await crud.get_all_users(
+        session=session,
+        limit=limit,
+        after_id=decode_cursor(cursor),
+        is_active=is_active,
+    )
+    users, next_cursor = paginate(rows, limit, key=lambda user: user.user_id)
+    return read_user_serializer.page_response(users, next_cursor)
+
+
+@router.post("/batch", response_model=UserBatchResponse)
+async def get_users_batch(
+        data: UserBatchRequest,
+        session: Annotated[
+            AsyncSession,
+            Depends(db_helper.read_session_getter),
+        ],
+):
+    """
+    Пачка профилей по ids и/или usernames одним запросом к БД
+    """
+    ids = list(dict.fromkeys(data.ids))
+    usernames = list(dict.fromkeys(data.usernames))
+    if len(ids) + len(usernames) > settings.batch.max_items:
         raise HTTPException(
-            status_code=409, detail="User with such email already exists"
+            status_code=400,
+            detail=f"Too many keys, max {settings.batch.max_items}"
         )
 
-    else:
-        user = await crud.create_user(
-            session=session,
-            user_create=user_create,
-        )
-        # background_tasks.add_task(send_welcome_email, user_id=user.id)
-        return user
+    users = await crud.get_users_batch(session=session, ids=ids, usernames=usernames)
 
+    requested_ids = set(ids)
+    requested_usernames = set(usernames)
+    by_id = {}
+    by_username = {}
+    for user in users:
+        user_data = UserSchema.model_validate(user)
+        if user.user_id in requested_ids:
+            by_id[user.user_id] = user_data
+        if user.username in requested_usernames:
+            by_username[user.username] = user_data
 
-@router.get("/get_users/", response_model=list[ReadUser])
-async def get_users(
+    return UserBatchResponse(
+        by_id=by_id,
+        by_username=by_username,
+        missing_ids=[user_id for user_id in ids if user_id not in by_id],
+        missing_usernames=[username for username in usernames if username not in by_username],
+    )
+
+
+@router.get("/export")
+async def export_users(
+        export_format: Annotated[
+            Literal["ndjson", "csv"],
+            Query(alias="format")
+        ] = "ndjson",
+        is_active: bool | None = None,
+):
+    """
+    Полная выгрузка пользователей потоком (NDJSON/CSV)
+    """
+    columns = [column.key for column in crud.USER_EXPORT_COLUMNS]
+
+    async def body():
+        # Своя сессия (реплика): зависимость закрылась бы до начала отдачи тела
+        async with db_helper.read_session() as session:
+            partitions = crud.stream_users_for_export(
+                session=session,
+                batch_size=settings.export.batch_size,
+                is_active=is_active,
+            )
+            async for chunk in stream_export(columns, partitions, export_format):
+                yield chunk
+
+    return StreamingResponse(
+        body(),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="users.{export_format}"'},
+    )
+
+
+@router.post("/import", response_model=UserImportResponse)
+async def import_users_bulk(
+        request: Request,
         session: Annotated[
             AsyncSession,
             Depends(db_helper.session_getter),
         ],
+        import_format: Annotated[
+            Literal["ndjson", "csv"] | None,
+            Query(alias="format")
+        ] = None,
 ):
-    users = await crud.get_all_users(session=session)
-    return users
+    """
+    Массовое создание пользователей: тело запроса - NDJSON или CSV (username,email).
+    Формат берется из ?format=, иначе из Content-Type
+    """
+    if import_format is None:
+        content_type = request.headers.get("content-type", "")
+        import_format = "csv" if "csv" in content_type else "ndjson"
+
+    return await import_users(
+        session=session,
+        chunks=request.stream(),
+        import_format=import_format,
+        batch_size=settings.user_import.batch_size,
+        method=settings.user_import.method,
+        max_rows=settings.user_import.max_rows,
+        max_line_bytes=settings.user_import.max_line_bytes,
+    )
 
 
 @router.get("/{user_id}/", response_model=UserSchema)
@@ -70,13 +190,13 @@ async def get_user(
         user_id: int,
         session: Annotated[
             AsyncSession,
-            Depends(db_helper.session_getter),
+            Depends(db_helper.read_session_getter),
         ],
 ):
     user = await crud.get_user(user_id=user_id, session=session)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    return user_serializer.response(user)
 
 
 @router.get("/username/{username}/", response_model=UserSchema)
@@ -84,16 +204,15 @@ async def get_user_by_username(
         username: str,
         session: Annotated[
             AsyncSession,
-            Depends(db_helper.session_getter),
+            Depends(db_helper.read_session_getter),
         ],
 ):
-    result = await session.execute(select(User).where(User.username == username))
-    user = result.scalar_one_or_none()
+    user = await crud.get_user_by_username(session=session, username=username)
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    return user
+    return user_serializer.response(user)
 
 
 @router.patch("/change_user/{user_id}/", response_model=UserSchema)
@@ -108,71 +227,38 @@ async def update_user(
             Depends(db_helper.session_getter),
         ],
 ):
-    user = await crud.get_user(session=session, user_id=user_id)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    updated = False
-
+    values = {}
     if data.new_name:
-        user.username = data.new_name
-        updated = True
+        values["username"] = data.new_name
     if data.email:
-        user.email = data.email
-        updated = True
-    if data.is_active:
-        user.is_active = data.is_active
-        updated = True
+        values["email"] = data.email
+    if data.is_active is not None:
+        values["is_active"] = data.is_active
 
-    if not updated:
+    if not values:
         raise HTTPException(status_code=400, detail="No data provided for update")
 
-    try:
-        session.add(user)
-        await session.commit()
-        await session.refresh(user)
-    except SQLAlchemyError as e:
-        await session.rollback()
-        print(f"Database error: {e}")
-        raise HTTPException(status_code=500, detail="Internal Server Error")
+    # Конфликт по username/email -> 409 (crud.update_user)
+    user = await crud.update_user(session=session, user_id=user_id, values=values)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
 
-    return user
+    outbox_dispatcher.notify()
+    return user_serializer.response(user)
 
 
-@router.delete("/{user_id}/")
+@router.delete("/{user_id}/", response_model=UserSchema)
 async def delete_user_service_user(
         user_id: int,
         session: Annotated[
             AsyncSession,
             Depends(db_helper.session_getter),
         ],
-
 ):
-    user = await crud.get_user(session=session, user_id=user_id)
+    # Удаление и событие для auth_service - одним коммитом, auth_user удалит outbox_dispatcher
+    user = await crud.delete_user(session=session, user_id=user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    async with httpx.AsyncClient() as client:
-        response = await client.delete(f"{settings.auth_service_url}/api/v1/auth/{user.user_id}")
-
-    # Пользователь не найден
-    if response.status_code != 200:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid username"
-        )
-
-    # Пользователь найден
-    await crud.delete_user(user.user_id, session)
-
-    try:
-        await session.delete(user)
-        await session.commit()
-    except SQLAlchemyError as e:
-        await session.rollback()
-        print(f"Database error: {e}")
-        raise HTTPException(
-            status_code=500,
-            detail="Internal server error")
-
-    return user
+    outbox_dispatcher.notify()
+    return user_serializer.response(user)
@@ -1,25 +1,14 @@
-from email.message import EmailMessage
-
-import aiosmtplib
+from user_service.core.mailer import email_worker
 
 
 async def send_email(
         recipient: str,
         subject: str,
         body: str,
-):
-    admin_email = "admin@example.com"
-
-    message = EmailMessage()
-    message["From"] = admin_email
-    message["To"] = recipient
-    message["Subject"] = subject
-    message.set_content(body)
-
-    await aiosmtplib.send(
-        message,
-        sender=admin_email,
-        recipients=[recipient],
-        hostname="localhost",
-        port=1025,
-    )
\ No newline at end of file
+) -> bool:
+    # Письмо уходит в очередь email_worker: отправка пачками по одному SMTP-соединению
+    return await email_worker.enqueue(
+        recipient=recipient,
+        subject=subject,
+        body=body,
+    )
@@ -1,17 +1,15 @@
-from user_service.crud import crud
-from user_service.core.models import User, db_helper
-from .send_email import send_email
+from user_service.core.mailer import EmailTemplate, email_worker
 
+WELCOME_EMAIL = EmailTemplate(
+    subject="Welcome to our site!",
+    body="Dear ${username},\n\nWelcome to our site!",
+)
 
-async def send_welcome_email(user_id: int) -> None:
-    async with db_helper.session_factory() as session:
-        user: User = await crud.get_user(
-            session=session,
-            user_id=user_id,
-        )
 
-    await send_email(
-        recipient=user.email,
-        subject="Welcome to our site!",
-        body=f"Dear {user.username},\n\nWelcome to our site!",
-    )
\ No newline at end of file
+async def send_welcome_email(email: str, username: str) -> None:
+    # Данные уже есть после создания пользователя - без повторного запроса в БД
+    await email_worker.enqueue_template(
+        WELCOME_EMAIL,
+        recipient=email,
+        username=username,
+    )
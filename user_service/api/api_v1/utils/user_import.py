@@ -0,0 +1,121 @@
+import time
+from typing import Any, AsyncIterable
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from user_service.core.schemas.user import CreateUser
+from user_service.crud import crud
+from user_service.utils import iter_records
+
+
+def _validation_errors(e: ValidationError) -> list[str]:
+    return [
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+        for error in e.errors()
+    ]
+
+
+async def import_users(
+        session: AsyncSession,
+        chunks: AsyncIterable[bytes],
+        import_format: str = "ndjson",
+        batch_size: int = 1000,
+        method: str = "copy",
+        max_rows: int = 100_000,
+        max_line_bytes: int | None = None,
+) -> dict[str, Any]:
+    """
+    Потоковый импорт: строки валидируются по мере чтения тела,
+    каждые batch_size валидных строк загружаются одной транзакцией.
+    На строке сверх max_rows чтение останавливается: в отчете одна строка skipped
+    и stats.truncated. Уже загруженные пачки остаются, поэтому ответ - обычный отчет, а не ошибка
+    """
+    started = time.perf_counter()
+    results: list[dict[str, Any]] = []
+    stats = {
+        "total": 0,
+        "created": 0,
+        "conflicts": 0,
+        "duplicates": 0,
+        "invalid": 0,
+        "skipped": 0,
+        "batches": 0,
+        "truncated": False,
+    }
+    # Дубликаты внутри файла отсекаем до БД: первая строка выигрывает
+    seen_usernames: set[str] = set()
+    seen_emails: set[str] = set()
+    batch: list[tuple[int, str, str]] = []
+
+    async def flush() -> None:
+        if not batch:
+            return
+        created = await crud.import_users_batch(session=session, rows=batch, method=method)
+        stats["batches"] += 1
+        for line, username, _ in batch:
+            user_id = created.get(line)
+            if user_id is not None:
+                stats["created"] += 1
+                results.append({"line": line, "status": "created", "user_id": user_id, "username": username})
+            else:
+                stats["conflicts"] += 1
+                results.append({
+                    "line": line,
+                    "status": "conflict",
+                    "username": username,
+                    "errors": ["User with such username or email already exists"],
+                })
+        batch.clear()
+
+    async for line_no, record, error in iter_records(chunks, import_format, max_line_bytes):
+        if stats["total"] >= max_rows:
+            # Остаток тела не читаем: память и размер отчета не растут вместе с загрузкой
+            stats["skipped"] += 1
+            stats["truncated"] = True
+            results.append({
+                "line": line_no,
+                "status": "skipped",
+                "errors": [f"Row limit {max_rows} exceeded, the rest of the upload was not read"],
+            })
+            break
+        stats["total"] += 1
+
+        if error is not None:
+            stats["invalid"] += 1
+            results.append({"line": line_no, "status": "invalid", "errors": [error]})
+            continue
+        try:
+            user = CreateUser.model_validate(record)
+        except ValidationError as e:
+            stats["invalid"] += 1
+            results.append({"line": line_no, "status": "invalid", "errors": _validation_errors(e)})
+            continue
+
+        if user.username in seen_usernames or user.email in seen_emails:
+            stats["duplicates"] += 1
+            results.append({
+                "line": line_no,
+                "status": "duplicate",
+                "username": user.username,
+                "errors": ["Duplicate username or email in upload"],
+            })
+            continue
+        seen_usernames.add(user.username)
+        seen_emails.add(user.email)
+
+        batch.append((line_no, user.username, user.email))
+        if len(batch) >= batch_size:
+            await flush()
+    await flush()
+
+    elapsed = time.perf_counter() - started
+    results.sort(key=lambda row: row["line"])
+    return {
+        "results": results,
+        "stats": {
+            **stats,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(stats["total"] / elapsed, 1) if elapsed else 0.0,
+        },
+    }
@@ -0,0 +1,69 @@
+"""
+Микробенчмарк сериализации ответа списка пользователей.
+
+default     - как FastAPI: валидация response_model (from_attributes) + json.dumps
+orjson      - та же валидация, рендер через FastJSONResponse
+precompiled - RowSerializer: без повторной валидации, сразу в JSON
+
+Запуск (из корня репозитория):
+    python -m user_service.benchmarks.bench_serialization
+"""
+import json
+import timeit
+from datetime import datetime
+from types import SimpleNamespace
+
+from pydantic import TypeAdapter
+
+from user_service.core.schemas.user import UserSchema
+from user_service.core.serialization import FastJSONResponse, RowSerializer
+
+SIZES = (1, 10, 100, 1000)
+
+
+def make_rows(count: int) -> list[SimpleNamespace]:
+    now = datetime(2026, 1, 1, 12, 0, 0)
+    return [
+        SimpleNamespace(
+            user_id=i,
+            username=f"user_{i}",
+            email=f"user_{i}@example.com",
+            is_active=bool(i % 2),
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def main() -> None:
+    adapter = TypeAdapter(list[UserSchema])
+    serializer = RowSerializer(UserSchema)
+    fast_response = FastJSONResponse(content=None)
+
+    def default(rows):
+        data = adapter.dump_python(adapter.validate_python(rows, from_attributes=True), mode="json")
+        return json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+    def with_orjson(rows):
+        data = adapter.dump_python(adapter.validate_python(rows, from_attributes=True), mode="json")
+        return fast_response.render(data)
+
+    def precompiled(rows):
+        return serializer.dump_many(rows)
+
+    cases = (("default", default), ("orjson", with_orjson), ("precompiled", precompiled))
+
+    print(f"{'rows':>6} {'case':>12} {'us/call':>12} {'speedup':>8}")
+    for size in SIZES:
+        rows = make_rows(size)
+        number = max(10, 20_000 // size)
+        baseline = None
+        for name, fn in cases:
+            best = min(timeit.repeat(lambda: fn(rows), number=number, repeat=5)) / number
+            baseline = baseline or best
+            print(f"{size:>6} {name:>12} {best * 1e6:>12.1f} {baseline / best:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
-from pydantic import BaseModel, PostgresDsn
+from typing import Literal
+
+from pydantic import BaseModel, Field, PostgresDsn
 from pydantic_settings import (
     BaseSettings,
     SettingsConfigDict,
@@ -20,6 +22,66 @@ class ApiPrefix(BaseModel):
     v1: ApiV1Prefix = ApiV1Prefix()
 
 
+class HttpClientConfig(BaseModel):
+    timeout: float = 10.0  # seconds
+    connect_timeout: float = 5.0
+    pool_timeout: float = 5.0
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = False  # требует httpx[http2]
+
+
+class BatchConfig(BaseModel):
+    max_items: int = 500  # ids + usernames в одном запросе /users/batch
+
+
+class PaginationConfig(BaseModel):
+    default_limit: int = 100
+    max_limit: int = 1000
+
+
+class ExportConfig(BaseModel):
+    batch_size: int = 1000  # строк за одну выборку из серверного курсора (yield_per)
+
+
+class UserImportConfig(BaseModel):
+    batch_size: int = 1000  # строк в одной транзакции staging -> user
+    method: Literal["copy", "executemany"] = "copy"  # загрузка в staging
+    max_rows: int = 100_000  # дальше загрузка не читается (stats.truncated)
+    max_line_bytes: int = 64 * 1024  # более длинная строка - invalid
+
+
+class EmailConfig(BaseModel):
+    enabled: bool = False  # включается явно вместе с hostname SMTP-сервера
+    hostname: str = "localhost"
+    port: int = 1025
+    sender: str = "admin@example.com"
+    username: str | None = None
+    password: str | None = None
+    use_tls: bool = False
+    start_tls: bool | None = False  # None - STARTTLS, если сервер поддерживает
+    timeout: float = 10.0
+    queue_maxsize: int = 10_000  # сверх этого письма отбрасываются
+    batch_size: int = 50  # писем за одну сессию SMTP
+    batch_wait_seconds: float = 0.5  # сколько добирать пачку после первого письма
+    rate_per_second: float = 20.0  # 0 - без ограничения
+    max_attempts: int = 3
+    retry_backoff_base: float = 1.0
+    retry_backoff_cap: float = 60.0
+    idle_timeout_seconds: float = 30.0  # закрыть соединение, если писем нет
+
+
+class OutboxConfig(BaseModel):
+    enabled: bool = True
+    batch_size: int = 100  # событий в одном запросе к auth_service
+    interval_seconds: float = 1.0  # опрос таблицы, если никто не разбудил
+    lease_seconds: float = 30.0  # событие не берется другим воркером, пока идет доставка
+    max_attempts: int = 20  # потом событие помечается failed_at
+    retry_backoff_base: float = 1.0
+    retry_backoff_cap: float = 300.0
+
+
 class DataBaseConfig(BaseModel):
     url: PostgresDsn
     echo: bool = False
@@ -28,6 +90,18 @@ class DataBaseConfig(BaseModel):
     pool_pre_ping: bool = True
     pool_recycle: int = 600
     pool_size: int = 50
+    query_cache_size: int = 500  # кэш скомпилированных statement-ов SQLAlchemy
+    prepared_statement_cache_size: int = 100  # подготовленные statement-ы asyncpg на соединение
+
+    # Реплики для чтения (JSON-список в env: USER_SERVICE__DB__REPLICA_URLS)
+    replica_urls: list[PostgresDsn] = []
+    replica_strategy: Literal["round_robin", "least_connections"] = "round_robin"
+    replica_max_lag_seconds: float = 5.0  # больше - реплика исключается
+    replica_check_interval_seconds: float = 5.0
+    replica_eject_seconds: float = 30.0
+    replica_pool_size: int = 20
+    replica_max_overflow: int = 10
+    read_your_writes_seconds: float = 5.0  # после записи клиент читает с мастера; 0 - выключено
 
     naming_conventions: dict[str, str] = {
         "ix": "ix_%(column_0_label)s",
@@ -46,9 +120,19 @@ class Settings(BaseSettings):
         env_prefix="USER_SERVICE__"
     )
     auth_service_url: str
+    # Общий секрет для межсервисных эндпоинтов auth_service (заголовок X-Internal-Token)
+    # Без значения по умолчанию и не короче 32 символов: заглушка из шаблона не пройдет
+    internal_api_token: str = Field(min_length=32)
     run: RunModel = RunModel()
     api: ApiPrefix = ApiPrefix()
+    pagination: PaginationConfig = PaginationConfig()
+    export: ExportConfig = ExportConfig()
+    user_import: UserImportConfig = UserImportConfig()
     db: DataBaseConfig
+    auth_service_client: HttpClientConfig = HttpClientConfig()
+    batch: BatchConfig = BatchConfig()
+    email: EmailConfig = EmailConfig()
+    outbox: OutboxConfig = OutboxConfig()
 
 
 settings = Settings()
@@ -0,0 +1,97 @@
+import logging
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+
+import httpx
+
+from user_service.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def no_cookies() -> CookieJar:
+    """
+    Межсервисный клиент общий для всех запросов: cookie из одного ответа
+    (например, db_primary_until) не должны уходить во все последующие
+    """
+    return CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+
+
+class HttpClientHelper:
+    """
+    Один долгоживущий httpx.AsyncClient на сервис (keep-alive пул соединений).
+    Создается и закрывается в lifespan.
+    """
+    def __init__(
+            self,
+            base_url: str,
+            timeout: float = 10.0,
+            connect_timeout: float = 5.0,
+            pool_timeout: float = 5.0,
+            max_connections: int = 100,
+            max_keepalive_connections: int = 20,
+            keepalive_expiry: float = 30.0,
+            http2: bool = False,
+            headers: dict[str, str] | None = None,
+    ) -> None:
+        self.base_url = base_url
+        self.headers = headers or {}
+        self.timeout = httpx.Timeout(
+            timeout,
+            connect=connect_timeout,
+            pool=pool_timeout,
+        )
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2
+        self._client: httpx.AsyncClient | None = None
+
+    async def start(self) -> None:
+        if self._client is not None:
+            return
+
+        http2 = self.http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("HTTP/2 disabled: package 'h2' is not installed (httpx[http2])")
+                http2 = False
+
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            limits=self.limits,
+            http2=http2,
+            cookies=no_cookies(),
+            headers=self.headers,
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            raise RuntimeError("HTTP client is not started, check lifespan")
+        return self._client
+
+    def client_getter(self) -> httpx.AsyncClient:
+        return self.client
+
+    async def dispose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+auth_service_client = HttpClientHelper(
+    base_url=settings.auth_service_url,
+    timeout=settings.auth_service_client.timeout,
+    connect_timeout=settings.auth_service_client.connect_timeout,
+    pool_timeout=settings.auth_service_client.pool_timeout,
+    max_connections=settings.auth_service_client.max_connections,
+    max_keepalive_connections=settings.auth_service_client.max_keepalive_connections,
+    keepalive_expiry=settings.auth_service_client.keepalive_expiry,
+    http2=settings.auth_service_client.http2,
+    headers={"X-Internal-Token": settings.internal_api_token},
+)
@@ -0,0 +1,296 @@
+import asyncio
+import logging
+import random
+import string
+from dataclasses import dataclass
+from email.message import EmailMessage
+from typing import Any
+
+import aiosmtplib
+
+from user_service.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class EmailTemplate:
+    """
+    Шаблон разбирается один раз при импорте, на письмо - только подстановка
+    """
+    def __init__(self, subject: str, body: str) -> None:
+        self.subject = string.Template(subject)
+        self.body = string.Template(body)
+
+    def render(self, **context: Any) -> tuple[str, str]:
+        return self.subject.substitute(context), self.body.substitute(context)
+
+
+@dataclass
+class OutgoingEmail:
+    message: EmailMessage
+    attempts: int = 0
+
+
+def is_permanent_failure(e: Exception) -> bool:
+    # Адрес отклонен или 5xx - повтор не поможет
+    if isinstance(e, aiosmtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(e, aiosmtplib.SMTPResponseException) and e.code >= 500
+
+
+class EmailWorker:
+    """
+    Фоновая отправка писем: очередь в процессе, одно долгоживущее
+    SMTP-соединение, пачки писем за сессию, ограничение скорости и ретраи.
+    Запускается и останавливается в lifespan.
+    """
+    def __init__(
+            self,
+            hostname: str = "localhost",
+            port: int = 1025,
+            sender: str = "admin@example.com",
+            username: str | None = None,
+            password: str | None = None,
+            use_tls: bool = False,
+            start_tls: bool | None = False,
+            timeout: float = 10.0,
+            queue_maxsize: int = 10_000,
+            batch_size: int = 50,
+            batch_wait_seconds: float = 0.5,
+            rate_per_second: float = 20.0,
+            max_attempts: int = 3,
+            retry_backoff_base: float = 1.0,
+            retry_backoff_cap: float = 60.0,
+            idle_timeout_seconds: float = 30.0,
+            enabled: bool = True,
+    ) -> None:
+        self.hostname = hostname
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.start_tls = start_tls
+        self.timeout = timeout
+        self.queue_maxsize = queue_maxsize
+        self.batch_size = batch_size
+        self.batch_wait_seconds = batch_wait_seconds
+        self.rate_per_second = rate_per_second
+        self.max_attempts = max_attempts
+        self.retry_backoff_base = retry_backoff_base
+        self.retry_backoff_cap = retry_backoff_cap
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.enabled = enabled
+
+        self._queue: asyncio.Queue[OutgoingEmail] | None = None
+        self._task: asyncio.Task | None = None
+        self._smtp: aiosmtplib.SMTP | None = None
+        self._retrying: dict[int, asyncio.TimerHandle] = {}
+        self._next_send_at = 0.0
+
+        # metrics
+        self.queued = 0
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.dropped = 0
+        self.batches = 0
+        self.connections = 0
+
+    def start(self) -> None:
+        if not self.enabled or self._task is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_maxsize)
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Email worker started: {self.hostname}:{self.port}")
+
+    async def stop(self, drain_timeout: float = 5.0) -> None:
+        if self._task is None:
+            return
+        for handle in self._retrying.values():
+            handle.cancel()
+        if self._retrying:
+            logger.warning(f"Email worker stopped with {len(self._retrying)} pending retries")
+        self._retrying.clear()
+
+        # Досылаем то, что уже в очереди
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Email queue not drained, {self._queue.qsize()} messages lost")
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self._disconnect()
+
+    def build_message(self, recipient: str, subject: str, body: str) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = recipient
+        message["Subject"] = subject
+        message.set_content(body)
+        return message
+
+    async def enqueue(self, recipient: str, subject: str, body: str) -> bool:
+        """
+        Не ждет отправки. False - письмо отброшено (воркер выключен или очередь полна).
+        Асинхронная, чтобы BackgroundTasks вызывал ее в event loop, а не в потоке
+        """
+        if self._queue is None:
+            if self.enabled:
+                logger.warning("Email worker is not started, message dropped")
+                self.dropped += 1
+            return False
+        try:
+            self._queue.put_nowait(OutgoingEmail(self.build_message(recipient, subject, body)))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning(f"Email queue is full, message to {recipient} dropped")
+            return False
+        self.queued += 1
+        return True
+
+    async def enqueue_template(self, template: EmailTemplate, recipient: str, **context: Any) -> bool:
+        subject, body = template.render(**context)
+        return await self.enqueue(recipient, subject, body)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                first = await asyncio.wait_for(self._queue.get(), timeout=self.idle_timeout_seconds)
+            except asyncio.TimeoutError:
+                await self._disconnect()
+                continue
+
+            # Добираем пачку: под нагрузкой - сразу, иначе ждем не дольше batch_wait_seconds
+            batch = [first]
+            deadline = loop.time() + self.batch_wait_seconds
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._send_batch(batch)
+            except Exception as e:
+                logger.exception(f"Email batch failed: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _send_batch(self, batch: list[OutgoingEmail]) -> None:
+        self.batches += 1
+        for item in batch:
+            await self._throttle()
+            try:
+                smtp = await self._connection()
+                await smtp.send_message(item.message)
+            except Exception as e:
+                await self._handle_failure(item, e)
+            else:
+                self.sent += 1
+
+    async def _connection(self) -> aiosmtplib.SMTP:
+        if self._smtp is not None and self._smtp.is_connected:
+            return self._smtp
+        smtp = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            username=self.username,
+            password=self.password,
+            use_tls=self.use_tls,
+            start_tls=self.start_tls,
+            timeout=self.timeout,
+        )
+        await smtp.connect()
+        self._smtp = smtp
+        self.connections += 1
+        return smtp
+
+    async def _disconnect(self) -> None:
+        smtp, self._smtp = self._smtp, None
+        if smtp is None or not smtp.is_connected:
+            return
+        try:
+            await smtp.quit()
+        except Exception:
+            smtp.close()
+
+    async def _throttle(self) -> None:
+        if self.rate_per_second <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        wait = self._next_send_at - loop.time()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        self._next_send_at = max(loop.time(), self._next_send_at) + 1 / self.rate_per_second
+
+    async def _handle_failure(self, item: OutgoingEmail, e: Exception) -> None:
+        item.attempts += 1
+        # Состояние сессии после ошибки неизвестно - следующее письмо на новом соединении
+        await self._disconnect()
+
+        if is_permanent_failure(e) or item.attempts >= self.max_attempts:
+            self.failed += 1
+            logger.error(f"Email to {item.message['To']} failed after {item.attempts} attempts: {e}")
+            return
+
+        self.retried += 1
+        delay = min(self.retry_backoff_cap, self.retry_backoff_base * 2 ** (item.attempts - 1))
+        delay *= random.uniform(0.5, 1.0)
+        self._retrying[id(item)] = asyncio.get_running_loop().call_later(delay, self._requeue, item)
+
+    def _requeue(self, item: OutgoingEmail) -> None:
+        self._retrying.pop(id(item), None)
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning(f"Email queue is full, retry to {item.message['To']} dropped")
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "running": self._task is not None,
+            "queue_size": self._queue.qsize() if self._queue is not None else 0,
+            "queue_maxsize": self.queue_maxsize,
+            "retrying": len(self._retrying),
+            "connected": self._smtp is not None and self._smtp.is_connected,
+            "queued": self.queued,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "connections": self.connections,
+        }
+
+
+email_worker = EmailWorker(
+    hostname=settings.email.hostname,
+    port=settings.email.port,
+    sender=settings.email.sender,
+    username=settings.email.username,
+    password=settings.email.password,
+    use_tls=settings.email.use_tls,
+    start_tls=settings.email.start_tls,
+    timeout=settings.email.timeout,
+    queue_maxsize=settings.email.queue_maxsize,
+    batch_size=settings.email.batch_size,
+    batch_wait_seconds=settings.email.batch_wait_seconds,
+    rate_per_second=settings.email.rate_per_second,
+    max_attempts=settings.email.max_attempts,
+    retry_backoff_base=settings.email.retry_backoff_base,
+    retry_backoff_cap=settings.email.retry_backoff_cap,
+    idle_timeout_seconds=settings.email.idle_timeout_seconds,
+    enabled=settings.email.enabled,
+)
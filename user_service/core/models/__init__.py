@@ -3,8 +3,10 @@ __all__ = (
     'db_helper',
     "DatabaseHelper",
     "User",
+    "UserOutbox",
 )
 
 from .base import Base
 from .db_helper import db_helper, DatabaseHelper
 from .user import User
+from .user_outbox import UserOutbox
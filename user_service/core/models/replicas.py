@@ -0,0 +1,266 @@
+import asyncio
+import itertools
+import logging
+import math
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import (
+    create_async_engine,
+    AsyncEngine,
+    async_sessionmaker,
+    AsyncSession,
+)
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+logger = logging.getLogger(__name__)
+
+# 0 - реплика догнала мастер (или это не реплика), иначе - секунды с последней примененной транзакции
+REPLICA_LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+def is_connection_error(e: BaseException) -> bool:
+    if isinstance(e, (OSError, OperationalError, InterfaceError)):
+        return True
+    return isinstance(e, DBAPIError) and e.connection_invalidated
+
+
+# ---- read-your-writes ----
+
+@dataclass
+class RequestDBState:
+    # Запрос пришел с cookie "недавно писал" - читаем с мастера
+    primary: bool = False
+    # В этом запросе был коммит на мастере
+    wrote: bool = False
+
+
+_request_db_state: ContextVar[RequestDBState | None] = ContextVar("request_db_state", default=None)
+
+
+def mark_primary_write(*args: Any) -> None:
+    # Слушатель "commit" движка мастера
+    state = _request_db_state.get()
+    if state is not None:
+        state.wrote = True
+
+
+def wants_primary() -> bool:
+    state = _request_db_state.get()
+    return state is not None and (state.primary or state.wrote)
+
+
+class ReadYourWritesMiddleware(BaseHTTPMiddleware):
+    """
+    После записи клиент window_seconds читает с мастера (cookie),
+    чтобы не увидеть устаревшие данные с отстающей реплики
+    """
+    def __init__(
+            self,
+            app: Any,
+            window_seconds: float = 5.0,
+            cookie_name: str = "db_primary_until",
+    ) -> None:
+        super().__init__(app)
+        self.window_seconds = window_seconds
+        self.cookie_name = cookie_name
+
+    async def dispatch(self, request: Request, call_next):
+        if self.window_seconds <= 0:
+            return await call_next(request)
+
+        state = RequestDBState()
+        now = time.time()
+        try:
+            until = float(request.cookies.get(self.cookie_name, 0))
+        except ValueError:
+            until = 0.0
+        # Значение из будущего дальше окна - подделка, игнорируем
+        state.primary = now < until <= now + self.window_seconds
+
+        token = _request_db_state.set(state)
+        try:
+            response = await call_next(request)
+        finally:
+            _request_db_state.reset(token)
+
+        if state.wrote:
+            response.set_cookie(
+                self.cookie_name,
+                f"{time.time() + self.window_seconds:.3f}",
+                max_age=math.ceil(self.window_seconds),
+                httponly=True,
+                samesite="lax",
+            )
+        return response
+
+
+# ---- replicas ----
+
+class Replica:
+    def __init__(
+            self,
+            url: str,
+            pool_size: int = 20,
+            max_overflow: int = 10,
+            pool_pre_ping: bool = True,
+            echo: bool = False,
+            query_cache_size: int = 500,
+            prepared_statement_cache_size: int = 100,
+    ) -> None:
+        self.url = url
+        self.engine: AsyncEngine = create_async_engine(
+            url=url,
+            echo=echo,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_pre_ping=pool_pre_ping,
+            query_cache_size=query_cache_size,
+            connect_args={"prepared_statement_cache_size": prepared_statement_cache_size},
+        )
+        self.session_factory: async_sessionmaker[AsyncSession] = async_sessionmaker(
+            bind=self.engine,
+            autoflush=False,
+            autocommit=False,
+            expire_on_commit=False,
+        )
+        self.in_use = 0
+        self.lag_seconds: float | None = None
+        self.ejected_until = 0.0
+        self.ejections = 0
+        self.sessions = 0
+
+    @property
+    def name(self) -> str:
+        # Без пароля: для логов и метрик
+        return self.engine.url.render_as_string(hide_password=True)
+
+    def available(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def eject(self, seconds: float, reason: str) -> None:
+        if self.available(time.monotonic()):
+            self.ejections += 1
+            logger.warning(f"Replica {self.name} ejected for {seconds}s: {reason}")
+        self.ejected_until = time.monotonic() + seconds
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "url": self.name,
+            "available": self.available(time.monotonic()),
+            "in_use": self.in_use,
+            "lag_seconds": self.lag_seconds,
+            "sessions": self.sessions,
+            "ejections": self.ejections,
+        }
+
+
+class ReplicaSet:
+    """
+    Выбор реплики для чтения (round_robin / least_connections),
+    фоновая проверка лага и исключение отстающих и недоступных реплик
+    """
+    def __init__(
+            self,
+            urls: Sequence[str] = (),
+            strategy: str = "round_robin",
+            max_lag_seconds: float = 5.0,
+            check_interval_seconds: float = 5.0,
+            eject_seconds: float = 30.0,
+            pool_size: int = 20,
+            max_overflow: int = 10,
+            pool_pre_ping: bool = True,
+            echo: bool = False,
+            query_cache_size: int = 500,
+            prepared_statement_cache_size: int = 100,
+    ) -> None:
+        self.strategy = strategy
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self.eject_seconds = eject_seconds
+        self.replicas = [
+            Replica(
+                url=url,
+                pool_size=pool_size,
+                max_overflow=max_overflow,
+                pool_pre_ping=pool_pre_ping,
+                echo=echo,
+                query_cache_size=query_cache_size,
+                prepared_statement_cache_size=prepared_statement_cache_size,
+            )
+            for url in urls
+        ]
+        self._round_robin = itertools.count()
+        self._task: asyncio.Task | None = None
+        self.primary_fallbacks = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def choose(self) -> Replica | None:
+        now = time.monotonic()
+        candidates = [replica for replica in self.replicas if replica.available(now)]
+        if not candidates:
+            if self.replicas:
+                self.primary_fallbacks += 1
+            return None
+        if self.strategy == "least_connections":
+            return min(candidates, key=lambda replica: replica.in_use)
+        return candidates[next(self._round_robin) % len(candidates)]
+
+    async def check(self, replica: Replica) -> None:
+        try:
+            async with replica.engine.connect() as conn:
+                lag = float(await conn.scalar(REPLICA_LAG_QUERY))
+        except Exception as e:
+            replica.lag_seconds = None
+            replica.eject(self.eject_seconds, f"health check failed: {e}")
+            return
+
+        replica.lag_seconds = round(lag, 3)
+        if lag > self.max_lag_seconds:
+            replica.eject(self.eject_seconds, f"lag {lag:.1f}s")
+        elif not replica.available(time.monotonic()):
+            # Догнала мастер до истечения срока - возвращаем сразу
+            replica.ejected_until = 0.0
+            logger.info(f"Replica {replica.name} is back")
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+            await asyncio.sleep(self.check_interval_seconds)
+
+    def start(self) -> None:
+        if self.replicas and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def dispose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "strategy": self.strategy,
+            "primary_fallbacks": self.primary_fallbacks,
+            "replicas": [replica.stats() for replica in self.replicas],
+        }
@@ -0,0 +1,45 @@
+import uuid
+
+from sqlalchemy import String, TIMESTAMP, Text, Integer, JSON, Index, func, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+USER_CHANGED = "user.changed"
+USER_DELETED = "user.deleted"
+
+
+class UserOutbox(Base):
+    """
+    События для auth_service: пишутся в той же транзакции, что и изменение user,
+    доставляются в фоне (core.outbox.OutboxDispatcher)
+    """
+    __table_args__ = (
+        # Только недоставленные: строки удаляются после доставки
+        Index("ix_user_outbox_pending", "available_at", postgresql_where=text("failed_at IS NULL")),
+        # Проверка более раннего события того же пользователя при выборке пачки
+        Index("ix_user_outbox_user_id_id", "user_id", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    # Ключ идемпотентности на стороне auth_service
+    event_id: Mapped[str] = mapped_column(
+        String(36), unique=True, nullable=False, default=lambda: str(uuid.uuid4())
+    )
+    event_type: Mapped[str] = mapped_column(String(32), nullable=False)
+    # Без внешнего ключа: событие переживает удаление пользователя
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[TIMESTAMP] = mapped_column(TIMESTAMP, server_default=func.now())
+    # Следующая попытка (и аренда на время доставки)
+    available_at: Mapped[TIMESTAMP] = mapped_column(TIMESTAMP, server_default=func.now())
+    attempts: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Попытки исчерпаны - строка остается для разбора
+    failed_at: Mapped[TIMESTAMP | None] = mapped_column(TIMESTAMP, nullable=True)
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__}(id={self.id}, event_type={self.event_type!r}, user_id={self.user_id})"
+
+    def __repr__(self) -> str:
+        return str(self)
@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import random
+from datetime import timedelta
+from typing import Any, Callable, Sequence
+
+import httpx
+from sqlalchemy import select, update, delete, func, exists
+from sqlalchemy.orm import aliased
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from user_service.core.config import settings
+from user_service.core.http_client import auth_service_client
+from user_service.core.models import db_helper, UserOutbox
+
+logger = logging.getLogger(__name__)
+
+INBOX_URL = "/api/v1/auth/inbox/events"
+
+
+class OutboxDispatcher:
+    """
+    Фоновая доставка событий user_outbox в auth_service пачками.
+    1 забрать пачку (FOR UPDATE SKIP LOCKED) и продлить аренду - короткая транзакция
+    2 отправить одним запросом, без открытого соединения с БД
+    3 удалить доставленные, остальным - backoff или failed_at
+    Пока у пользователя есть более раннее недоставленное событие, его следующие события ждут.
+    Повторная доставка безопасна: auth_service пропускает уже обработанные event_id.
+    Запускается и останавливается в lifespan.
+    """
+    def __init__(
+            self,
+            session_factory: async_sessionmaker[AsyncSession],
+            client_getter: Callable[[], httpx.AsyncClient],
+            batch_size: int = 100,
+            interval_seconds: float = 1.0,
+            lease_seconds: float = 30.0,
+            max_attempts: int = 20,
+            retry_backoff_base: float = 1.0,
+            retry_backoff_cap: float = 300.0,
+            enabled: bool = True,
+    ) -> None:
+        self.session_factory = session_factory
+        self.client_getter = client_getter
+        self.batch_size = batch_size
+        self.interval_seconds = interval_seconds
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff_base = retry_backoff_base
+        self.retry_backoff_cap = retry_backoff_cap
+        self.enabled = enabled
+        self._task: asyncio.Task | None = None
+        self._wakeup = asyncio.Event()
+
+        # metrics
+        self.batches = 0
+        self.delivered = 0
+        self.duplicates = 0
+        self.retried = 0
+        self.dead = 0
+        self.last_error: str | None = None
+
+    def start(self) -> None:
+        if not self.enabled or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info("Outbox dispatcher started")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def notify(self) -> None:
+        # После коммита с событием: доставить сразу, не дожидаясь опроса
+        if self._task is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                claimed = await self.dispatch_once()
+            except Exception as e:
+                logger.exception(f"Outbox dispatch failed: {e}")
+                claimed = 0
+            # Полная пачка - вероятно, есть еще: без паузы
+            if claimed >= self.batch_size:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def dispatch_once(self) -> int:
+        events = await self._claim()
+        if not events:
+            return 0
+        self.batches += 1
+        failed = await self._deliver(events)
+        await self._finish(events, failed)
+        return len(events)
+
+    async def _claim(self) -> Sequence[UserOutbox]:
+        # События пользователя - строго по порядку: пока более раннее не доставлено
+        # (ждет ретрая, в аренде у другого воркера или failed), следующие не берем
+        older = aliased(UserOutbox)
+        has_older = exists().where(older.user_id == UserOutbox.user_id, older.id < UserOutbox.id)
+        async with self.session_factory() as session:
+            stmt = (
+                select(UserOutbox)
+                .where(
+                    UserOutbox.failed_at.is_(None),
+                    UserOutbox.available_at <= func.now(),
+                    ~has_older,
+                )
+                .order_by(UserOutbox.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            events = (await session.scalars(stmt)).all()
+            if events:
+                await session.execute(
+                    update(UserOutbox)
+                    .where(UserOutbox.id.in_([event.id for event in events]))
+                    .values(available_at=func.now() + timedelta(seconds=self.lease_seconds))
+                )
+                await session.commit()
+        return events
+
+    async def _deliver(self, events: Sequence[UserOutbox]) -> dict[int, str]:
+        """
+        Возвращает {id: ошибка} для недоставленных событий
+        """
+        try:
+            response = await self.client_getter().post(
+                INBOX_URL,
+                json={
+                    "events": [
+                        {
+                            "event_id": event.event_id,
+                            "event_type": event.event_type,
+                            "payload": event.payload,
+                        }
+                        for event in events
+                    ]
+                },
+            )
+            response.raise_for_status()
+            results = {row["event_id"]: row for row in response.json()["results"]}
+        except (httpx.HTTPError, ValueError, KeyError) as e:
+            error = f"{type(e).__name__}: {e}"
+            self.last_error = error
+            logger.warning(f"Outbox delivery of {len(events)} events failed: {error}")
+            return {event.id: error for event in events}
+
+        failed: dict[int, str] = {}
+        for event in events:
+            row = results.get(event.event_id)
+            if row is None:
+                failed[event.id] = "No result from auth_service"
+            elif row["status"] == "failed":
+                failed[event.id] = row.get("error") or "Failed in auth_service"
+            elif row["status"] == "duplicate":
+                self.duplicates += 1
+            elif row["status"] == "unsupported":
+                logger.warning(f"auth_service does not support {event.event_type}, event {event.event_id} dropped")
+        if failed:
+            self.last_error = next(iter(failed.values()))
+        return failed
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.retry_backoff_cap, self.retry_backoff_base * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _finish(self, events: Sequence[UserOutbox], failed: dict[int, str]) -> None:
+        done = [event.id for event in events if event.id not in failed]
+
+        # Одинаковые (attempts, ошибка) - одним UPDATE: при недоступности auth_service это вся пачка
+        groups: dict[tuple[int, str], list[int]] = {}
+        for event in events:
+            if event.id in failed:
+                groups.setdefault((event.attempts + 1, failed[event.id]), []).append(event.id)
+
+        async with self.session_factory() as session:
+            if done:
+                await session.execute(delete(UserOutbox).where(UserOutbox.id.in_(done)))
+            for (attempts, error), ids in groups.items():
+                values: dict[str, Any] = {"attempts": attempts, "last_error": error[:1000]}
+                if attempts >= self.max_attempts:
+                    values["failed_at"] = func.now()
+                    self.dead += len(ids)
+                    logger.error(f"Outbox events {ids} failed after {attempts} attempts: {error}")
+                else:
+                    values["available_at"] = func.now() + timedelta(seconds=self._backoff(attempts))
+                    self.retried += len(ids)
+                await session.execute(
+                    update(UserOutbox).where(UserOutbox.id.in_(ids)).values(**values)
+                )
+            await session.commit()
+        self.delivered += len(done)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "running": self._task is not None,
+            "batches": self.batches,
+            "delivered": self.delivered,
+            "duplicates": self.duplicates,
+            "retried": self.retried,
+            "dead": self.dead,
+            "last_error": self.last_error,
+        }
+
+
+outbox_dispatcher = OutboxDispatcher(
+    session_factory=db_helper.session_factory,
+    client_getter=auth_service_client.client_getter,
+    batch_size=settings.outbox.batch_size,
+    interval_seconds=settings.outbox.interval_seconds,
+    lease_seconds=settings.outbox.lease_seconds,
+    max_attempts=settings.outbox.max_attempts,
+    retry_backoff_base=settings.outbox.retry_backoff_base,
+    retry_backoff_cap=settings.outbox.retry_backoff_cap,
+    enabled=settings.outbox.enabled,
+)
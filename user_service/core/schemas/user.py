@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, ConfigDict
-from typing import Annotated, Optional
+from typing import Annotated, Literal, Optional
 from annotated_types import MinLen, MaxLen
 from datetime import datetime
 
@@ -19,6 +19,11 @@ class ReadUser(BaseModel):
     email: EmailStr
 
 
+class UsersPage(BaseModel):
+    items: list[ReadUser]
+    next_cursor: Optional[str] = None
+
+
 class UserSchema(BaseModel):
     model_config = ConfigDict(strict=True, from_attributes=True)
     user_id: int
@@ -30,6 +35,45 @@ class UserSchema(BaseModel):
 
 
 class UserUpdateSchema(BaseModel):
-    new_name: Optional[str] = None
+    # Как у CreateUser: auth_user.username в auth_service - String(32)
+    new_name: Optional[Annotated[str, MinLen(3), MaxLen(32)]] = None
     email: Optional[EmailStr] = None
     is_active: Optional[bool] = None
+
+
+class UserBatchRequest(BaseModel):
+    ids: list[int] = []
+    usernames: list[str] = []
+
+
+class UserBatchResponse(BaseModel):
+    by_id: dict[int, UserSchema]
+    by_username: dict[str, UserSchema]
+    missing_ids: list[int]
+    missing_usernames: list[str]
+
+
+class UserImportRow(BaseModel):
+    line: int
+    status: Literal["created", "conflict", "duplicate", "invalid", "skipped"]
+    user_id: Optional[int] = None
+    username: Optional[str] = None
+    errors: list[str] = []
+
+
+class UserImportStats(BaseModel):
+    total: int = 0
+    created: int = 0
+    conflicts: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    skipped: int = 0
+    batches: int = 0
+    truncated: bool = False  # достигнут max_rows, остаток загрузки не прочитан
+    elapsed_seconds: float = 0.0
+    rows_per_second: float = 0.0
+
+
+class UserImportResponse(BaseModel):
+    results: list[UserImportRow]
+    stats: UserImportStats
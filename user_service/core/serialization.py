@@ -0,0 +1,68 @@
+from operator import attrgetter
+from typing import Any, Iterable, Optional
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, TypeAdapter
+from typing_extensions import TypedDict
+
+try:
+    import orjson
+except ImportError:  # orjson - опциональная зависимость
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse с рендером через orjson (если установлен)
+    """
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+class RowSerializer:
+    """
+    Сериализация уже провалидированных ORM-строк в JSON без повторной валидации.
+    Схема ответа компилируется в TypedDict-сериализатор один раз при импорте,
+    поэтому EmailStr и прочие валидаторы на выходе не вызываются.
+    """
+    def __init__(self, schema: type[BaseModel]) -> None:
+        self.schema = schema
+        self.fields = tuple(schema.model_fields)
+        row_type = TypedDict(
+            f"{schema.__name__}Row",
+            {name: field.annotation for name, field in schema.model_fields.items()},
+        )
+        page_type = TypedDict(
+            f"{schema.__name__}PageRow",
+            {"items": list[row_type], "next_cursor": Optional[str]},
+        )
+        self._getter = attrgetter(*self.fields)
+        self._one = TypeAdapter(row_type)
+        self._many = TypeAdapter(list[row_type])
+        self._page = TypeAdapter(page_type)
+
+    def to_dict(self, obj: Any) -> dict[str, Any]:
+        values = self._getter(obj)
+        if len(self.fields) == 1:
+            values = (values,)
+        return dict(zip(self.fields, values))
+
+    def dump_one(self, obj: Any) -> bytes:
+        return self._one.dump_json(self.to_dict(obj), warnings=False)
+
+    def dump_many(self, objs: Iterable[Any]) -> bytes:
+        return self._many.dump_json([self.to_dict(obj) for obj in objs], warnings=False)
+
+    def dump_page(self, objs: Iterable[Any], next_cursor: str | None) -> bytes:
+        return self._page.dump_json(
+            {"items": [self.to_dict(obj) for obj in objs], "next_cursor": next_cursor},
+            warnings=False,
+        )
+
+    def response(self, obj: Any, status_code: int = 200) -> Response:
+        return Response(self.dump_one(obj), status_code=status_code, media_type="application/json")
+
+    def page_response(self, objs: Iterable[Any], next_cursor: str | None) -> Response:
+        return Response(self.dump_page(objs, next_cursor), media_type="application/json")
@@ -4,20 +4,72 @@ read
 update
 delete
 """
-from typing import Sequence
+from typing import Any, AsyncIterator, Sequence
 from fastapi import HTTPException, status
 
-from sqlalchemy import select
+from sqlalchemy import (
+    select, update, delete, or_, Row,
+    Table, Column, MetaData, Integer, String,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.schema import CreateTable
 
-from user_service.core.models import User
+from user_service.core.models import User, UserOutbox
+from user_service.core.models.user_outbox import USER_CHANGED, USER_DELETED
 from user_service.core.schemas.user import CreateUser
+from user_service.crud.queries import USER_BY_EMAIL, USER_BY_USERNAME
+
+
+# Выгрузка: только кортежи колонок, без ORM-сущностей
+USER_EXPORT_COLUMNS = (
+    User.user_id,
+    User.username,
+    User.email,
+    User.is_active,
+    User.created_at,
+    User.updated_at,
+)
+
+
+async def stream_users_for_export(
+        session: AsyncSession,
+        batch_size: int,
+        is_active: bool | None = None,
+) -> AsyncIterator[Sequence[Row]]:
+    """
+    Серверный курсор: в памяти не больше batch_size строк
+    """
+    stmt = (
+        select(*USER_EXPORT_COLUMNS)
+        .order_by(User.user_id)
+        .execution_options(yield_per=batch_size)
+    )
+    if is_active is not None:
+        stmt = stmt.where(User.is_active == is_active)
+    result = await session.stream(stmt)
+    try:
+        async for rows in result.partitions():
+            yield rows
+    finally:
+        await result.close()
 
 
 async def get_all_users(
-        session: AsyncSession
+        session: AsyncSession,
+        limit: int,
+        after_id: int | None = None,
+        is_active: bool | None = None,
 ) -> Sequence[User]:
-    stmt = select(User).order_by(User.user_id)
+    """
+    Keyset-пагинация по user_id: возвращает до limit + 1 строк
+    """
+    stmt = select(User).order_by(User.user_id).limit(limit + 1)
+    if after_id is not None:
+        stmt = stmt.where(User.user_id > after_id)
+    if is_active is not None:
+        stmt = stmt.where(User.is_active == is_active)
     result = await session.scalars(stmt)
     return result.all()
 
@@ -29,46 +81,183 @@ async def get_user(
     return await session.get(User, user_id)
 
 
+async def get_users_batch(
+        session: AsyncSession,
+        ids: Sequence[int] = (),
+        usernames: Sequence[str] = (),
+) -> Sequence[User]:
+    conditions = []
+    if ids:
+        conditions.append(User.user_id.in_(ids))
+    if usernames:
+        conditions.append(User.username.in_(usernames))
+    if not conditions:
+        return []
+
+    stmt = select(User).where(or_(*conditions))
+    result = await session.scalars(stmt)
+    return result.all()
+
+
 async def get_user_by_email(
         session: AsyncSession,
         email: str,
 ) -> User | None:
-    result = await session.execute(select(User).where(User.email == email))
+    result = await session.execute(USER_BY_EMAIL, {"email": email})
+    return result.scalar_one_or_none()
+
+
+async def get_user_by_username(
+        session: AsyncSession,
+        username: str,
+) -> User | None:
+    result = await session.execute(USER_BY_USERNAME, {"username": username})
     return result.scalar_one_or_none()
 
 
+def add_outbox_event(session: AsyncSession, event_type: str, user: User) -> None:
+    """
+    Событие для auth_service в текущей транзакции: уйдет только вместе с коммитом
+    """
+    payload = {"user_id": user.user_id}
+    if event_type == USER_CHANGED:
+        payload.update(username=user.username, email=user.email, is_active=user.is_active)
+    session.add(UserOutbox(event_type=event_type, user_id=user.user_id, payload=payload))
+
+
+def _conflict() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="User with such username or email already exists"
+    )
+
+
 async def create_user(
         session: AsyncSession,
         user_create: CreateUser,
 ) -> User:
-    user = User(**user_create.model_dump())
-    session.add(user)
+    """
+    INSERT ... ON CONFLICT DO NOTHING RETURNING: проверка уникальности
+    и вставка одним запросом, без гонки между SELECT и INSERT
+    """
+    stmt = (
+        insert(User)
+        .values(**user_create.model_dump())
+        .on_conflict_do_nothing()
+        .returning(User)
+    )
+    user = await session.scalar(stmt)
+    if user is None:
+        await session.rollback()
+        raise _conflict()
+    add_outbox_event(session, USER_CHANGED, user)
     await session.commit()
     return user
 
 
-async def delete_user(
-        user_id: int,
+async def update_user(
         session: AsyncSession,
-):
-    stmt = select(User).where(User.user_id == user_id)
-    result = await session.execute(stmt)
-    user = result.scalar_one_or_none()
-
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-
-    await session.delete(user)
+        user_id: int,
+        values: dict[str, Any],
+) -> User | None:
+    """
+    UPDATE ... RETURNING: None, если пользователя нет
+    """
+    stmt = (
+        update(User)
+        .where(User.user_id == user_id)
+        .values(**values)
+        .returning(User)
+        .execution_options(synchronize_session=False)
+    )
     try:
+        user = await session.scalar(stmt)
+        if user is not None:
+            add_outbox_event(session, USER_CHANGED, user)
         await session.commit()
-    except Exception as e:
+    except IntegrityError:
         await session.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to delete user: {str(e)}"
+        raise _conflict()
+    return user
+
+
+async def delete_user(
+        session: AsyncSession,
+        user_id: int,
+        publish: bool = True,
+) -> User | None:
+    """
+    DELETE ... RETURNING: None, если пользователя нет.
+    publish=False - без события для auth_service (удаление только на этой стороне)
+    """
+    stmt = (
+        delete(User)
+        .where(User.user_id == user_id)
+        .returning(User)
+        .execution_options(synchronize_session=False)
+    )
+    user = await session.scalar(stmt)
+    if user is not None:
+        if publish:
+            add_outbox_event(session, USER_DELETED, user)
+        await session.commit()
+    return user
+
+
+# Временная таблица для импорта: живет до конца транзакции пачки
+_import_staging = Table(
+    "user_import_staging",
+    MetaData(),
+    Column("line", Integer, nullable=False),
+    Column("username", String(32), nullable=False),
+    Column("email", String(255), nullable=False),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
+
+
+async def import_users_batch(
+        session: AsyncSession,
+        rows: Sequence[tuple[int, str, str]],
+        method: str = "copy",
+) -> dict[int, int]:
+    """
+    Пачка (line, username, email): staging через COPY/executemany,
+    затем INSERT ... SELECT ... ON CONFLICT DO NOTHING RETURNING.
+    Возвращает {line: user_id} для созданных строк, остальные - конфликты
+    """
+    await session.execute(CreateTable(_import_staging))
+    columns = [column.name for column in _import_staging.columns]
+    if method == "copy":
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            _import_staging.name,
+            records=rows,
+            columns=columns,
+        )
+    else:
+        await session.execute(
+            _import_staging.insert(),
+            [dict(zip(columns, row)) for row in rows],
         )
 
-    return {"message": "User deleted successfully", "id": user_id}
+    users = User.__table__
+    stmt = (
+        insert(users)
+        .from_select(
+            ["username", "email"],
+            select(_import_staging.c.username, _import_staging.c.email)
+            .order_by(_import_staging.c.line),
+        )
+        .on_conflict_do_nothing()
+        .returning(users.c.user_id, users.c.username)
+    )
+    result = await session.execute(stmt)
+    created = {username: user_id for user_id, username in result}
+    await session.commit()
+    return {
+        line: created[username]
+        for line, username, _ in rows
+        if username in created
+    }
@@ -0,0 +1,22 @@
+"""
+Горячие запросы: конструкция строится один раз при импорте,
+значения передаются через bindparam при выполнении.
+Скомпилированный SQL берется из кэша движка (query_cache_size),
+на соединении asyncpg он же - подготовленный statement
+(prepared_statement_cache_size).
+"""
+from sqlalchemy import bindparam, select
+
+from user_service.core.models import User
+
+# params: username
+USER_BY_USERNAME = (
+    select(User)
+    .where(User.username == bindparam("username"))
+)
+
+# params: email
+USER_BY_EMAIL = (
+    select(User)
+    .where(User.email == bindparam("email"))
+)
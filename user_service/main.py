@@ -7,7 +7,12 @@ from fastapi import FastAPI
 from core.config import settings
 from core.models import Base
 from user_service.api import router as users_router
-from core.models.db_helper import db_helper
+# Тот же экземпляр, что и в роутерах (абсолютный импорт): реплики, read-your-writes
+from user_service.core.models.db_helper import db_helper
+from user_service.core.models.replicas import ReadYourWritesMiddleware
+from user_service.core.http_client import auth_service_client
+from user_service.core.mailer import email_worker
+from user_service.core.outbox import outbox_dispatcher
 
 
 @asynccontextmanager
@@ -19,15 +24,27 @@ async def lifespan(users_app: FastAPI):
 
     async with db_helper.engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    db_helper.start()
+
+    await auth_service_client.start()
+    email_worker.start()
+    outbox_dispatcher.start()
 
     yield
     # shutdown
+    await outbox_dispatcher.stop()
+    await email_worker.stop()
+    await auth_service_client.dispose()
     await db_helper.dispose()
 
 
 users_app = FastAPI(
     lifespan=lifespan
 )
+users_app.add_middleware(
+    ReadYourWritesMiddleware,
+    window_seconds=settings.db.read_your_writes_seconds,
+)
 users_app.include_router(router=users_router)
 
 
@@ -0,0 +1,19 @@
+import os
+from pathlib import Path
+
+
+def load_env_template() -> None:
+    # Settings читает .env-template из текущей папки, а тесты запускаются из корня репозитория
+    path = Path(__file__).resolve().parent.parent / ".env-template"
+    for line in path.read_text().splitlines():
+        line = line.strip()
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        key, value = line.split("=", 1)
+        os.environ.setdefault(key, value)
+
+
+
+load_env_template()
+# В шаблоне секрета нет - для тестов любой достаточной длины
+os.environ.setdefault("USER_SERVICE__INTERNAL_API_TOKEN", "test-internal-token-" + "x" * 32)
@@ -0,0 +1,134 @@
+import asyncio
+import importlib.util
+import socket
+import unittest
+
+from user_service.core.mailer import EmailWorker
+
+HAS_AIOSMTPD = importlib.util.find_spec("aiosmtpd") is not None
+
+if HAS_AIOSMTPD:
+    from aiosmtpd.controller import Controller
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class RecordingHandler:
+    """
+    Принимает письма; адресам из rejected отвечает 550 на RCPT,
+    адресам из deferred - 451 на DATA столько раз, сколько указано
+    """
+    def __init__(self) -> None:
+        self.messages: list[tuple[tuple, list[str]]] = []
+        self.rejected: set[str] = set()
+        self.deferred: dict[str, int] = {}
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.rejected:
+            return "550 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        for address in envelope.rcpt_tos:
+            if self.deferred.get(address, 0) > 0:
+                self.deferred[address] -= 1
+                return "451 Try again later"
+        self.messages.append((session.peer, list(envelope.rcpt_tos)))
+        return "250 Message accepted for delivery"
+
+
+@unittest.skipUnless(HAS_AIOSMTPD, "aiosmtpd is not installed")
+class EmailWorkerTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.handler = RecordingHandler()
+        self.controller = Controller(self.handler, hostname="127.0.0.1", port=free_port())
+        self.controller.start()
+        self.addCleanup(self.controller.stop)
+
+    async def asyncSetUp(self) -> None:
+        self.worker = EmailWorker(
+            hostname=self.controller.hostname,
+            port=self.controller.port,
+            batch_size=10,
+            batch_wait_seconds=0.2,
+            rate_per_second=0,
+            max_attempts=3,
+            retry_backoff_base=0.01,
+            retry_backoff_cap=0.05,
+            enabled=True,
+        )
+        self.worker.start()
+
+    async def asyncTearDown(self) -> None:
+        await self.worker.stop(drain_timeout=1.0)
+
+    async def wait_for(self, condition, timeout: float = 5.0) -> None:
+        deadline = asyncio.get_running_loop().time() + timeout
+        while not condition():
+            if asyncio.get_running_loop().time() > deadline:
+                self.fail(f"Timed out, worker stats: {self.worker.stats()}")
+            await asyncio.sleep(0.01)
+
+    async def test_batch_is_sent_over_one_connection(self):
+        for i in range(5):
+            self.assertTrue(await self.worker.enqueue(f"user{i}@example.com", "Hi", "Body"))
+
+        await self.wait_for(lambda: self.worker.sent == 5)
+
+        self.assertEqual(self.worker.batches, 1)
+        self.assertEqual(self.worker.connections, 1)
+        self.assertEqual(len({peer for peer, _ in self.handler.messages}), 1)
+        self.assertEqual(
+            [rcpt for _, rcpt in self.handler.messages],
+            [[f"user{i}@example.com"] for i in range(5)],
+        )
+
+    async def test_temporary_failure_is_retried(self):
+        self.handler.deferred["later@example.com"] = 1
+
+        await self.worker.enqueue("later@example.com", "Hi", "Body")
+        await self.wait_for(lambda: self.worker.sent == 1)
+
+        self.assertEqual(self.worker.retried, 1)
+        self.assertEqual(self.worker.failed, 0)
+        # После ошибки соединение открывается заново
+        self.assertEqual(self.worker.connections, 2)
+        self.assertEqual(self.handler.messages[0][1], ["later@example.com"])
+
+    async def test_retries_stop_after_max_attempts(self):
+        self.handler.deferred["busy@example.com"] = 10
+
+        await self.worker.enqueue("busy@example.com", "Hi", "Body")
+        await self.wait_for(lambda: self.worker.failed == 1)
+
+        self.assertEqual(self.worker.retried, 2)
+        self.assertEqual(self.worker.sent, 0)
+        self.assertEqual(self.handler.deferred["busy@example.com"], 7)
+
+    async def test_permanent_failure_is_not_retried(self):
+        self.handler.rejected.add("nobody@example.com")
+
+        await self.worker.enqueue("nobody@example.com", "Hi", "Body")
+        await self.worker.enqueue("ok@example.com", "Hi", "Body")
+        await self.wait_for(lambda: self.worker.failed + self.worker.sent == 2)
+
+        self.assertEqual(self.worker.failed, 1)
+        self.assertEqual(self.worker.sent, 1)
+        self.assertEqual(self.worker.retried, 0)
+        self.assertEqual([rcpt for _, rcpt in self.handler.messages], [["ok@example.com"]])
+
+    async def test_disabled_worker_drops_messages(self):
+        worker = EmailWorker(enabled=False)
+        worker.start()
+
+        self.assertFalse(await worker.enqueue("user@example.com", "Hi", "Body"))
+        self.assertFalse(worker.stats()["running"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,14 @@
 __all__ = (
     "camel_case_to_snake_case",
+    "encode_cursor",
+    "decode_cursor",
+    "paginate",
+    "EXPORT_MEDIA_TYPES",
+    "stream_export",
+    "iter_records",
 )
 
 from .case_converter import camel_case_to_snake_case
+from .pagination import encode_cursor, decode_cursor, paginate
+from .export import EXPORT_MEDIA_TYPES, stream_export
+from .importing import iter_records
@@ -0,0 +1,52 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Any, AsyncIterable, AsyncIterator, Sequence
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _to_json_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def rows_to_ndjson(columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> bytes:
+    lines = [
+        json.dumps(dict(zip(columns, row)), default=_to_json_value, separators=(",", ":"))
+        for row in rows
+    ]
+    lines.append("")
+    return "\n".join(lines).encode()
+
+
+def rows_to_csv(columns: Sequence[str], rows: Sequence[Sequence[Any]], header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(columns)
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+async def stream_export(
+        columns: Sequence[str],
+        partitions: AsyncIterable[Sequence[Sequence[Any]]],
+        export_format: str = "ndjson",
+) -> AsyncIterator[bytes]:
+    """
+    Одна пачка строк (yield_per) -> один чанк ответа.
+    Следующая пачка читается из курсора только после отправки предыдущей.
+    """
+    if export_format == "csv":
+        yield rows_to_csv(columns, (), header=True)
+        async for rows in partitions:
+            yield rows_to_csv(columns, rows)
+    else:
+        async for rows in partitions:
+            yield rows_to_ndjson(columns, rows)
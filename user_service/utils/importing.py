@@ -0,0 +1,81 @@
+import csv
+import json
+from typing import Any, AsyncIterable, AsyncIterator
+
+
+def _decode_line(line: bytes, line_no: int) -> str:
+    return line.decode("utf-8-sig" if line_no == 1 else "utf-8", errors="replace").rstrip("\r")
+
+
+async def iter_lines(
+        chunks: AsyncIterable[bytes],
+        max_line_bytes: int | None = None,
+) -> AsyncIterator[tuple[int, str | None]]:
+    """
+    Разбивает поток байтов на строки, не читая тело целиком.
+    В буфере только неразобранный хвост; строка длиннее max_line_bytes
+    не накапливается и отдается как None
+    """
+    buffer = bytearray()
+    oversized = False
+    line_no = 0
+    async for chunk in chunks:
+        start = 0
+        while (end := chunk.find(b"\n", start)) != -1:
+            line_no += 1
+            if oversized or (max_line_bytes and len(buffer) + end - start > max_line_bytes):
+                yield line_no, None
+            else:
+                buffer += chunk[start:end]
+                yield line_no, _decode_line(bytes(buffer), line_no)
+            buffer.clear()
+            oversized = False
+            start = end + 1
+
+        if not oversized:
+            buffer += chunk[start:]
+            if max_line_bytes and len(buffer) > max_line_bytes:
+                buffer.clear()
+                oversized = True
+
+    if buffer or oversized:
+        line_no += 1
+        yield line_no, None if oversized else _decode_line(bytes(buffer), line_no)
+
+
+async def iter_records(
+        chunks: AsyncIterable[bytes],
+        import_format: str = "ndjson",
+        max_line_bytes: int | None = None,
+) -> AsyncIterator[tuple[int, dict[str, Any] | None, str | None]]:
+    """
+    (номер строки, запись, ошибка разбора). CSV: первая строка - заголовок,
+    записи должны занимать одну строку
+    """
+    header: list[str] | None = None
+    async for line_no, line in iter_lines(chunks, max_line_bytes):
+        if line is None:
+            yield line_no, None, f"Line is longer than {max_line_bytes} bytes"
+            continue
+        if not line.strip():
+            continue
+
+        if import_format == "csv":
+            row = next(csv.reader([line]))
+            if header is None:
+                header = [name.strip() for name in row]
+                continue
+            if len(row) != len(header):
+                yield line_no, None, f"Expected {len(header)} columns, got {len(row)}"
+                continue
+            yield line_no, dict(zip(header, row)), None
+        else:
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_no, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield line_no, None, "Expected a JSON object"
+                continue
+            yield line_no, record, None
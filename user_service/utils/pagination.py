@@ -0,0 +1,39 @@
+import base64
+import json
+from typing import Any, Callable, Sequence, TypeVar
+
+from fastapi import HTTPException, status
+
+T = TypeVar("T")
+
+
+def encode_cursor(last_key: int) -> str:
+    raw = json.dumps({"after": last_key}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str | None) -> int | None:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(padded))["after"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def paginate(
+        rows: Sequence[T],
+        limit: int,
+        key: Callable[[T], Any],
+) -> tuple[Sequence[T], str | None]:
+    """
+    rows - выборка из limit + 1 строк: лишняя строка означает, что есть следующая страница
+    """
+    if len(rows) <= limit:
+        return rows, None
+    items = rows[:limit]
+    return items, encode_cursor(key(items[-1]))